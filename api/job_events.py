@@ -0,0 +1,159 @@
+import asyncio
+import collections
+import threading
+
+class Subscription:
+    """
+    A stream's interest in one job's events. The broker hands it the events stored by
+    this process as (seq, event) pairs and sets it when new ones arrive.
+    """
+    
+    def __init__(self, job_id: str, loop: asyncio.AbstractEventLoop):
+        self.job_id = job_id
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.pending = collections.deque()
+    
+    def deliver(self, seq: int, event: dict) -> None:
+        self.pending.append((seq, event))
+        self.event.set()
+    
+    def take(self, after_seq: int) -> list:
+        """
+        Returns the delivered events with seq > after_seq, oldest first.
+        """
+        events = [(seq, event) for seq, event in self.pending if seq > after_seq]
+        self.pending.clear()
+        return events
+
+class EventBroker:
+    """
+    Delivers the events stored by this process to the event streams of this process.
+    
+    The events themselves live in the job store, so streams served by another worker
+    still see them by polling the store; streams of a job that runs in this process get
+    its events straight from the broker and never poll. notify() may be called from any
+    thread.
+    """
+    
+    def __init__(self):
+        self._subscriptions = {}
+        self._local_jobs = set()
+        self._lock = threading.Lock()
+    
+    def subscribe(self, job_id: str) -> Subscription:
+        subscription = Subscription(job_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(job_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.job_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.job_id]
+    
+    def notify(self, job_id: str, seq: int, event: dict) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(job_id, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, seq, event)
+    
+    def is_local(self, job_id: str) -> bool:
+        """
+        True while the job's events are published by this process (see JobEventWriter).
+        """
+        with self._lock:
+            return job_id in self._local_jobs
+    
+    def _set_local(self, job_id: str, local: bool) -> None:
+        with self._lock:
+            if local:
+                self._local_jobs.add(job_id)
+            else:
+                self._local_jobs.discard(job_id)
+    
+    async def wait(self, subscription: Subscription, timeout: float) -> bool:
+        """
+        Waits until the subscription is notified or the timeout expires.
+        Returns True if it was notified.
+        """
+        try:
+            await asyncio.wait_for(subscription.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            subscription.event.clear()
+
+# Queued by JobEventWriter.save to wake the writer for a new status record
+_SAVE = object()
+
+class JobEventWriter:
+    """
+    Stores one running job's events and status record in the job store, in order and off
+    the event loop, and hands the events to the broker once they have their sequence number.
+    
+    publish() and save() only queue their work, so they can be called from the event loop
+    and from executor threads alike without waiting for the store. A single writer task
+    saves whatever has queued up in one worker-thread call: only the latest of several
+    queued status records is written, before the events queued with it. close() waits
+    until everything queued is stored.
+    """
+    
+    def __init__(self, job_store, broker: EventBroker, job_id: str):
+        self.job_store = job_store
+        self.broker = broker
+        self.job_id = job_id
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._record = None
+        self._record_lock = threading.Lock()
+        self._task = self._loop.create_task(self._run())
+        broker._set_local(job_id, True)
+    
+    def publish(self, event: dict) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+    
+    def save(self, record: dict) -> None:
+        """
+        Queues a snapshot of the job's status record to replace the stored one.
+        """
+        with self._record_lock:
+            self._record = dict(record)
+        self.publish(_SAVE)
+    
+    def _store(self, record: dict, events: list) -> list:
+        if record is not None:
+            self.job_store.update(self.job_id, record)
+        return [self.job_store.append_event(self.job_id, event) for event in events]
+    
+    async def _run(self) -> None:
+        closing = False
+        while not closing:
+            events = [await self._queue.get()]
+            while not self._queue.empty():
+                events.append(self._queue.get_nowait())
+            if None in events:
+                closing = True
+            with self._record_lock:
+                record, self._record = self._record, None
+            events = [event for event in events if event is not None and event is not _SAVE]
+            if record is None and not events:
+                continue
+            try:
+                seqs = await asyncio.to_thread(self._store, record, events)
+            except Exception as e:
+                print(f"Error storing events of job {self.job_id}: {str(e)}")
+                continue
+            for seq, event in zip(seqs, events):
+                self.broker.notify(self.job_id, seq, event)
+    
+    async def close(self) -> None:
+        self.publish(None)
+        try:
+            await self._task
+        finally:
+            self.broker._set_local(self.job_id, False)
@@ -0,0 +1,278 @@
+import abc
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Job states that will not change any more and can be evicted once they expire
+FINISHED_STATUSES = ("completed", "failed")
+
+def new_job_id() -> str:
+    """
+    Job IDs are random so they never collide between restarts or between workers.
+    """
+    return f"job_{uuid.uuid4().hex}"
+
+class JobStore(abc.ABC):
+    """
+    Interface for storing job status records.
+    
+    A record is the dict returned by GET /status/{job_id} ("status", "current_step",
+    "step_number", "log_output", "summary", "error", ...) plus the job's workspace root,
+    which is kept separately and never returned to clients.
+    
+    Stores are synchronous and may block (the SQLite store waits for other writers), so
+    async code calls them through asyncio.to_thread.
+    """
+    
+    @abc.abstractmethod
+    def create(self, job_id: str, workspace_root: str, record: dict) -> None:
+        """
+        Stores a new job record.
+        """
+    
+    @abc.abstractmethod
+    def get(self, job_id: str) -> dict:
+        """
+        Returns the job record, or None if the job does not exist.
+        """
+    
+    @abc.abstractmethod
+    def get_workspace_root(self, job_id: str) -> str:
+        """
+        Returns the job's workspace root, or None if the job does not exist.
+        """
+    
+    @abc.abstractmethod
+    def update(self, job_id: str, record: dict) -> None:
+        """
+        Replaces the job record.
+        """
+    
+    @abc.abstractmethod
+    def append_event(self, job_id: str, event: dict) -> int:
+        """
+        Appends a progress event to the job's event log and returns its sequence number.
+        """
+    
+    @abc.abstractmethod
+    def events_since(self, job_id: str, after_seq: int, limit: int = 500) -> list:
+        """
+        Returns (seq, event) pairs with seq > after_seq, oldest first.
+        """
+    
+    @abc.abstractmethod
+    def expired(self, ttl_seconds: float, now: float = None, stale_seconds: float = None) -> list:
+        """
+        Returns (job_id, workspace_root) pairs for finished jobs older than ttl_seconds and,
+        if stale_seconds is given, for unfinished jobs whose record has not been updated for
+        stale_seconds (their worker crashed or was restarted, so they will never finish).
+        """
+    
+    @abc.abstractmethod
+    def delete(self, job_id: str) -> None:
+        """
+        Deletes the job record and its events.
+        """
+
+class MemoryJobStore(JobStore):
+    """
+    Process-local store. Only suitable for a single worker; state is lost on restart.
+    """
+    
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def create(self, job_id, workspace_root, record):
+        now = time.time()
+        # Jobs served from the result cache are created finished
+        finished_at = now if record.get("status") in FINISHED_STATUSES else None
+        with self._lock:
+            self._jobs[job_id] = {"record": dict(record), "workspace": workspace_root, "updated_at": now,
+                                  "finished_at": finished_at, "events": []}
+    
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job["record"]) if job else None
+    
+    def get_workspace_root(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job["workspace"] if job else None
+    
+    def update(self, job_id, record):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["record"] = dict(record)
+            job["updated_at"] = time.time()
+            if record.get("status") in FINISHED_STATUSES and job["finished_at"] is None:
+                job["finished_at"] = time.time()
+    
+    def append_event(self, job_id, event):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return 0
+            job["events"].append(event)
+            return len(job["events"])
+    
+    def events_since(self, job_id, after_seq, limit=500):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return []
+            events = job["events"][after_seq:after_seq + limit]
+        return [(after_seq + index + 1, event) for index, event in enumerate(events)]
+    
+    def expired(self, ttl_seconds, now=None, stale_seconds=None):
+        now = now or time.time()
+        cutoff = now - ttl_seconds
+        stale_cutoff = now - stale_seconds if stale_seconds is not None else None
+        
+        def is_expired(job):
+            if job["finished_at"] is not None:
+                return job["finished_at"] < cutoff
+            return stale_cutoff is not None and job["updated_at"] < stale_cutoff
+        
+        with self._lock:
+            return [(job_id, job["workspace"]) for job_id, job in self._jobs.items() if is_expired(job)]
+    
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+class SQLiteJobStore(JobStore):
+    """
+    Store backed by a SQLite database file, shared by every worker process on the host.
+    Records survive restarts. Jobs are looked up by primary key and expired jobs are
+    found through indexes on (status, finished_at) and (status, updated_at).
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets the workers read while another one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    workspace TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_finished ON jobs (status, finished_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )
+            """)
+    
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the store safe to use from any thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def create(self, job_id, workspace_root, record):
+        now = time.time()
+        status = record.get("status", "processing")
+        # Jobs served from the result cache are created finished
+        finished_at = now if status in FINISHED_STATUSES else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, workspace, record, created_at, updated_at, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, status, workspace_root, json.dumps(record, default=str), now, now, finished_at)
+            )
+    
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def get_workspace_root(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT workspace FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+    
+    def update(self, job_id, record):
+        now = time.time()
+        status = record.get("status", "processing")
+        finished_at = now if status in FINISHED_STATUSES else None
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, record = ?, updated_at = ?, finished_at = COALESCE(finished_at, ?) "
+                "WHERE job_id = ?",
+                (status, json.dumps(record, default=str), now, finished_at, job_id)
+            )
+    
+    def append_event(self, job_id, event):
+        with self._connect() as conn:
+            # The insert computes the next sequence number atomically inside its own transaction
+            cursor = conn.execute(
+                "INSERT INTO job_events (job_id, seq, event) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ? FROM job_events WHERE job_id = ?",
+                (job_id, json.dumps(event, default=str), job_id)
+            )
+            row = conn.execute("SELECT seq FROM job_events WHERE rowid = ?", (cursor.lastrowid,)).fetchone()
+        return row[0]
+    
+    def events_since(self, job_id, after_seq, limit=500):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, after_seq, limit)
+            ).fetchall()
+        return [(seq, json.loads(event)) for seq, event in rows]
+    
+    def expired(self, ttl_seconds, now=None, stale_seconds=None):
+        now = now or time.time()
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT job_id, workspace FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*FINISHED_STATUSES, now - ttl_seconds)
+            ).fetchall()
+            if stale_seconds is not None:
+                rows += conn.execute(
+                    f"SELECT job_id, workspace FROM jobs WHERE status NOT IN ({placeholders}) AND updated_at < ?",
+                    (*FINISHED_STATUSES, now - stale_seconds)
+                ).fetchall()
+        return [(job_id, workspace) for job_id, workspace in rows]
+    
+    def delete(self, job_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+
+def create_job_store(kind: str, path: str) -> JobStore:
+    """
+    Builds the configured job store: "sqlite" (default) stores jobs in the database at path,
+    "memory" keeps them in this process only.
+    """
+    if kind == "memory":
+        return MemoryJobStore()
+    if kind == "sqlite":
+        return SQLiteJobStore(path)
+    raise ValueError(f"Unknown job store '{kind}'. Expected 'sqlite' or 'memory'.")
@@ -1,14 +1,12 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile
 import os
 import json
-import shutil
 import asyncio
 import sys
-import io
-import contextlib
+import threading
+import time
 from dotenv import load_dotenv
 
 # Add the backend directory to Python path to import from your existing code
@@ -33,7 +31,19 @@ else:
     print(f"Found API keys for: {', '.join(api_services)}")
 
 # Import your existing orchestrator
-from orchestrator import run as run_workflow
+from orchestrator import run as run_workflow, lookup_workflow_result, WORKFLOW_MODES
+from events import WORKFLOW_STEPS
+from workspace import JobWorkspace, create_workspace
+from executor import get_skill_executor
+from agent_factory import get_model_registry
+from job_store import create_job_store, new_job_id
+from job_events import EventBroker, JobEventWriter
+from job_log import JobLog, job_log_context
+from skills.data_validation_tool import validate_bytes
+from skills.report_export_tool import REPORT_MEDIA_TYPES, default_report_formats, parse_report_formats
+
+# Each job gets its own workspace directory under here
+jobs_dir = os.getenv("JOBS_DIR", os.path.join(backend_dir, "jobs"))
 
 app = FastAPI()
 
@@ -46,244 +56,380 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store job status in memory (in production, use a proper database)
-job_status = {}
+# Job status records are kept in a job store shared by all workers (see job_store.py)
+job_store = create_job_store(
+    os.getenv("JOB_STORE", "sqlite"),
+    os.getenv("JOB_STORE_PATH", os.path.join(jobs_dir, "jobs.db"))
+)
+
+# Finished jobs and their workspaces are removed after this many seconds
+job_ttl_seconds = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+# Unfinished jobs whose status has not changed for this long were left behind by a worker
+# that crashed or restarted, and are removed as well (0 keeps them)
+job_stale_seconds = float(os.getenv("JOB_STALE_SECONDS", str(6 * 3600)))
+job_eviction_interval = float(os.getenv("JOB_EVICTION_INTERVAL", "300"))
+
+# Log lines are written to the job store at most this often; step changes are written immediately
+status_save_interval = 1.0
+
+# Event streams get the events of jobs running in this worker from the event broker; for
+# jobs of other workers they check the job store this often. Idle streams get a keep-alive comment
+event_poll_interval = 1.0
+event_keepalive_interval = 15.0
 
-def cleanup_files(plot_dir, pdf_file):
+event_broker = EventBroker()
+
+# Jobs accepted by this worker that have not finished yet, running or waiting to run.
+# Uploads are refused once there are max_active_jobs of them (default: SKILL_MAX_PENDING)
+max_active_jobs = int(os.getenv("MAX_ACTIVE_JOBS", "0")) or get_skill_executor().max_pending
+active_jobs = 0
+
+# Each job keeps its latest log records in a ring buffer of this size. Quiet jobs skip
+# the per-item detail lines of the skills (set JOB_LOG_QUIET=false to keep them)
+job_log_size = int(os.getenv("JOB_LOG_SIZE", "500"))
+job_log_quiet = os.getenv("JOB_LOG_QUIET", "true").lower() in ("1", "true", "yes")
+
+def evict_expired_jobs():
     """
-    Clean up the visual plots directory and PDF file
+    Remove finished jobs older than the TTL, and abandoned unfinished jobs, together with their workspaces
     """
-    # Cleanup visual plots directory
-    if os.path.exists(plot_dir):
-        try:
-            shutil.rmtree(plot_dir)
-            print(f"Cleaned up visual plots directory: {plot_dir}")
-        except Exception as e:
-            print(f"Error cleaning up visual plots directory: {str(e)}")
-    
-    # Cleanup PDF file
-    if os.path.exists(pdf_file):
+    for job_id, workspace_root in job_store.expired(job_ttl_seconds, stale_seconds=job_stale_seconds or None):
+        JobWorkspace.at(workspace_root).cleanup()
+        job_store.delete(job_id)
+        print(f"Evicted expired job: {job_id}")
+
+async def job_eviction_loop():
+    while True:
         try:
-            os.remove(pdf_file)
-            print(f"Cleaned up PDF file: {pdf_file}")
+            await asyncio.to_thread(evict_expired_jobs)
         except Exception as e:
-            print(f"Error cleaning up PDF file: {str(e)}")
+            print(f"Error evicting expired jobs: {str(e)}")
+        await asyncio.sleep(job_eviction_interval)
+
+@app.on_event("startup")
+async def start_job_eviction():
+    asyncio.create_task(job_eviction_loop())
+
+@app.on_event("shutdown")
+async def stop_skill_executor():
+    get_skill_executor().shutdown()
+    await get_model_registry().aclose()
 
 @app.post("/upload")
-async def upload_json(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+async def upload_json(file: UploadFile = File(...), background_tasks: BackgroundTasks = None,
+                      mode: str = None, llm_insights: bool = None, formats: str = None):
     """
-    Upload a JSON file and start the budget analysis process
+    Upload a JSON file and start the budget analysis process.
+    mode selects the "agents" or the LLM-free "pipeline" workflow; llm_insights lets the
+    pipeline workflow ask the model for report insights. Both default to the server config.
+    formats is a comma-separated list of the outputs to produce ("pdf", "json", "parquet",
+    "html"; default REPORT_FORMATS). Clients that only need data can leave out "pdf" to skip
+    rendering the PDF report.
     """
     # Check if file is a JSON
     if not file.filename.endswith('.json'):
         raise HTTPException(400, detail="Only JSON files are allowed")
     
+    if mode is not None and mode not in WORKFLOW_MODES:
+        raise HTTPException(400, detail=f"Unknown mode '{mode}'. Expected one of: {', '.join(WORKFLOW_MODES)}")
+    
     try:
-        # Clean up any previous files before starting a new job
-        plot_dir = os.path.join(backend_dir, "visual plots")
-        pdf_file = os.path.join(backend_dir, "final_budget_report.pdf")
-        cleanup_files(plot_dir, pdf_file)
+        formats = parse_report_formats(formats) if formats is not None else default_report_formats()
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    
+    # Backpressure: refuse new jobs while enough jobs are already accepted, including ones
+    # waiting on the model between skill calls, or while the skill executor's queue is full
+    global active_jobs
+    if active_jobs >= max_active_jobs or get_skill_executor().saturated:
+        raise HTTPException(503, detail="Server is busy, please retry shortly", headers={"Retry-After": "5"})
+    
+    # The slot is taken before the upload is read, so concurrent uploads cannot overshoot the
+    # limit, and given back unless the job is started
+    active_jobs += 1
+    started = False
+    try:
+        contents = await file.read()
         
-        # Save the uploaded file directly to the backend directory as input_data.json
-        input_path = os.path.join(backend_dir, "input_data.json")
+        # Validate the whole document against the input schema before any job is created;
+        # the workflow trusts this and does not validate the file again
+        report = await asyncio.to_thread(validate_bytes, contents)
+        if not report.valid:
+            raise HTTPException(400, detail={
+                "message": "Input data failed validation",
+                "error_count": report.error_count,
+                "errors": report.errors
+            })
         
-        # Save the uploaded file
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Generate a job ID
+        job_id = new_job_id()
         
-        # Validate the JSON structure
-        try:
-            with open(input_path, 'r') as f:
-                data = json.load(f)
-                
-            # Check for required fields
-            required_keys = ["revenue", "expenditure", "inflation", "gdp_growth"]
-            for key in required_keys:
-                if key not in data:
-                    raise HTTPException(400, detail=f"Missing required key in JSON: {key}")
-        except json.JSONDecodeError:
-            raise HTTPException(400, detail="Invalid JSON format")
+        # Save the upload into the job's own workspace so concurrent jobs never share files
+        workspace = create_workspace(jobs_dir, job_id)
+        with open(workspace.input_path, "wb") as buffer:
+            buffer.write(contents)
         
-        # Generate a job ID
-        job_id = f"job_{len(job_status) + 1}"
-        job_status[job_id] = {"status": "processing"}
+        # Fast path: the same document was processed before with the same configuration,
+        # so the job is completed right away from the result cache
+        cache_key, cached = await asyncio.to_thread(lookup_workflow_result, report.data, workspace, mode,
+                                                    llm_insights, formats)
+        if cached is not None:
+            job = {
+                "status": "completed",
+                "current_step": WORKFLOW_STEPS[-1],
+                "step_number": len(WORKFLOW_STEPS),
+                "log_output": ["Reused the results of an identical earlier upload."],
+                "outputs": cached["outputs"],
+                "summary": cached.get("workflow_summary", {}),
+                "cached": True
+            }
+            if "pdf" in cached["outputs"]:
+                job["report_path"] = cached["outputs"]["pdf"]
+            await asyncio.to_thread(job_store.create, job_id, workspace.root, job)
+            await publish_event(job_id, {"type": "status", "time": time.time(), "status": "completed",
+                                         "summary": job["summary"], "cached": True})
+            return {"job_id": job_id, "status": "completed", "formats": list(formats), "cached": True}
+        
+        await asyncio.to_thread(job_store.create, job_id, workspace.root, {"status": "processing"})
         
         # Start the processing in the background
-        background_tasks.add_task(process_json, job_id, input_path)
+        background_tasks.add_task(process_json, job_id, workspace, mode, llm_insights, formats, cache_key)
+        started = True
         
-        return {"job_id": job_id, "status": "processing"}
+        return {"job_id": job_id, "status": "processing", "formats": list(formats)}
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, detail=str(e))
+    finally:
+        if not started:
+            active_jobs -= 1
 
-async def process_json(job_id: str, input_path: str):
+async def publish_event(job_id: str, event: dict):
     """
-    Background task to process the JSON file using the existing workflow
+    Store a single job event and hand it to the event streams of this job. Running jobs
+    publish through their JobEventWriter instead
     """
+    seq = await asyncio.to_thread(job_store.append_event, job_id, event)
+    event_broker.notify(job_id, seq, event)
+
+async def process_json(job_id: str, workspace, mode: str = None, llm_insights: bool = None, formats: tuple = ("pdf",),
+                       cache_key: str = None):
+    """
+    Background task to process the JSON file using the existing workflow.
+    Frees the job's slot (see upload_json) when it ends
+    """
+    global active_jobs
     try:
-        # Make sure we're in the backend directory for any relative paths
-        original_dir = os.getcwd()
-        os.chdir(backend_dir)
-        
-        # Initialize with first step
-        job_status[job_id].update({
-            "current_step": "data_validation",
-            "step_number": 1,
-            "log_output": []
-        })
-        
-        # Set up log capture
-        class CustomStdout(io.StringIO):
-            def write(self, text):
-                super().write(text)
-                
-                # Update current step based on log output
-                if "Step 1: Running Data Manager Agent" in text:
-                    job_status[job_id].update({"current_step": "data_validation", "step_number": 1})
-                elif "Step 2: Running Budget Agent" in text:
-                    job_status[job_id].update({"current_step": "budget_analysis", "step_number": 2})
-                elif "Step 3: Running Tax Policy Agent" in text:
-                    job_status[job_id].update({"current_step": "tax_policy", "step_number": 3})
-                elif "Step 4: Running Report Agent" in text:
-                    job_status[job_id].update({"current_step": "report_compilation", "step_number": 4})
-                
-                # Add log to output
-                job_status[job_id]["log_output"].append(text)
-                
-                # Keep limited log history (last 50 lines)
-                if len(job_status[job_id]["log_output"]) > 50:
-                    job_status[job_id]["log_output"] = job_status[job_id]["log_output"][-50:]
-        
-        # Capture stdout during workflow execution
-        custom_stdout = CustomStdout()
-        with contextlib.redirect_stdout(custom_stdout):
-            # Running your existing workflow
-            result = await run_workflow()
-        
-        # Return to original directory
-        os.chdir(original_dir)
+        await run_job(job_id, workspace, mode, llm_insights, formats, cache_key)
+    finally:
+        active_jobs -= 1
+
+async def run_job(job_id: str, workspace, mode: str = None, llm_insights: bool = None, formats: tuple = ("pdf",),
+                  cache_key: str = None):
+    """
+    Runs the workflow for the job, keeping its status record and event log up to date
+    """
+    # Initialize with first step
+    job = {
+        "status": "processing",
+        "current_step": "data_validation",
+        "step_number": 1,
+        "log_output": []
+    }
+    await asyncio.to_thread(job_store.update, job_id, job)
+    events = JobEventWriter(job_store, event_broker, job_id)
+    pending_records = []
+    flush_lock = threading.Lock()
+    last_flushed = time.monotonic()
+    
+    def flush_logs():
+        """
+        Publish the buffered log records as one event and save the latest lines in the job status
+        """
+        nonlocal pending_records, last_flushed
+        with flush_lock:
+            last_flushed = time.monotonic()
+            if not pending_records:
+                return
+            records, pending_records = pending_records, []
+            
+            # Keep limited log history (last 50 lines)
+            job["log_output"] = [record["message"] for record in job_log.tail(50)]
+            events.save(job)
+        events.publish({"type": "log", "time": time.time(), "records": records})
+    
+    def on_log_record(record):
+        # Log records are written out at most once per interval. Flushing only queues the
+        # write for the job's event writer, so executor threads never wait for the store.
+        # Records come from several threads and flush_logs swaps the list, hence the lock
+        with flush_lock:
+            pending_records.append(record)
+            due = time.monotonic() - last_flushed >= status_save_interval
+        if due:
+            flush_logs()
+    
+    def on_event(event):
+        # Step changes come from the workflow as explicit events
+        if event["type"] == "step":
+            flush_logs()
+            with flush_lock:
+                job.update({"current_step": event["step"], "step_number": event["step_number"]})
+                events.save(job)
+        events.publish(event)
+    
+    # Everything the workflow logs goes to this job's own bounded log
+    job_log = JobLog(max_records=job_log_size, quiet=job_log_quiet, on_record=on_log_record)
+    
+    try:
+        with job_log_context(job_log):
+            result = await run_workflow(workspace, mode=mode, llm_insights=llm_insights, on_event=on_event,
+                                        validated=True, formats=formats, cache_key=cache_key)
         
         if result["status"] == "success":
-            # The result might contain a long text description instead of just the path
-            # So we check if the expected PDF file exists
-            expected_pdf_path = os.path.join(backend_dir, "final_budget_report.pdf")
-            
-            if os.path.exists(expected_pdf_path):
-                report_path = expected_pdf_path
-            elif "report_path" in result and os.path.exists(result["report_path"]):
-                report_path = result["report_path"]
-            else:
-                # Try to extract the filename from the text
-                import re
-                path_match = re.search(r"'([^']+\.pdf)'", str(result.get("report_path", "")))
-                if path_match:
-                    report_path = os.path.join(backend_dir, path_match.group(1))
-                    if not os.path.exists(report_path):
-                        report_path = None
-                else:
-                    report_path = None
+            # The workflow writes its outputs to the job's workspace
+            outputs = {fmt: workspace.output_path(fmt) for fmt in formats}
+            missing = [fmt for fmt, path in outputs.items() if not os.path.exists(path)]
             
-            if report_path and os.path.exists(report_path):
-                # Keep the current_step and step_number in the completed status
-                current_step = job_status[job_id].get("current_step")
-                step_number = job_status[job_id].get("step_number")
-                log_output = job_status[job_id].get("log_output", [])
-                
-                job_status[job_id] = {
-                    "status": "completed", 
-                    "report_path": report_path,
-                    "summary": result.get("workflow_summary", {}),
-                    "current_step": current_step,
-                    "step_number": step_number,
-                    "log_output": log_output
-                }
+            if not missing:
+                # Keep the current_step, step_number and log_output in the completed status
+                job.update({
+                    "status": "completed",
+                    "outputs": outputs,
+                    "summary": result.get("workflow_summary", {})
+                })
+                if "pdf" in outputs:
+                    job["report_path"] = outputs["pdf"]
             else:
-                # Keep the current_step and step_number in the failed status
-                current_step = job_status[job_id].get("current_step")
-                step_number = job_status[job_id].get("step_number")
-                log_output = job_status[job_id].get("log_output", [])
-                
-                job_status[job_id] = {
-                    "status": "failed", 
-                    "error": "PDF report file not found",
-                    "current_step": current_step,
-                    "step_number": step_number,
-                    "log_output": log_output
-                }
+                job.update({"status": "failed", "error": f"Report output not found: {', '.join(missing)}"})
         else:
-            # Keep the current_step and step_number in the failed status
-            current_step = job_status[job_id].get("current_step")
-            step_number = job_status[job_id].get("step_number")
-            log_output = job_status[job_id].get("log_output", [])
-            
-            job_status[job_id] = {
-                "status": "failed", 
-                "error": result.get("reason", "Unknown error"),
-                "current_step": current_step,
-                "step_number": step_number,
-                "log_output": log_output
-            }
+            job.update({"status": "failed", "error": result.get("reason", result.get("message", "Unknown error"))})
     except Exception as e:
         # Keep any step information if available
-        current_step = job_status[job_id].get("current_step", "unknown")
-        step_number = job_status[job_id].get("step_number", 0)
-        log_output = job_status[job_id].get("log_output", [])
-        
-        job_status[job_id] = {
-            "status": "failed", 
-            "error": str(e),
-            "current_step": current_step,
-            "step_number": step_number,
-            "log_output": log_output
-        }
+        job.update({"status": "failed", "error": str(e)})
+    
+    flush_logs()
+    events.save(job)
+    
+    # The final status event ends every event stream of this job
+    final_event = {"type": "status", "time": time.time(), "status": job["status"]}
+    if job["status"] == "completed":
+        final_event["summary"] = job["summary"]
+    else:
+        final_event["error"] = job["error"]
+    events.publish(final_event)
+    await events.close()
 
 @app.get("/status/{job_id}")
 async def get_job_status(job_id: str):
     """
     Check the status of a processing job
     """
-    if job_id not in job_status:
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(404, detail="Job not found")
+    
+    return job
+
+@app.get("/events/{job_id}")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Stream the progress of a job as Server-Sent Events.
+    
+    Each event carries its sequence number as the SSE id, its type ("step", "stage",
+    "progress", "log" or "status") as the SSE event name and the event itself as JSON data.
+    Reconnecting clients resume after the Last-Event-ID header. The stream ends after the
+    final "status" event.
+    """
+    if await asyncio.to_thread(job_store.get, job_id) is None:
         raise HTTPException(404, detail="Job not found")
     
-    return job_status[job_id]
+    try:
+        last_seq = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        last_seq = 0
+    
+    def format_event(seq, event):
+        return f"id: {seq}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    async def event_stream():
+        seq = last_seq
+        idle_since = time.monotonic()
+        # Subscribe before reading the store, so no event falls between the two
+        subscription = event_broker.subscribe(job_id)
+        try:
+            # Catch up from the store: events published before this stream connected
+            # (or since the client's Last-Event-ID)
+            while True:
+                stored = await asyncio.to_thread(job_store.events_since, job_id, seq)
+                for seq, event in stored:
+                    yield format_event(seq, event)
+                    if event["type"] == "status":
+                        return
+                if not stored:
+                    break
+            
+            while not await request.is_disconnected():
+                # Events of a job running in this worker come from the broker; the store is
+                # only polled for jobs of other workers
+                local = event_broker.is_local(job_id)
+                events = subscription.take(seq)
+                if not events and not local:
+                    events = await asyncio.to_thread(job_store.events_since, job_id, seq)
+                for seq, event in events:
+                    yield format_event(seq, event)
+                    if event["type"] == "status":
+                        return
+                if events:
+                    idle_since = time.monotonic()
+                    continue
+                
+                await event_broker.wait(subscription, event_keepalive_interval if local else event_poll_interval)
+                
+                if time.monotonic() - idle_since >= event_keepalive_interval:
+                    # Stop streaming jobs that were evicted while we waited
+                    if await asyncio.to_thread(job_store.get, job_id) is None:
+                        return
+                    yield ": keep-alive\n\n"
+                    idle_since = time.monotonic()
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/download/{job_id}")
-async def download_report(job_id: str, background_tasks: BackgroundTasks):
+async def download_report(job_id: str, format: str = "pdf"):
     """
-    Download the generated PDF report
+    Download one output of the job: the PDF report by default, or the "json", "parquet"
+    or "html" output if it was requested at upload.
+    Outputs are kept until the job expires (see evict_expired_jobs), so they can be
+    downloaded any number of times while the job is listed as completed.
     """
-    if job_id not in job_status:
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
         raise HTTPException(404, detail="Job not found")
     
-    job = job_status[job_id]
     if job["status"] != "completed":
         raise HTTPException(400, detail=f"Report not ready. Current status: {job['status']}")
     
-    report_path = job["report_path"]
+    # Jobs finished before multi-format outputs only have report_path
+    outputs = job.get("outputs", {"pdf": job.get("report_path")})
+    if format not in outputs:
+        raise HTTPException(404, detail=f"No {format} output for this job. Available: {', '.join(outputs)}")
+    report_path = outputs[format]
     if not os.path.exists(report_path):
         raise HTTPException(404, detail="Report file not found")
-    
-    # Schedule cleanup for after the file is downloaded
-    # We delay cleanup to ensure the download completes
-    plot_dir = os.path.join(backend_dir, "visual plots")
-    
-    # We'll copy the PDF to a temporary file so we can delete the original
-    temp_dir = tempfile.mkdtemp()
-    temp_pdf = os.path.join(temp_dir, "budget_report.pdf")
-    shutil.copy2(report_path, temp_pdf)
-    
-    # Schedule cleanup to happen after response is sent
-    background_tasks.add_task(
-        lambda: (
-            cleanup_files(plot_dir, report_path),
-            shutil.rmtree(temp_dir) if os.path.exists(temp_dir) else None
-        )
-    )
+    filename = f"budget_report.{format}"
     
     return FileResponse(
-        path=temp_pdf,
-        filename="budget_report.pdf",
-        media_type="application/pdf"
+        path=report_path,
+        filename=filename,
+        media_type=REPORT_MEDIA_TYPES[format]
     )
 
 @app.get("/api-status")
@@ -1,55 +1,215 @@
+import asyncio
 import os
-from openai import AsyncOpenAI
+import socket
+from dataclasses import dataclass, field
+import httpx
 from dotenv import load_dotenv
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.models.anthropic import AnthropicModel
-import os
+from pydantic_ai.providers.openai import OpenAIProvider
+from pydantic_ai.providers.anthropic import AnthropicProvider
+from job_log import log
+from llm_cache import CachedModel, get_llm_cache
+from local_model import DEFAULT_LATENCY_SECONDS, LOCAL_MODEL_NAME, create_local_model
 
-def get_text_model_instance():
-    load_dotenv()
-    
-    # Check for OpenAI API key
-    openai_api_key = os.getenv("OPENAI_API_KEY")
+# Load environment variables once; the settings below are read from os.environ after that
+load_dotenv()
+
+# Model backends MODEL_PROVIDER can select; "local" is the offline stand-in (see local_model.py)
+MODEL_PROVIDERS = ("anthropic", "openai", "local")
+
+DEFAULT_ANTHROPIC_MODEL = "claude-3-haiku-20240307"
+DEFAULT_OPENAI_MODEL = "gpt-4o-2024-08-06"
+
+# Default connection pool of the HTTP client shared by all model requests
+DEFAULT_HTTP_MAX_CONNECTIONS = 20
+DEFAULT_HTTP_KEEPALIVE_SECONDS = 60
+
+# Same timeouts as the provider SDKs: long reads for slow completions, fast connects
+HTTP_TIMEOUT = httpx.Timeout(600, connect=5)
+
+_model_registry = None
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """
+    A model the agents can use. The "local" stand-in has no API key; latency_seconds is
+    the delay it simulates per request.
+    """
+    provider: str
+    model_name: str
+    api_key: str = field(default=None, repr=False)
+    latency_seconds: float = DEFAULT_LATENCY_SECONDS
+
+def get_text_model_config() -> ModelConfig:
+    """
+    The model the agents use, read from the environment. MODEL_PROVIDER selects the
+    provider; without it Anthropic is used if ANTHROPIC_API_KEY is set, otherwise
+    OpenAI. The "local" stand-in needs no key; LOCAL_MODEL_LATENCY_SECONDS sets its
+    latency. Raises ValueError for an unknown provider or a missing API key.
+    """
+    provider = os.getenv("MODEL_PROVIDER", "").strip().lower()
+    if provider and provider not in MODEL_PROVIDERS:
+        raise ValueError(f"Unknown model provider '{provider}'. Expected one of: {', '.join(MODEL_PROVIDERS)}")
+    if provider == "local":
+        latency_seconds = float(os.getenv("LOCAL_MODEL_LATENCY_SECONDS", str(DEFAULT_LATENCY_SECONDS)))
+        return ModelConfig("local", LOCAL_MODEL_NAME, latency_seconds=latency_seconds)
     
-    # Check for Anthropic API key
     anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+    if anthropic_api_key and provider in ("", "anthropic"):
+        return ModelConfig("anthropic", os.getenv("ANTHROPIC_MODEL", DEFAULT_ANTHROPIC_MODEL), anthropic_api_key)
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if openai_api_key and provider in ("", "openai"):
+        return ModelConfig("openai", os.getenv("OPENAI_MODEL", DEFAULT_OPENAI_MODEL), openai_api_key)
+    if provider:
+        raise ValueError(f"MODEL_PROVIDER is '{provider}' but {provider.upper()}_API_KEY is not set.")
+    raise ValueError("No API keys found. Please provide either OPENAI_API_KEY or ANTHROPIC_API_KEY in environment variables.")
+
+def get_text_model_name() -> str:
+    """
+    "<provider>:<model name>" of the model get_text_model_instance uses, read from the
+    environment without creating the model. None if no API key is set.
+    """
+    try:
+        config = get_text_model_config()
+    except ValueError:
+        return None
+    return f"{config.provider}:{config.model_name}"
+
+def _create_text_model(config: ModelConfig, http_client: httpx.AsyncClient):
+    provider, model_name, api_key = config.provider, config.model_name, config.api_key
+    if provider == "local":
+        log(f"Using the local stand-in model ({config.latency_seconds}s latency per request)")
+        return create_local_model(latency_seconds=config.latency_seconds)
     
-    # Determine which API to use based on available keys
-    if anthropic_api_key:
-        print("Using Anthropic API")
+    if provider == "anthropic":
+        log(f"Using Anthropic API ({model_name})")
         try:
-            # Get Claude model name from env or use default
-            model_name = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
-            
-            # Set Anthropic API key as environment variable
-            # This is likely how PydanticAI expects to find it
-            os.environ["ANTHROPIC_API_KEY"] = anthropic_api_key
-            
-            # Initialize the model with just the model name
-            return AnthropicModel(
-                model_name=model_name
-            )
+            return AnthropicModel(model_name, provider=AnthropicProvider(api_key=api_key, http_client=http_client))
         except Exception as e:
-            print(f"Failed to initialize Anthropic model: {str(e)}")
+            log(f"Failed to initialize Anthropic model: {str(e)}")
             # If Anthropic fails but OpenAI key is available, fall back to OpenAI
-            if openai_api_key:
-                print("Falling back to OpenAI API")
-            else:
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            if not openai_api_key:
                 raise Exception(f"Anthropic initialization failed and no OpenAI fallback available: {str(e)}")
+            log("Falling back to OpenAI API")
+            provider, model_name, api_key = "openai", os.getenv("OPENAI_MODEL", DEFAULT_OPENAI_MODEL), openai_api_key
     
-    # Use OpenAI if Anthropic not available or as fallback
-    if openai_api_key:
-        print("Using OpenAI API")
+    log(f"Using OpenAI API ({model_name})")
+    try:
+        return OpenAIModel(model_name, provider=OpenAIProvider(api_key=api_key, http_client=http_client))
+    except Exception as e:
+        raise Exception(f"Failed to initialize OpenAI model: {str(e)}")
+
+def _close_transport(client: httpx.AsyncClient) -> None:
+    """
+    Shuts down the sockets of the client's pooled connections. Unlike aclose() this needs
+    no event loop, so it also works for a client whose loop has stopped.
+    """
+    pool = getattr(client._transport, "_pool", None)
+    for connection in list(getattr(pool, "connections", ())):
+        stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+        sock = stream.get_extra_info("socket") if stream is not None else None
+        if sock is None:
+            continue
         try:
-            # Initialize the model with just the model name and let it handle the API client
-            model_name = os.getenv("OPENAI_MODEL", "gpt-4o-2024-08-06")
-            
-            return OpenAIModel(
-                model_name=model_name,
-                # No client or openai_client parameter needed
-            )
-        except Exception as e:
-            raise Exception(f"Failed to initialize OpenAI model: {str(e)}")
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            # Already closed by the server
+            pass
+
+class ModelRegistry:
+    """
+    The models of the process and the HTTP client they send their requests through.
+    
+    A model is created once per configuration (see ModelConfig) and shared by every
+    agent run, so jobs no longer construct providers and SDK clients of their own. All
+    models use one httpx client whose pool keeps up to max_connections connections alive
+    for keepalive_seconds, so consecutive requests skip the TCP and TLS handshakes.
+    
+    The client is stored with the event loop it was created on, since connections
+    belong to the loop that opened them. When get_model is called from another loop
+    (CLI runs and benchmarks may start several), the client and its models are created
+    again and the previous client is closed (see _release_http_client).
+    """
+    
+    def __init__(self, max_connections: int = DEFAULT_HTTP_MAX_CONNECTIONS,
+                 keepalive_seconds: float = DEFAULT_HTTP_KEEPALIVE_SECONDS):
+        self.max_connections = max_connections
+        self.keepalive_seconds = keepalive_seconds
+        self._models = {}
+        self._http_client = None
+        self._loop = None
+    
+    def _create_http_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_seconds
+        )
+        return httpx.AsyncClient(limits=limits, timeout=HTTP_TIMEOUT)
     
-    # If we get here and have no API keys, raise an error
-    raise ValueError("No API keys found. Please provide either OPENAI_API_KEY or ANTHROPIC_API_KEY in environment variables.")
\ No newline at end of file
+    def get_model(self, config: ModelConfig):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._loop is not loop or self._http_client is None or self._http_client.is_closed:
+            self._release_http_client()
+            self._models = {}
+            self._http_client = self._create_http_client()
+            self._loop = loop
+        
+        model = self._models.get(config)
+        if model is None:
+            model = _create_text_model(config, http_client=self._http_client)
+            # The local stand-in is never cached, so every run goes through its scripted requests
+            cache = get_llm_cache() if config.provider != "local" else None
+            if cache is not None:
+                model = CachedModel(model, cache)
+            self._models[config] = model
+        return model
+    
+    def _release_http_client(self) -> None:
+        """
+        Closes the client of the previous event loop: if that loop is still running (in
+        another thread), aclose() is scheduled on it; otherwise the transport is closed
+        synchronously, as a stopped loop can no longer run aclose().
+        """
+        client, loop = self._http_client, self._loop
+        if client is None or client.is_closed:
+            return
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            _close_transport(client)
+    
+    async def aclose(self) -> None:
+        """
+        Closes the pooled connections. Models created afterwards get a new client.
+        """
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._models = {}
+        self._http_client = None
+        self._loop = None
+
+def get_model_registry() -> ModelRegistry:
+    """
+    The process-wide model registry, configured from the environment:
+    LLM_HTTP_MAX_CONNECTIONS (default 20) and LLM_HTTP_KEEPALIVE_SECONDS (default 60).
+    """
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry(
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", str(DEFAULT_HTTP_MAX_CONNECTIONS))),
+            keepalive_seconds=float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", str(DEFAULT_HTTP_KEEPALIVE_SECONDS)))
+        )
+    return _model_registry
+
+def get_text_model_instance():
+    """
+    The model for the agents, shared across jobs through the model registry and answered
+    through the LLM response cache unless it is disabled (see llm_cache.py).
+    """
+    return get_model_registry().get_model(get_text_model_config())
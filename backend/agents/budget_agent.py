@@ -1,34 +1,40 @@
 import asyncio
+import json
 import logfire
+from dataclasses import dataclass
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from pydantic_ai import Agent
+from pydantic_ai import Agent, RunContext
 from pydantic_ai.settings import ModelSettings
 from agent_factory import get_text_model_instance
+from artifacts import ProjectionArtifact, get_projection_artifact
+from job_log import log
 
 # Import tools
-from skills.budget_projection_tool import project_budget
 from skills.risk_identification_tool import risk_identification
 
 # Load environment variables
 load_dotenv()
 
+@dataclass
+class BA_deps:
+    projection: ProjectionArtifact
+
 BUDGET_AGENT_SYS_PROMPT = """
 <agent_role>
-1. You are the Budget Agent for the Ministry of Finance system. Your task is to generate budget projections using the BudgetProjectionTool and then evaluate the financial risk using the RiskIdentificationTool.
-2. First, call project_tool to generate projected financial data.
-3. Then, call risk_tool and pass the projections from project_tool output as the input.
-4. Your output must be a JSON object with two keys: "projections" that holds the projected financial data and "risk_ranking" that holds the risk level (e.g., "low", "medium", "high").
+1. You are the Budget Agent for the Ministry of Finance system. Your task is to review the budget projections using the BudgetProjectionTool and then evaluate the financial risk using the RiskIdentificationTool.
+2. First, call project_tool to get a summary of the projected financial data.
+3. Then, call risk_tool. It already has access to the full projections, so it takes no arguments.
+4. Your output must be a JSON object with one key: "risk_ranking" that holds the risk level (e.g., "low", "medium", "high").
 </agent_role>
 """
 
 def create_budget_agent():
-    BA_model = get_text_model_instance()
-    
+    # The model is chosen per run (see run_budget_agent), so the agent is built once
     BA_agent = Agent(
-        model=BA_model,
         name="Budget Agent",
         system_prompt=BUDGET_AGENT_SYS_PROMPT,
+        deps_type=BA_deps,
         retries=3,
         model_settings=ModelSettings(
             temperature=0.5,
@@ -36,65 +42,63 @@ def create_budget_agent():
         ),
     )
     
-    # Store projections between tool calls
-    projection_data = None
+    @BA_agent.tool
+    def project_tool(ctx: RunContext[BA_deps]) -> dict:
+        """Summarize the budget projections computed for this job"""
+        return ctx.deps.projection.summary()
     
-    @BA_agent.tool_plain
-    def project_tool() -> dict:
-        nonlocal projection_data
-        projection_data = project_budget(file_path="input_data.json")
-        return projection_data
-    
-    @BA_agent.tool_plain
-    def risk_tool(projections: dict = None) -> str:
-        # Use either passed projections or stored projections
-        nonlocal projection_data
-        data_to_use = projections or projection_data
-        
-        if not data_to_use:
-            print("Error: No projection data available")
+    @BA_agent.tool
+    def risk_tool(ctx: RunContext[BA_deps]) -> str:
+        """Evaluate the financial risk of this job's budget projections"""
+        projections = ctx.deps.projection.projections
+        if not projections:
+            log("Error: No projection data available", level="error")
             return "unknown"
         
-        return risk_identification(projections=data_to_use)
+        return risk_identification(projections=projections)
     
     return BA_agent
 
-async def run_budget_agent():
-    agent = create_budget_agent()
-    prompt = "Create budget projections and evaluate financial risk."
+budget_agent = create_budget_agent()
+
+async def run_budget_agent(projection: ProjectionArtifact = None, input_path: str = "input_data.json"):
+    """
+    Runs the Budget Agent on the job's shared projections. The projections are only
+    computed here (from input_path) when the caller did not supply them.
+    """
+    if projection is None:
+        projection = await get_projection_artifact(input_path)
+    
+    prompt = "Review the budget projections and evaluate financial risk."
     
     # logfire.configure(send_to_logfire='if-token-present')
-    result = await agent.run(user_prompt=prompt)
+    result = await budget_agent.run(user_prompt=prompt, deps=BA_deps(projection=projection),
+                                    model=get_text_model_instance())
     
-    # Ensure we're returning the correct data structure
-    if not isinstance(result.data, dict):
-        # If the agent didn't return a dictionary, create one with the required fields
-        print("Warning: Budget agent didn't return a dictionary, creating proper structure")
-        # Call the tools directly to ensure we have the data
-        projections = project_budget(file_path="input_data.json")
-        risk_level = risk_identification(projections=projections)
-        return {
-            "projections": projections,
-            "risk_ranking": risk_level
-        }
+    risk_level = None
+    if isinstance(result.data, dict):
+        risk_level = result.data.get("risk_ranking")
+    elif isinstance(result.data, str):
+        try:
+            parsed = json.loads(result.data)
+            if isinstance(parsed, dict):
+                risk_level = parsed.get("risk_ranking")
+        except json.JSONDecodeError:
+            pass
     
-    # If it's a dict but missing required keys, add them
-    if "projections" not in result.data or "risk_ranking" not in result.data:
-        print("Warning: Budget agent response missing required keys, fixing structure")
-        # Call the tools directly to ensure we have the data
-        projections = project_budget(file_path="input_data.json")
-        risk_level = risk_identification(projections=projections)
-        
-        # Create properly formatted response
-        return {
-            "projections": projections,
-            "risk_ranking": risk_level
-        }
+    # If the agent's answer has no usable risk ranking, evaluate it directly
+    if not risk_level:
+        log("Warning: Budget agent response missing risk_ranking, evaluating risk directly", level="warning")
+        risk_level = risk_identification(projections=projection.projections)
     
-    return result.data
+    # Projections always come from the shared artifact, never from the model's reply
+    return {
+        "projections": projection.projections,
+        "risk_ranking": risk_level
+    }
 
 if __name__ == "__main__":
     result = asyncio.run(run_budget_agent())
     print("Budget Agent result:", result)
     print("Result contains projections:", "projections" in result)
-    print("Result contains risk_ranking:", "risk_ranking" in result)
\ No newline at end of file
+    print("Result contains risk_ranking:", "risk_ranking" in result)
@@ -1,9 +1,11 @@
 import asyncio
 import logfire
+from dataclasses import dataclass
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from pydantic_ai import Agent
+from pydantic_ai import Agent, RunContext
 from pydantic_ai.settings import ModelSettings
+from pydantic_ai.tools import ToolDefinition
 from agent_factory import get_text_model_instance
 
 # Import tools
@@ -16,19 +18,27 @@ load_dotenv()
 class DataManagerInput(BaseModel):
     file_path: str
 
+@dataclass
+class DMA_deps:
+    input_path: str = "input_data.json"
+    plots_dir: str = None
+
 DATA_MANAGER_SYS_PROMPT = """
 <agent_role>
-You are the Data Manager Agent for the Ministry of Finance system. Your task is to validate the input financial data using the DataValidationTool and then generate visual plots using the VisualisationTool.
+You are the Data Manager Agent for the Ministry of Finance system. Your task is to validate the input financial data using the DataValidationTool and, when asked, generate visual plots using the VisualisationTool.
 </agent_role>
 """
 
+async def _only_with_plots_dir(ctx: RunContext[DMA_deps], tool_def: ToolDefinition) -> ToolDefinition:
+    # The orchestrator renders plots in its own stage; the tool is only offered when asked for
+    return tool_def if ctx.deps.plots_dir is not None else None
+
 def create_data_manager_agent():
-    DMA_model = get_text_model_instance()
-    
+    # The model is chosen per run (see run_data_manager_agent), so the agent is built once
     DMA_agent = Agent(
-        model=DMA_model,
         name="Data Manager Agent",
         system_prompt=DATA_MANAGER_SYS_PROMPT,
+        deps_type=DMA_deps,
         retries=3,
         model_settings=ModelSettings(
             temperature=0.5,
@@ -36,23 +46,27 @@ def create_data_manager_agent():
         ),
     )
     
-    @DMA_agent.tool_plain
-    def validate_data_tool() -> bool:
-        return validate_data(file_path="input_data.json")
+    @DMA_agent.tool
+    def validate_data_tool(ctx: RunContext[DMA_deps]) -> bool:
+        return validate_data(file_path=ctx.deps.input_path)
     
-    @DMA_agent.tool_plain
-    def create_visual_plots_tool() -> None:
-        return create_visual_plots_from_json(file_path="input_data.json")
+    @DMA_agent.tool(prepare=_only_with_plots_dir)
+    def create_visual_plots_tool(ctx: RunContext[DMA_deps]) -> None:
+        return create_visual_plots_from_json(file_path=ctx.deps.input_path, output_dir=ctx.deps.plots_dir)
     
     return DMA_agent
 
-async def run_data_manager_agent():
-    agent = create_data_manager_agent()
-    prompt = "Is the input data valid? Yes or No. Also generate visual plots."
+data_manager_agent = create_data_manager_agent()
+
+async def run_data_manager_agent(input_path: str = "input_data.json", plots_dir: str = None):
+    prompt = "Is the input data valid? Yes or No."
+    if plots_dir is not None:
+        prompt += " Also generate visual plots."
     
     # logfire.configure(send_to_logfire='if-token-present')
-    result = await agent.run(user_prompt=prompt)
+    result = await data_manager_agent.run(user_prompt=prompt, deps=DMA_deps(input_path=input_path, plots_dir=plots_dir),
+                                          model=get_text_model_instance())
     return result.data
 
 if __name__ == "__main__":
-    asyncio.run(run_data_manager_agent())
\ No newline at end of file
+    asyncio.run(run_data_manager_agent(plots_dir="visual plots"))
\ No newline at end of file
@@ -4,6 +4,9 @@ from pydantic_ai.settings import ModelSettings
 from typing import Dict, Any, List
 from dataclasses import dataclass
 from agent_factory import get_text_model_instance
+from job_log import log
+from executor import get_skill_executor
+from artifacts import ArtifactRegistry, projection_summary
 from dotenv import load_dotenv
 import asyncio
 import logfire
@@ -20,7 +23,8 @@ class RA_deps:
     projections: Dict[str, Any]
     risk_ranking: str
     tax_slabs: List[Dict[str, Any]]
-    visual_plots_dir: str
+    plots: ArtifactRegistry = None
+    output_pdf: str = "final_budget_report.pdf"
     insights: Dict[str, Any] = None
 
 REPORT_SYS_PROMPT = """
@@ -44,11 +48,62 @@ Your output must be a PDF report saved in the designated output folder, and retu
 </agent_role>
 """
 
-def create_report_agent():
-    RA_model = get_text_model_instance()
+class ReportInsights(BaseModel):
+    revenue: str
+    expenditure: str
+    economic: str
+    risk: str
+    tax: str
+    visual: Dict[str, str] = {}
+
+INSIGHTS_SYS_PROMPT = """
+<agent_role>
+You are the Report Agent for the Ministry of Finance system. You are given budget projections, the overall risk ranking and the recommended tax slabs.
+
+Write one insightful paragraph for each of the following report sections:
+1. revenue: Revenue analysis
+2. expenditure: Expenditure analysis
+3. economic: Economic indicators analysis (inflation and GDP)
+4. risk: Risk assessment implications
+5. tax: Tax policy analysis
+</agent_role>
+"""
 
+def create_insights_agent():
+    # The model is chosen per run (see generate_insights), so the agent is built once
+    IA_agent = Agent(
+        name="Report Insights Agent",
+        system_prompt=INSIGHTS_SYS_PROMPT,
+        result_type=ReportInsights,
+        retries=3,
+        model_settings=ModelSettings(
+            temperature=0.5,
+        ),
+    )
+    
+    return IA_agent
+
+insights_agent = create_insights_agent()
+
+async def generate_insights(projections, risk_level, tax_slabs):
+    """
+    Single LLM call that only writes the narrative insights for compile_report.
+    Used by the pipeline workflow, where every other step runs without the model.
+    The prompt carries a summary of the projections rather than every line item, so
+    its size does not grow with the ledger.
+    """
+    prompt = json.dumps({
+        **projection_summary(projections),
+        "risk_ranking": risk_level,
+        "tax_slabs": tax_slabs
+    }, default=str)
+    
+    result = await insights_agent.run(user_prompt=prompt, model=get_text_model_instance())
+    return result.data.model_dump()
+
+def create_report_agent():
+    # The model is chosen per run (see run_report_agent), so the agent is built once
     RA_agent = Agent(
-        model=RA_model, 
         name="Report Agent",
         system_prompt=REPORT_SYS_PROMPT,
         deps_type=RA_deps,
@@ -59,14 +114,16 @@ def create_report_agent():
     )
     
     @RA_agent.tool
-    def compile_report_tool(ctx: RunContext[RA_deps]) -> str:
+    async def compile_report_tool(ctx: RunContext[RA_deps]) -> str:
         """Compile all data into a final PDF report with insights"""
-        output_pdf = "final_budget_report.pdf"
-        compile_report(
+        output_pdf = ctx.deps.output_pdf
+        # PDF rendering is CPU-bound, so it runs in the skill executor instead of the event loop
+        await get_skill_executor().run(
+            compile_report,
             projections=ctx.deps.projections, 
             risk_level=ctx.deps.risk_ranking,
             tax_slabs=ctx.deps.tax_slabs,
-            visual_plots_dir=ctx.deps.visual_plots_dir,
+            plots=ctx.deps.plots,
             output_pdf=output_pdf,
             insights=ctx.deps.insights
         )
@@ -74,9 +131,10 @@ def create_report_agent():
     
     return RA_agent
 
-async def run_report_agent(projections, risk_level, tax_slabs, visual_plots_dir="visual_plots", insights=None):
-    agent = create_report_agent()
-    
+report_agent = create_report_agent()
+
+async def run_report_agent(projections, risk_level, tax_slabs, plots=None, insights=None,
+                           output_pdf="final_budget_report.pdf"):
     # If insights are not provided, instruct the agent to generate them
     if insights is None:
         prompt = """
@@ -94,12 +152,13 @@ async def run_report_agent(projections, risk_level, tax_slabs, visual_plots_dir=
         projections=projections,
         risk_ranking=risk_level,
         tax_slabs=tax_slabs,
-        visual_plots_dir=visual_plots_dir,
+        plots=plots,
+        output_pdf=output_pdf,
         insights=insights
     )
     
     # logfire.configure(send_to_logfire='if-token-present')
-    result = await agent.run(user_prompt=prompt, deps=deps)
+    result = await report_agent.run(user_prompt=prompt, deps=deps, model=get_text_model_instance())
     
     # Ensure we return a consistent structure
     if isinstance(result.data, str):
@@ -115,7 +174,7 @@ async def run_report_agent(projections, risk_level, tax_slabs, visual_plots_dir=
         return result.data
     else:
         # Fall back to a default structure with the default output path
-        return {"report_path": "final_budget_report.pdf"}
+        return {"report_path": output_pdf}
 
 if __name__ == "__main__":
     # This would be for testing only - normally this agent needs data from other agents
@@ -0,0 +1,185 @@
+import asyncio
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from executor import get_skill_executor
+from skills.budget_projection_tool import (ProjectedItems, default_base_year, project_budget, projected_total,
+                                           projected_totals)
+from job_log import log
+
+# Number of distinct inputs whose projections are kept in memory
+PROJECTION_CACHE_SIZE = 32
+
+# Revenue and expenditure items listed by name in the summary given to the LLM
+SUMMARY_TOP_N = 10
+
+def _largest_items(items, total: float, top_n: int) -> dict:
+    """
+    The top_n items with the largest projected amount, largest first, with their share
+    of the total, and the number and sum of the remaining items.
+    """
+    if isinstance(items, ProjectedItems):
+        names, amounts = items.names, items.projected
+    else:
+        names = [item.get("name", "Unknown") for item in items]
+        amounts = np.array([item.get("projected_amount", 0) for item in items], dtype=np.float64)
+    
+    # Select the largest top_n without sorting the whole ledger, then order just those
+    top = np.argpartition(-amounts, top_n - 1)[:top_n] if len(names) > top_n else np.arange(len(names))
+    top = top[np.argsort(-amounts[top], kind="stable")]
+    largest = [
+        {"name": names[index], "projected_amount": amount, "share": amount / total if total else 0.0}
+        for index, amount in zip(top.tolist(), amounts[top].tolist())
+    ]
+    other_total = float(amounts.sum() - amounts[top].sum())
+    return {"largest": largest, "other_items": len(names) - len(largest), "other_projected_amount": other_total}
+
+def projection_summary(projections: dict, top_n: int = SUMMARY_TOP_N) -> dict:
+    """
+    Compact view of the projections for the LLM: totals, the largest top_n revenue and
+    expenditure items with the sum of the rest, and indicator rates, plus yearly totals
+    when projecting more than one year ahead. Its size does not grow with the ledger.
+    """
+    revenue_items = projections.get("projected_revenue", [])
+    expenditure_items = projections.get("projected_expenditure", [])
+    years = projections.get("horizon_years", [])
+    total_revenue = projected_total(revenue_items)
+    total_expenditure = projected_total(expenditure_items)
+    summary = {
+        "revenue_items": len(revenue_items),
+        "expenditure_items": len(expenditure_items),
+        "total_projected_revenue": total_revenue,
+        "total_projected_expenditure": total_expenditure,
+        "revenue": _largest_items(revenue_items, total_revenue, top_n),
+        "expenditure": _largest_items(expenditure_items, total_expenditure, top_n),
+        "projected_inflation": projections.get("projected_inflation", {}),
+        "projected_gdp_growth": projections.get("projected_gdp_growth", {})
+    }
+    if len(years) > 1:
+        summary["outlook"] = [
+            {"year": year, "total_projected_revenue": revenue, "total_projected_expenditure": expenditure}
+            for year, revenue, expenditure in zip(
+                years, projected_totals(revenue_items, years), projected_totals(expenditure_items, years)
+            )
+        ]
+    return summary
+
+@dataclass(frozen=True)
+class ProjectionArtifact:
+    """
+    Budget projections computed once for an input file and shared by every
+    agent of a job. content_hash identifies the input the projections came from.
+    The line items are frozen ProjectedItems, which jobs with the same input share.
+    """
+    content_hash: str
+    projections: dict
+    
+    def summary(self) -> dict:
+        """
+        Compact view of the projections for the LLM (see projection_summary).
+        """
+        return projection_summary(self.projections)
+
+@dataclass
+class Artifact:
+    """
+    A file-like result produced by one stage for a later one (e.g. a rendered chart),
+    kept in memory: its bytes, media type and any descriptive metadata.
+    """
+    name: str
+    data: bytes
+    media_type: str
+    kind: str = "file"
+    metadata: dict = field(default_factory=dict)
+
+class ArtifactRegistry:
+    """
+    The artifacts of one job by name, in the order they were added. Stages hand this
+    to each other instead of writing files to a shared directory and discovering them
+    again by listing it.
+    """
+    
+    def __init__(self, artifacts=()):
+        self._artifacts = OrderedDict()
+        for artifact in artifacts:
+            self.add(artifact)
+    
+    def add(self, artifact: Artifact) -> Artifact:
+        self._artifacts[artifact.name] = artifact
+        return artifact
+    
+    def get(self, name: str) -> Artifact:
+        return self._artifacts.get(name)
+    
+    def of_kind(self, kind: str) -> list:
+        return [artifact for artifact in self._artifacts.values() if artifact.kind == kind]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._artifacts
+    
+    def __iter__(self):
+        return iter(self._artifacts.values())
+    
+    def __len__(self) -> int:
+        return len(self._artifacts)
+    
+    def total_bytes(self) -> int:
+        return sum(len(artifact.data) for artifact in self._artifacts.values())
+
+_projection_cache = OrderedDict()
+_projection_lock = threading.Lock()
+
+def hash_file(file_path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _freeze(projections: dict) -> dict:
+    for value in projections.values():
+        if isinstance(value, ProjectedItems):
+            value.freeze()
+    return projections
+
+def _job_copy(projections: dict) -> dict:
+    # The small parts are copied for each job; the frozen line items are shared
+    return {key: value if isinstance(value, ProjectedItems) else copy.deepcopy(value)
+            for key, value in projections.items()}
+
+async def get_projection_artifact(file_path: str) -> ProjectionArtifact:
+    """
+    Returns the projections for the input file, running project_budget in the skill
+    executor only if this exact content has not been projected before.
+    
+    The cache key includes the base year that inputs without dated series fall back to,
+    which follows the date, so no projection outlives the year it was resolved for.
+    """
+    # Reading and hashing a large input would stall the event loop, so it runs in a thread
+    content_hash = await asyncio.to_thread(hash_file, file_path)
+    key = (content_hash, default_base_year())
+    with _projection_lock:
+        projections = _projection_cache.get(key)
+        if projections is not None:
+            _projection_cache.move_to_end(key)
+    if projections is not None:
+        log(f"Reusing budget projections for input {content_hash[:12]}")
+        return ProjectionArtifact(content_hash=content_hash, projections=_job_copy(projections))
+    
+    projections = _freeze(await get_skill_executor().run(project_budget, file_path=file_path))
+    
+    # Failed projections are not cached so a corrected upload is projected again
+    if projections:
+        with _projection_lock:
+            _projection_cache[key] = projections
+            while len(_projection_cache) > PROJECTION_CACHE_SIZE:
+                _projection_cache.popitem(last=False)
+    return ProjectionArtifact(content_hash=content_hash, projections=_job_copy(projections))
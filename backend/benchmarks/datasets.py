@@ -0,0 +1,63 @@
+"""
+Synthetic budget inputs for the benchmarks.
+
+generate_input builds a document in the upload format with the given number of revenue
+and expenditure items and years of inflation and GDP growth history. A fraction of the
+items can have their amount removed, which gives standardize_data something to impute.
+DATASETS names the sizes the pipeline benchmark runs by default.
+"""
+import json
+import os
+import random
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    items: int
+    history_years: int
+    horizon: int = 1
+
+DATASETS = {
+    dataset.name: dataset for dataset in (
+        Dataset("small", items=30, history_years=5),
+        Dataset("medium", items=10_000, history_years=20, horizon=3),
+        Dataset("huge", items=1_000_000, history_years=20, horizon=3),
+        Dataset("long_history", items=1_000, history_years=500, horizon=5)
+    )
+}
+
+def generate_input(items: int, history_years: int = 5, horizon: int = 1, missing_fraction: float = 0.0,
+                   seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    half = items // 2
+    first_year = 2024 - history_years
+    
+    def ledger(label: str, count: int) -> list:
+        records = [{"name": f"{label} {index}", "amount": rng.uniform(1e3, 1e7)} for index in range(count)]
+        for record in records:
+            if rng.random() < missing_fraction:
+                del record["amount"]
+        return records
+    
+    def series(level: float) -> list:
+        return [{"year": str(first_year + index), "rate": level + rng.random()} for index in range(history_years)]
+    
+    return {
+        "revenue": ledger("Revenue", half),
+        "expenditure": ledger("Expenditure", items - half),
+        "inflation": series(3),
+        "gdp_growth": series(2),
+        "projection": {"horizon": horizon}
+    }
+
+def write_input(directory: str, dataset: Dataset, missing_fraction: float = 0.0, seed: int = 0) -> str:
+    """
+    Writes the dataset's input document to directory and returns its path.
+    """
+    data = generate_input(dataset.items, dataset.history_years, dataset.horizon, missing_fraction, seed)
+    suffix = "_gaps" if missing_fraction else ""
+    path = os.path.join(directory, f"{dataset.name}{suffix}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return path
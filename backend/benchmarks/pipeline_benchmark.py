@@ -0,0 +1,291 @@
+"""
+End-to-end benchmark of the budget pipeline.
+
+For every synthetic dataset (see datasets.py) times each skill on its own -
+validate_data, standardize_data, project_budget, risk_identification,
+create_tax_slabs, create_visual_plots and compile_report - and whole jobs through the
+orchestrator, in pipeline mode and in agents mode against the local stand-in model
+(MODEL_PROVIDER=local, so no API keys or network are needed). Every case runs in a fresh
+process after one untimed warm-up call and reports p50/p99 latency, throughput (items/s
+for the skills, jobs/s for the orchestrator) and the peak RSS of that process, which
+includes loading the case's inputs.
+
+The plot, result and LLM caches are disabled so repeated runs measure the work itself.
+Skills called by the orchestrator run in a thread pool (SKILL_EXECUTOR=thread) unless
+set otherwise, so their memory counts towards the peak RSS.
+
+Results can be stored as a named baseline and later runs compared against it; a case
+whose p50 latency or peak RSS grew by more than --tolerance is reported as a regression
+and the exit status is 1. Timings depend on the machine, so no baselines are committed:
+save one from the base revision on the machine that runs the comparison.
+
+Run from the backend directory:
+    python -m benchmarks.pipeline_benchmark --datasets small,medium --repeat 20
+    python -m benchmarks.pipeline_benchmark --save-baseline main   # on the base revision
+    python -m benchmarks.pipeline_benchmark --compare main         # on the change
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: peak RSS is not reported there
+    resource = None
+
+# Measure the work itself: no cached charts, results or model responses
+os.environ["PLOT_CACHE_MAX_BYTES"] = "0"
+os.environ["RESULT_CACHE_MAX_BYTES"] = "0"
+os.environ["LLM_CACHE_TTL_SECONDS"] = "0"
+os.environ.setdefault("MODEL_PROVIDER", "local")
+os.environ.setdefault("SKILL_EXECUTOR", "thread")
+
+from benchmarks.datasets import DATASETS, write_input
+from job_log import JobLog, job_log_context
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+CASES = (
+    "validate_data",
+    "standardize_data",
+    "project_budget",
+    "risk_identification",
+    "create_tax_slabs",
+    "create_visual_plots",
+    "compile_report",
+    "orchestrator_pipeline",
+    "orchestrator_agents"
+)
+
+# Share of items without an amount in standardize_data's input
+MISSING_FRACTION = 0.05
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _skill_call(case: str, input_path: str, work_dir: str):
+    """
+    Returns the call that runs case once, after preparing its inputs (the projections,
+    risk level, tax slabs and plots of the skills that come later in the workflow).
+    """
+    from skills.budget_projection_tool import project_budget
+    from skills.data_validation_tool import validate_data
+    from skills.dataset_standardization_tool import standardize_data
+    from skills.report_compiler_tool import compile_report
+    from skills.risk_identification_tool import risk_identification
+    from skills.tax_slab_tool import create_tax_slabs
+    from skills.visualization_tool import create_visual_plots, load_plot_data
+    
+    if case == "validate_data":
+        return lambda: validate_data(input_path)
+    if case == "standardize_data":
+        gaps_path = input_path.replace(".json", "_gaps.json")
+        return lambda: standardize_data(gaps_path)
+    if case == "project_budget":
+        return lambda: project_budget(input_path)
+    if case == "create_visual_plots":
+        data = load_plot_data(input_path)
+        return lambda: create_visual_plots(data, output_dir=None)
+    
+    projections = project_budget(input_path)
+    if case == "risk_identification":
+        return lambda: risk_identification(projections)
+    if case == "create_tax_slabs":
+        return lambda: create_tax_slabs(projections)
+    if case == "compile_report":
+        risk_level = risk_identification(projections)
+        tax_slabs = create_tax_slabs(projections)
+        plots = create_visual_plots(load_plot_data(input_path), output_dir=None)
+        output_pdf = os.path.join(work_dir, "report.pdf")
+        return lambda: compile_report(projections, risk_level, tax_slabs, plots=plots, output_pdf=output_pdf)
+    raise ValueError(f"Unknown benchmark case '{case}'. Expected one of: {', '.join(CASES)}")
+
+def run_skill_case(case: str, input_path: str, work_dir: str, items: int, repeat: int, warmup: int) -> dict:
+    with job_log_context(JobLog(quiet=True)):
+        call = _skill_call(case, input_path, work_dir)
+        for _ in range(warmup):
+            call()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - start)
+    return {"samples": samples, "wall": sum(samples), "units": items * repeat, "unit": "items"}
+
+async def _run_jobs(mode: str, input_path: str, work_dir: str, count: int, concurrency: int) -> list:
+    from orchestrator import run
+    from workspace import create_workspace
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def job():
+        async with semaphore:
+            workspace = create_workspace(work_dir)
+            shutil.copyfile(input_path, workspace.input_path)
+            with job_log_context(JobLog(quiet=True)):
+                start = time.perf_counter()
+                result = await run(workspace, mode=mode, llm_insights=False)
+                elapsed = time.perf_counter() - start
+                workspace.cleanup()
+            if result.get("status") != "success":
+                raise RuntimeError(f"{mode} workflow failed: {result.get('reason', result.get('message', result))}")
+            return elapsed
+    
+    return await asyncio.gather(*(job() for _ in range(count)))
+
+def run_orchestrator_case(mode: str, input_path: str, work_dir: str, repeat: int, warmup: int,
+                          concurrency: int) -> dict:
+    async def measure():
+        if warmup:
+            await _run_jobs(mode, input_path, work_dir, warmup, 1)
+        start = time.perf_counter()
+        samples = await _run_jobs(mode, input_path, work_dir, repeat, concurrency)
+        return samples, time.perf_counter() - start
+    
+    samples, wall = asyncio.run(measure())
+    return {"samples": samples, "wall": wall, "units": repeat, "unit": "jobs"}
+
+def run_case(case: str, input_path: str, items: int, repeat: int, warmup: int, concurrency: int) -> dict:
+    """
+    Runs one case and summarizes it. Meant to be called in a fresh process, so the peak
+    RSS belongs to this case alone.
+    """
+    work_dir = tempfile.mkdtemp(prefix="bench-")
+    try:
+        if case.startswith("orchestrator_"):
+            measured = run_orchestrator_case(case.split("_", 1)[1], input_path, work_dir, repeat, warmup, concurrency)
+        else:
+            measured = run_skill_case(case, input_path, work_dir, items, repeat, warmup)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    samples = np.array(measured["samples"])
+    return {
+        "p50_ms": float(np.percentile(samples, 50) * 1000),
+        "p99_ms": float(np.percentile(samples, 99) * 1000),
+        "mean_ms": float(samples.mean() * 1000),
+        "throughput": measured["units"] / measured["wall"],
+        "unit": measured["unit"],
+        "runs": len(samples),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def run_in_fresh_process(*args) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, *args).result()
+
+def machine_info() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, name + ".json")
+
+def save_baseline(name: str, results: dict, settings: dict) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "settings": settings,
+        "results": results
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+    return path
+
+def load_baseline(name: str) -> dict:
+    path = baseline_path(name)
+    if not os.path.isfile(path):
+        raise SystemExit(f"No baseline '{name}' at {path}. Save one first with --save-baseline {name}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(result: dict, baseline: dict, tolerance: float) -> tuple:
+    """
+    (description, regressed) of a result against its baseline: the change of the p50
+    latency and of the peak RSS, and whether either grew by more than tolerance.
+    """
+    latency_ratio = result["p50_ms"] / baseline["p50_ms"] if baseline["p50_ms"] else 1.0
+    description = f"p50 {latency_ratio:5.2f}x"
+    regressed = latency_ratio > 1 + tolerance
+    if result.get("peak_rss_mb") and baseline.get("peak_rss_mb"):
+        rss_ratio = result["peak_rss_mb"] / baseline["peak_rss_mb"]
+        description += f", RSS {rss_ratio:5.2f}x"
+        regressed = regressed or rss_ratio > 1 + tolerance
+    return description + ("  REGRESSION" if regressed else ""), regressed
+
+def _names(value: str, known, kind: str) -> list:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    for name in names:
+        if name not in known:
+            raise SystemExit(f"Unknown {kind} '{name}'. Expected any of: {', '.join(known)}")
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="small,medium", help=f"comma-separated, any of: {', '.join(DATASETS)}")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated skills and orchestrator modes to time")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs (orchestrator: jobs) per case")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before measuring")
+    parser.add_argument("--concurrency", type=int, default=1, help="orchestrator jobs running at once")
+    parser.add_argument("--save-baseline", metavar="NAME", help="store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare the results with a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed growth over the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    
+    datasets = [DATASETS[name] for name in _names(args.datasets, DATASETS, "dataset")]
+    cases = _names(args.cases, CASES, "case")
+    baseline = load_baseline(args.compare)["results"] if args.compare else {}
+    
+    results = {}
+    regressions = 0
+    print(f"{'dataset':<14}{'case':<24}{'p50 ms':>10}{'p99 ms':>10}{'throughput':>20}{'peak RSS':>11}")
+    with tempfile.TemporaryDirectory() as input_dir:
+        for dataset in datasets:
+            input_path = write_input(input_dir, dataset)
+            write_input(input_dir, dataset, missing_fraction=MISSING_FRACTION)
+            for case in cases:
+                key = f"{dataset.name}/{case}"
+                result = run_in_fresh_process(case, input_path, dataset.items, args.repeat, args.warmup,
+                                              args.concurrency)
+                results[key] = result
+                
+                rss = f"{result['peak_rss_mb']:7.0f} MB" if result["peak_rss_mb"] is not None else "       n/a"
+                line = (f"{dataset.name:<14}{case:<24}{result['p50_ms']:10.1f}{result['p99_ms']:10.1f}"
+                        f"{result['throughput']:>14,.1f} {result['unit'] + '/s':<7}{rss}")
+                if key in baseline:
+                    description, regressed = compare(result, baseline[key], args.tolerance)
+                    regressions += regressed
+                    line += f"  {description}"
+                print(line, flush=True)
+    
+    if args.save_baseline:
+        settings = {"repeat": args.repeat, "warmup": args.warmup, "concurrency": args.concurrency,
+                    "skill_executor": os.environ["SKILL_EXECUTOR"], "model_provider": os.environ["MODEL_PROVIDER"]}
+        print(f"Baseline saved as {save_baseline(args.save_baseline, results, settings)}")
+    if regressions:
+        print(f"{regressions} case(s) regressed by more than {args.tolerance:.0%} against baseline '{args.compare}'")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
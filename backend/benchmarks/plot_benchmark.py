@@ -0,0 +1,57 @@
+"""
+Wall time of rendering one job's charts sequentially versus in parallel.
+
+Renders the four charts for a synthetic input with the plot cache disabled, once one
+after the other with create_visual_plots and once with create_visual_plots_concurrently
+on a process-pool SkillExecutor (one task per chart).
+
+Run from the backend directory:
+    python -m benchmarks.plot_benchmark --items 40 --jobs 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Measure rendering itself, not cache hits
+os.environ["PLOT_CACHE_MAX_BYTES"] = "0"
+
+from benchmarks.projection_benchmark import generate_ledger
+from executor import SkillExecutor
+from skills.visualization_tool import create_visual_plots, create_visual_plots_concurrently
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=40, help="total number of revenue and expenditure items")
+    parser.add_argument("--jobs", type=int, default=5, help="number of jobs to render; the mean per job is reported")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes for the parallel run")
+    args = parser.parse_args()
+    
+    data = generate_ledger(args.items)
+    executor = SkillExecutor("process", max_workers=args.workers)
+    
+    async def render_concurrently(output_dir):
+        await create_visual_plots_concurrently(data, output_dir, executor)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Start the worker processes (and import matplotlib in them) before timing
+        asyncio.run(render_concurrently(os.path.join(tmp_dir, "warmup")))
+        
+        start = time.perf_counter()
+        for job in range(args.jobs):
+            create_visual_plots(data, os.path.join(tmp_dir, f"sequential_{job}"))
+        sequential_time = (time.perf_counter() - start) / args.jobs
+        
+        start = time.perf_counter()
+        for job in range(args.jobs):
+            asyncio.run(render_concurrently(os.path.join(tmp_dir, f"parallel_{job}")))
+        parallel_time = (time.perf_counter() - start) / args.jobs
+    executor.shutdown()
+    
+    print(f"Items per chart:          {args.items // 2:,}")
+    print(f"Sequential:               {sequential_time:8.3f}s per job")
+    print(f"Parallel ({args.workers} workers):     {parallel_time:8.3f}s per job  ({sequential_time / parallel_time:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput of the budget projection on large ledgers.
+
+Generates a synthetic input with the given number of revenue and expenditure items,
+then times the columnar projection (ProjectedItems) against the original per-item loop.
+JSON parsing is timed separately since both paths share it.
+
+Run from the backend directory:
+    python -m benchmarks.projection_benchmark --items 1000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from job_log import JobLog, job_log_context
+from skills.budget_projection_tool import ProjectedItems, project_budget
+
+def generate_ledger(item_count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    half = item_count // 2
+    return {
+        "revenue": [{"name": f"Revenue {index}", "amount": rng.uniform(1e3, 1e7)} for index in range(half)],
+        "expenditure": [{"name": f"Expenditure {index}", "amount": rng.uniform(1e3, 1e7)} for index in range(item_count - half)],
+        "inflation": [{"year": str(2020 + index), "rate": 3 + rng.random()} for index in range(5)],
+        "gdp_growth": [{"year": str(2020 + index), "rate": 2 + rng.random()} for index in range(5)]
+    }
+
+def project_items_loop(records: list, growth_rate: float) -> list:
+    # The per-item projection project_budget used before the columnar path
+    projected = []
+    for item in records:
+        projected_item = item.copy()
+        projected_item["projected_amount"] = item.get("amount", 0) * (1 + growth_rate)
+        projected.append(projected_item)
+    return projected
+
+def timed(func, *args, repeat: int = 3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000, help="total number of revenue and expenditure items")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is reported")
+    args = parser.parse_args()
+    
+    data = generate_ledger(args.items)
+    records = data["revenue"] + data["expenditure"]
+    
+    loop_result, loop_time = timed(project_items_loop, records, 0.05, repeat=args.repeat)
+    columnar_result, columnar_time = timed(ProjectedItems.from_records, records, 0.05, repeat=args.repeat)
+    _, total_time = timed(columnar_result.total, repeat=args.repeat)
+    assert abs(columnar_result.total() - sum(item["projected_amount"] for item in loop_result)) < 1e-3 * columnar_result.total()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "input_data.json")
+        with open(input_path, "w") as f:
+            json.dump(data, f)
+        # Quiet job log, as in the API, so per-item debug lines are not formatted
+        with job_log_context(JobLog(quiet=True)):
+            _, end_to_end_time = timed(project_budget, input_path, repeat=args.repeat)
+    
+    print(f"Items:                    {args.items:,}")
+    print(f"Per-item loop:            {loop_time:8.3f}s  ({args.items / loop_time:,.0f} items/s)")
+    print(f"Columnar projection:      {columnar_time:8.3f}s  ({args.items / columnar_time:,.0f} items/s)")
+    print(f"Columnar total():         {total_time:8.3f}s")
+    print(f"project_budget (w/ JSON): {end_to_end_time:8.3f}s  ({args.items / end_to_end_time:,.0f} items/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Time to render large revenue tables into a PDF.
+
+Projects a synthetic ledger and renders its revenue table with the original per-cell
+renderer (every cell a bordered fpdf cell, fonts set per row, rows built as a list of
+dicts first), with PDF.create_table streaming every row, and with create_table in
+top-N summary mode. Each timing includes writing the PDF to memory.
+
+Run from the backend directory:
+    python -m benchmarks.table_benchmark --rows 10000
+"""
+import argparse
+
+from benchmarks.projection_benchmark import generate_ledger, timed
+from skills.budget_projection_tool import ProjectedItems
+from skills.report_compiler_tool import PDF, amount_rows
+
+HEADERS = ["Revenue Source", "Projected Amount"]
+
+def create_table_cells(pdf: PDF, headers: list, data: list) -> None:
+    # The table renderer compile_report used before create_table was rewritten
+    col_widths = [pdf.w / len(headers) - 10] * len(headers)
+    pdf.set_font('Arial', 'B', 10)
+    for i, header in enumerate(headers):
+        pdf.cell(col_widths[i], 10, str(header), 1, 0, 'C')
+    pdf.ln()
+    pdf.set_font('Arial', '', 10)
+    for row in data:
+        for i, cell in enumerate(row):
+            pdf.cell(col_widths[i], 8, str(cell), 1, 0, 'L')
+        pdf.ln()
+
+def new_pdf() -> PDF:
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    return pdf
+
+def render_cells(items: ProjectedItems) -> bytes:
+    pdf = new_pdf()
+    data = [[rev.get("name", "Unknown"), f"${rev.get('projected_amount', 0):,.2f}"] for rev in items]
+    create_table_cells(pdf, HEADERS, data)
+    return pdf.output()
+
+def render_streaming(items: ProjectedItems, top_n: int = 0) -> bytes:
+    pdf = new_pdf()
+    pdf.create_table(HEADERS, amount_rows(items, top_n), aligns="LR")
+    return pdf.output()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows in the revenue table")
+    parser.add_argument("--top-n", type=int, default=50, help="rows kept in summary mode")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is reported")
+    args = parser.parse_args()
+    
+    data = generate_ledger(args.rows * 2)
+    items = ProjectedItems.from_records(data["revenue"], 0.05)
+    
+    cells_pdf, cells_time = timed(render_cells, items, repeat=args.repeat)
+    streaming_pdf, streaming_time = timed(render_streaming, items, repeat=args.repeat)
+    summary_pdf, summary_time = timed(render_streaming, items, args.top_n, repeat=args.repeat)
+    
+    print(f"Rows:                     {args.rows:,}")
+    print(f"Per-cell table:           {cells_time:8.3f}s  ({len(cells_pdf) / 1e6:.1f} MB)")
+    print(f"create_table:             {streaming_time:8.3f}s  ({len(streaming_pdf) / 1e6:.1f} MB, {cells_time / streaming_time:.2f}x)")
+    print(f"create_table top {args.top_n}:      {summary_time:8.3f}s  ({len(summary_pdf) / 1e3:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Throughput of input validation on large files.
+
+Writes a synthetic ledger with the given number of revenue and expenditure items and
+times validate_file, read with json.load and streamed with ijson (when installed), and
+validate_bytes (as used by the upload endpoint), against a plain json.load for reference.
+
+Run from the backend directory:
+    python -m benchmarks.validation_benchmark --items 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.projection_benchmark import generate_ledger, timed
+from skills import data_validation_tool
+from skills.data_validation_tool import validate_bytes, validate_file
+
+def load_json(file_path: str):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000, help="total number of revenue and expenditure items")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is reported")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, "input_data.json")
+        with open(input_path, "w") as f:
+            json.dump(generate_ledger(args.items), f)
+        size_mb = os.path.getsize(input_path) / 1e6
+        with open(input_path, "rb") as f:
+            contents = f.read()
+        
+        _, load_time = timed(load_json, input_path, repeat=args.repeat)
+        report, file_time = timed(validate_file, input_path, repeat=args.repeat)
+        stream_time = None
+        if data_validation_tool.ijson is not None:
+            os.environ["VALIDATION_STREAM_MIN_BYTES"] = "0"
+            _, stream_time = timed(validate_file, input_path, repeat=args.repeat)
+            del os.environ["VALIDATION_STREAM_MIN_BYTES"]
+        _, bytes_time = timed(validate_bytes, contents, repeat=args.repeat)
+    assert report.valid, report.errors
+    
+    print(f"Items:                    {args.items:,} ({size_mb:.1f} MB)")
+    print(f"json.load only:           {load_time:8.3f}s  ({size_mb / load_time:,.1f} MB/s)")
+    print(f"validate_file:            {file_time:8.3f}s  ({args.items / file_time:,.0f} items/s, {size_mb / file_time:,.1f} MB/s)")
+    if stream_time is not None:
+        print(f"validate_file (ijson):    {stream_time:8.3f}s  ({args.items / stream_time:,.0f} items/s, {size_mb / stream_time:,.1f} MB/s)")
+    print(f"validate_bytes:           {bytes_time:8.3f}s  ({args.items / bytes_time:,.0f} items/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from job_log import log
+
+# Expired entries of a cache with a TTL are swept from its directory at most this often
+PURGE_INTERVAL = 10 * 60
+
+# Prefix of the entries being written; they are ignored until renamed into place
+TMP_PREFIX = ".tmp-"
+
+_caches = {}
+
+def cache_key(*parts) -> str:
+    """
+    Hash of JSON-serializable parts, serialized canonically (sorted keys, no whitespace).
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _entry_size(entry: os.DirEntry) -> int:
+    if entry.is_dir():
+        return sum(item.stat().st_size for item in os.scandir(entry.path))
+    return entry.stat().st_size
+
+class DiskCache:
+    """
+    Entries in a directory on disk that several processes may share, bounded by size
+    (max_bytes), age (ttl_seconds) or both.
+    
+    An entry is a file or a directory of files. Entries are written under a temporary
+    name and renamed into place, so readers never see a partial entry. Their
+    modification time is the LRU order for the size limit, which reads refresh, and
+    otherwise the time they were written, against which the TTL is checked. Callers
+    get copies of the cached data, never the entries themselves, so nothing they do
+    with it can change the cache.
+    """
+    
+    name = "disk"
+    
+    def __init__(self, directory: str, max_bytes: int = None, ttl_seconds: float = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._last_purge = 0.0
+        os.makedirs(directory, exist_ok=True)
+    
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+    
+    def lookup(self, name: str) -> str:
+        """
+        The path of the entry, or None if it is not in the cache or has expired. A hit
+        counts as a use for the LRU order of a size-bounded cache.
+        """
+        path = self.path(name)
+        try:
+            if self.ttl_seconds is not None and time.time() - os.stat(path).st_mtime > self.ttl_seconds:
+                return None
+            if self.max_bytes is not None:
+                os.utime(path)
+        except FileNotFoundError:
+            # Not cached, or evicted by another process in the meantime
+            return None
+        return path
+    
+    def read(self, name: str) -> bytes:
+        """
+        The contents of a file entry, or None if it is not in the cache or has expired.
+        """
+        path = self.lookup(name)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def write(self, name: str, data: bytes) -> None:
+        """
+        Stores data as a file entry, replacing any entry of that name.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._entry_added()
+    
+    def write_dir(self, name: str, fill) -> None:
+        """
+        Stores a directory entry: fill(path) writes the files into an empty directory
+        that is then renamed into place. An existing entry of that name is kept.
+        """
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix=TMP_PREFIX)
+        try:
+            fill(tmp_dir)
+            try:
+                os.rename(tmp_dir, self.path(name))
+            except OSError:
+                # Another process stored the same entry first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._entry_added()
+    
+    def _entry_added(self) -> None:
+        if self.max_bytes is not None or time.monotonic() - self._last_purge >= PURGE_INTERVAL:
+            self.evict()
+    
+    def _remove(self, path: str) -> None:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    def evict(self) -> None:
+        """
+        Removes the expired entries, then the least recently used ones until the cache
+        fits in max_bytes.
+        """
+        self._last_purge = time.monotonic()
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds is not None else None
+        entries = []
+        total = 0
+        expired = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith(TMP_PREFIX):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                    if cutoff is not None and mtime < cutoff:
+                        self._remove(entry.path)
+                        expired += 1
+                        continue
+                    size = _entry_size(entry) if self.max_bytes is not None else 0
+                except FileNotFoundError:
+                    continue
+                entries.append((mtime, size, entry.path))
+                total += size
+        if expired:
+            log(f"Removed {expired} expired entries from the {self.name} cache")
+        if self.max_bytes is None or total <= self.max_bytes:
+            return
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        log(f"Evicted {self.name} cache entries, cache size is now {total / 1e6:.1f} MB")
+
+def shared_cache(cache_class, prefix: str, default_dir: str, max_bytes: int = None, ttl_seconds: float = None):
+    """
+    The process-wide instance of cache_class, configured from the environment:
+    <prefix>_DIR, and <prefix>_MAX_BYTES or <prefix>_TTL_SECONDS for whichever of the
+    limits has a default here. Returns None if a limit is set to 0, which disables
+    the cache.
+    """
+    limits = {}
+    if max_bytes is not None:
+        limits["max_bytes"] = int(os.getenv(f"{prefix}_MAX_BYTES", str(max_bytes)))
+    if ttl_seconds is not None:
+        limits["ttl_seconds"] = float(os.getenv(f"{prefix}_TTL_SECONDS", str(ttl_seconds)))
+    if any(limit <= 0 for limit in limits.values()):
+        return None
+    if prefix not in _caches:
+        _caches[prefix] = cache_class(os.getenv(f"{prefix}_DIR", default_dir), **limits)
+    return _caches[prefix]
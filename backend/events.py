@@ -0,0 +1,32 @@
+import time
+
+# The user-facing steps of a workflow, in order. Both workflow modes report progress with these.
+WORKFLOW_STEPS = ("data_validation", "budget_analysis", "tax_policy", "report_compilation")
+
+def emit_event(on_event, event_type: str, **fields) -> None:
+    """
+    Sends a structured event to the on_event callback, if there is one.
+    
+    Every event is a JSON-serializable dict with a "type" and a "time" (epoch seconds):
+      - "stage": a workflow stage changed state ("started", "finished" or "failed")
+      - "progress": number of finished stages out of the total
+      - "step": the workflow entered one of WORKFLOW_STEPS
+      - "log": log lines written by the workflow
+    """
+    if on_event is None:
+        return
+    on_event({"type": event_type, "time": time.time(), **fields})
+
+def step_reporter(on_event, stage_steps: dict):
+    """
+    Wraps on_event for the scheduler: passes every event through and additionally emits
+    a "step" event when a stage listed in stage_steps (stage name -> step) starts.
+    """
+    def handle(event):
+        if on_event is None:
+            return
+        on_event(event)
+        if event["type"] == "stage" and event["state"] == "started" and event["stage"] in stage_steps:
+            step = stage_steps[event["stage"]]
+            emit_event(on_event, "step", step=step, step_number=WORKFLOW_STEPS.index(step) + 1)
+    return handle
@@ -0,0 +1,109 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from job_log import JobLog, current_log, job_log_context
+
+# "process" runs skills in worker processes, "thread" in worker threads, "inline" on the event loop
+EXECUTOR_KINDS = ("process", "thread", "inline")
+
+_skill_executor = None
+
+def _call_with_log(func, quiet, args, kwargs):
+    """
+    Runs func in a worker process with its own job log and returns the result together
+    with the records it logged, so they can be replayed into the caller's job log.
+    """
+    job_log = JobLog(quiet=quiet)
+    with job_log_context(job_log):
+        result = func(*args, **kwargs)
+    return result, list(job_log.records)
+
+class SkillExecutor:
+    """
+    Runs CPU-bound skills (plot rendering, report compilation, projections) off the event loop.
+    
+    At most max_workers skills run at once; further calls wait their turn. The number of
+    calls running or waiting is tracked so callers can apply backpressure: once it reaches
+    max_pending, saturated is True and new work should be refused rather than queued.
+    Functions and arguments sent to a process executor must be picklable.
+    """
+    
+    def __init__(self, kind: str = "process", max_workers: int = None, max_pending: int = None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor '{kind}'. Expected one of: {', '.join(EXECUTOR_KINDS)}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_pending = max_pending or self.max_workers * 4
+        self.pending = 0
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._pool = None
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="skill")
+    
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; CLI runs and benchmarks may start several
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) in the executor and returns its result.
+        Whatever the skill logs ends up in the caller's job log.
+        """
+        self.pending += 1
+        try:
+            async with self._get_semaphore():
+                if self.kind == "inline":
+                    return func(*args, **kwargs)
+                
+                loop = asyncio.get_running_loop()
+                if self.kind == "thread":
+                    # Carry the caller's context (e.g. the job log) over to the worker thread
+                    context = contextvars.copy_context()
+                    return await loop.run_in_executor(self._pool, functools.partial(context.run, func, *args, **kwargs))
+                
+                job_log = current_log()
+                quiet = job_log.quiet if job_log is not None else False
+                result, records = await loop.run_in_executor(
+                    self._pool, _call_with_log, func, quiet, args, kwargs
+                )
+                for record in records:
+                    if job_log is not None:
+                        job_log.append(record)
+                    else:
+                        print(record["message"])
+                return result
+        finally:
+            self.pending -= 1
+    
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+def get_skill_executor() -> SkillExecutor:
+    """
+    The process-wide skill executor, configured from the environment:
+    SKILL_EXECUTOR ("process", "thread" or "inline", default "process"),
+    SKILL_WORKERS (default: number of CPUs) and SKILL_MAX_PENDING (default: 4 per worker).
+    """
+    global _skill_executor
+    if _skill_executor is None:
+        _skill_executor = SkillExecutor(
+            kind=os.getenv("SKILL_EXECUTOR", "process"),
+            max_workers=int(os.getenv("SKILL_WORKERS", "0")) or None,
+            max_pending=int(os.getenv("SKILL_MAX_PENDING", "0")) or None
+        )
+    return _skill_executor
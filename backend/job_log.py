@@ -0,0 +1,77 @@
+import collections
+import contextlib
+import contextvars
+import threading
+import time
+
+# Default number of records a job keeps; older records are dropped
+DEFAULT_LOG_SIZE = 500
+
+class JobLog:
+    """
+    Bounded log of structured records for one job.
+    
+    Records are dicts with "time", "level" and "message" plus any extra fields passed to
+    log(). They are kept in a ring buffer of max_records entries and, if on_record is given,
+    handed to it as they are written. In quiet mode the detail lines that skills only emit
+    when verbose() is true are skipped entirely.
+    """
+    
+    def __init__(self, max_records: int = DEFAULT_LOG_SIZE, quiet: bool = False, on_record=None):
+        self.records = collections.deque(maxlen=max_records)
+        self.quiet = quiet
+        self.on_record = on_record
+        self._lock = threading.Lock()
+    
+    def append(self, record: dict) -> None:
+        with self._lock:
+            self.records.append(record)
+        if self.on_record is not None:
+            self.on_record(record)
+    
+    def tail(self, count: int) -> list:
+        """
+        Returns the last count records, oldest first.
+        """
+        with self._lock:
+            start = max(len(self.records) - count, 0)
+            return [self.records[index] for index in range(start, len(self.records))]
+
+_current_log = contextvars.ContextVar("job_log", default=None)
+
+@contextlib.contextmanager
+def job_log_context(job_log: JobLog):
+    """
+    Routes log() calls made in this context (including asyncio tasks started from it)
+    to job_log. Each concurrent job gets its own context, so their logs never mix.
+    """
+    token = _current_log.set(job_log)
+    try:
+        yield job_log
+    finally:
+        _current_log.reset(token)
+
+def current_log() -> JobLog:
+    """
+    Returns the job log of the current context, or None outside of a job.
+    """
+    return _current_log.get()
+
+def log(message: str, level: str = "info", **fields) -> None:
+    """
+    Writes a log record to the current job's log. Outside of a job context
+    (e.g. when running main.py) the message is printed as before.
+    """
+    job_log = _current_log.get()
+    if job_log is None:
+        print(message)
+        return
+    job_log.append({"time": time.time(), "level": level, "message": message, **fields})
+
+def verbose() -> bool:
+    """
+    False when the current job log is quiet. Skills check this before formatting
+    per-item detail lines so that quiet jobs do not pay for them at all.
+    """
+    job_log = _current_log.get()
+    return job_log is None or not job_log.quiet
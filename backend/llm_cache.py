@@ -0,0 +1,129 @@
+import asyncio
+import dataclasses
+import json
+import os
+
+from pydantic_ai.messages import ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.usage import Usage
+from pydantic_core import to_jsonable_python
+
+from disk_cache import DiskCache, cache_key, shared_cache
+from job_log import log
+
+# Default location and lifetime of cached model responses
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "llm")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+# Parts of the message history that differ between otherwise identical requests
+VOLATILE_FIELDS = frozenset(("timestamp", "usage"))
+
+def _stable(value):
+    if isinstance(value, dict):
+        return {key: _stable(item) for key, item in value.items() if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_stable(item) for item in value]
+    return value
+
+def request_key(model_id: str, messages: list, model_settings, model_request_parameters) -> str:
+    """
+    Hash of one model request: the model, the whole message history (system prompt, user
+    prompt and every tool call and tool result so far, without timestamps), the model
+    settings and the tools offered.
+    """
+    return cache_key(model_id, _stable(to_jsonable_python([messages, model_settings, model_request_parameters])))
+
+def _unbilled(response: ModelResponse) -> ModelResponse:
+    # A reused response cost nothing, so the run's usage only counts real model calls
+    return dataclasses.replace(response, parts=list(response.parts), usage=Usage())
+
+class LLMCache(DiskCache):
+    """
+    Model responses on disk, keyed by request_key and kept for ttl_seconds (see DiskCache).
+    
+    Identical requests that are in flight at the same time are coalesced: the first one
+    goes to the model and the others wait for its response instead of sending their own.
+    """
+    
+    name = "LLM"
+    
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        super().__init__(directory, ttl_seconds=ttl_seconds)
+        self._in_flight = {}
+    
+    def get(self, key: str) -> ModelResponse:
+        """
+        Returns the cached response, or None if there is none or it has expired.
+        """
+        data = self.read(key + ".json")
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+        except json.JSONDecodeError:
+            return None
+        return ModelMessagesTypeAdapter.validate_python(entry["messages"])[0]
+    
+    def put(self, key: str, response: ModelResponse) -> None:
+        entry = {"messages": ModelMessagesTypeAdapter.dump_python([response], mode="json")}
+        self.write(key + ".json", json.dumps(entry).encode("utf-8"))
+    
+    async def request(self, key: str, send) -> ModelResponse:
+        """
+        Returns the response for key from the cache, from an identical request already in
+        flight, or by awaiting send() and caching its result.
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._in_flight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            log(f"Waiting for an identical model request in flight ({key[:12]})")
+            return _unbilled(await asyncio.shield(pending))
+        
+        future = loop.create_future()
+        self._in_flight[key] = future
+        try:
+            response = await asyncio.to_thread(self.get, key)
+            if response is not None:
+                log(f"Reusing cached model response ({key[:12]})")
+                response = _unbilled(response)
+            else:
+                response = await send()
+                await asyncio.to_thread(self.put, key, response)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Mark it retrieved: nobody may be waiting for it
+                future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+class CachedModel(WrapperModel):
+    """
+    A pydantic_ai model that answers requests through an LLMCache before calling the
+    wrapped model. Every agent step is one request, so a run whose prompts and tool
+    results match an earlier run is replayed without calling the model.
+    """
+    
+    def __init__(self, wrapped, cache: LLMCache):
+        super().__init__(wrapped)
+        self.cache = cache
+    
+    async def request(self, messages, model_settings, model_request_parameters) -> ModelResponse:
+        key = request_key(f"{self.system}:{self.model_name}", messages, model_settings, model_request_parameters)
+        return await self.cache.request(
+            key, lambda: self.wrapped.request(messages, model_settings, model_request_parameters)
+        )
+
+def get_llm_cache() -> LLMCache:
+    """
+    The process-wide LLM response cache, configured from the environment: LLM_CACHE_DIR
+    and LLM_CACHE_TTL_SECONDS (default one day). Returns None if LLM_CACHE_TTL_SECONDS
+    is 0, which disables caching.
+    """
+    return shared_cache(LLMCache, "LLM_CACHE", DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS)
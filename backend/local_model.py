@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+LOCAL_MODEL_NAME = "stand-in"
+
+# Default delay of every model request, in seconds
+DEFAULT_LATENCY_SECONDS = 0.0
+
+# Key of the final JSON answer that carries each tool's result, as the agents' system
+# prompts ask for
+ANSWER_KEYS = {
+    "risk_tool": "risk_ranking",
+    "slabs_tool": "recommended_slabs",
+    "compile_report_tool": "report_path"
+}
+
+def _tool_results(messages: list) -> dict:
+    results = {}
+    for message in messages:
+        for part in getattr(message, "parts", []):
+            if isinstance(part, ToolReturnPart):
+                results[part.tool_name] = part.content
+    return results
+
+def _sample(schema: dict, name: str, definitions: dict):
+    """
+    A fixed value that satisfies a JSON schema: every required property is filled in
+    and every string names the field it stands for.
+    """
+    if "$ref" in schema:
+        schema = definitions[schema["$ref"].rsplit("/", 1)[-1]]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            return _sample(schema[key][0], name, definitions)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    
+    schema_type = schema.get("type", "string")
+    if schema_type == "object":
+        properties = schema.get("properties", {})
+        return {key: _sample(properties[key], key, definitions) for key in schema.get("required", properties)}
+    if schema_type == "array":
+        return []
+    if schema_type in ("number", "integer"):
+        return 0
+    if schema_type == "boolean":
+        return True
+    if schema_type == "null":
+        return None
+    return f"Local stand-in text for {name}."
+
+def _final_answer(messages: list, info: AgentInfo) -> ModelResponse:
+    if info.output_tools:
+        output_tool = info.output_tools[0]
+        schema = output_tool.parameters_json_schema
+        return ModelResponse(parts=[ToolCallPart(output_tool.name, _sample(schema, output_tool.name, schema.get("$defs", {})))])
+    
+    results = _tool_results(messages)
+    answer = {key: results[tool] for tool, key in ANSWER_KEYS.items() if tool in results}
+    if answer:
+        return ModelResponse(parts=[TextPart(json.dumps(answer, default=str))])
+    if "validate_data_tool" in results:
+        return ModelResponse(parts=[TextPart("Yes" if results["validate_data_tool"] else "No")])
+    return ModelResponse(parts=[TextPart("Done.")])
+
+def create_local_model(latency_seconds: float = DEFAULT_LATENCY_SECONDS) -> FunctionModel:
+    """
+    A deterministic stand-in for the OpenAI and Anthropic models, for running and
+    benchmarking the agents without network access.
+    
+    Every request waits latency_seconds, like a round-trip to a model API, and then
+    follows a fixed script: it calls the offered tools one per step, in the order the
+    agent registered them, and answers once every tool has returned. Agents with a
+    result type get a schema-conforming placeholder; the others get the JSON their
+    system prompt asks for, built from the tool results (e.g. {"risk_ranking": ...}),
+    or "Yes"/"No" from the data validation tool.
+    """
+    async def respond(messages: list, info: AgentInfo) -> ModelResponse:
+        if latency_seconds > 0:
+            await asyncio.sleep(latency_seconds)
+        called = _tool_results(messages)
+        for tool in info.function_tools:
+            if tool.name not in called:
+                return ModelResponse(parts=[ToolCallPart(tool.name, {})])
+        return _final_answer(messages, info)
+    
+    return FunctionModel(respond, model_name=LOCAL_MODEL_NAME)
@@ -2,6 +2,7 @@ import asyncio
 from dotenv import load_dotenv
 import json
 import logfire
+from agent_factory import get_model_registry
 from orchestrator import run
 
 # Load environment variables
@@ -14,7 +15,11 @@ async def main():
     print("Initializing Ministry of Finance system...")
     logfire.configure(send_to_logfire='if-token-present')
     # Run the orchestrated workflow
-    result = await run()
+    try:
+        result = await run()
+    finally:
+        # Close the pooled model connections while their event loop still runs
+        await get_model_registry().aclose()
     
     # Output the final result
     if result["status"] == "success":
@@ -2,120 +2,477 @@ import asyncio
 import logfire
 from dotenv import load_dotenv
 import json
+import os
+
+from workspace import JobWorkspace, default_workspace
+from agent_factory import get_text_model_name
+from result_cache import get_result_cache, result_key
+from artifacts import ArtifactRegistry, get_projection_artifact
+from scheduler import Stage, StageFailed, run_stages
+from executor import get_skill_executor
+from events import step_reporter
+from job_log import log
 
 # Import agent runner functions
 from agents.data_manager_agent import run_data_manager_agent
 from agents.budget_agent import run_budget_agent
 from agents.tax_policy_agent import run_tax_policy_agent
-from agents.report_agent import run_report_agent
+from agents.report_agent import run_report_agent, generate_insights
+
+# Skills used directly by the workflow stages
+from skills.data_validation_tool import validate_data
+from skills.budget_projection_tool import base_year
+from skills.visualization_tool import create_visual_plots_concurrently, default_plot_format, load_plot_data
+from skills.risk_identification_tool import risk_assessment
+from skills.tax_slab_tool import create_tax_slabs
+from skills.report_compiler_tool import compile_report, default_table_top_n
+from skills.report_export_tool import default_report_formats, export_reports, parse_report_formats, report_summary
+from skills.report_template import DEFAULT_TEMPLATE
 
 # Load environment variables
 load_dotenv()
 
-async def run_workflow():
+# "agents" runs every step through its LLM agent, "pipeline" calls the skills directly
+WORKFLOW_MODES = ("agents", "pipeline")
+
+# Outputs that embed the charts; when neither is requested the charts are not rendered
+PLOT_FORMATS = ("pdf", "html")
+
+async def render_visual_plots(workspace: JobWorkspace, formats: tuple) -> ArtifactRegistry:
+    """
+    Renders the charts for the workspace's input, each chart as its own task in the skill
+    executor, and returns them as an ArtifactRegistry for compile_report. Failures are
+    logged; the report is compiled with whatever plots were produced.
+    """
+    if not set(formats) & set(PLOT_FORMATS):
+        log("No report output embeds charts, skipping visualization.")
+        return ArtifactRegistry()
+    try:
+        data = await asyncio.to_thread(load_plot_data, workspace.input_path)
+        return await create_visual_plots_concurrently(data, None, get_skill_executor())
+    except Exception as e:
+        log(f"Error: {e}", level="error")
+        return ArtifactRegistry()
+
+async def export_report_data(workspace: JobWorkspace, formats: tuple, projections: dict, risk_level: str,
+                             tax_slabs: list, plots: ArtifactRegistry, insights: dict = None,
+                             risk_assessment: dict = None) -> dict:
+    """
+    Writes the requested non-PDF outputs (see report_export_tool) in the skill executor.
+    Returns {format: path} for the outputs written.
+    """
+    outputs = {fmt: workspace.output_path(fmt) for fmt in formats if fmt != "pdf"}
+    if not outputs:
+        return {}
+    return await get_skill_executor().run(
+        export_reports,
+        outputs,
+        projections=projections,
+        risk_level=risk_level,
+        tax_slabs=tax_slabs,
+        plots=plots,
+        insights=insights,
+        risk_assessment=risk_assessment
+    )
+
+def workflow_outputs(formats: tuple, report_path: str, exports: dict) -> dict:
+    outputs = {"pdf": report_path} if "pdf" in formats else {}
+    outputs.update(exports)
+    return outputs
+
+async def run_workflow(workspace: JobWorkspace = None, on_event=None, validated: bool = False, formats=None):
     """
-    Orchestrates the workflow by running agents in sequence and passing data between them.
+    Orchestrates the workflow as a graph of stages and passes data between them.
+    Stages whose inputs are ready run concurrently: the charts are rendered in parallel in the
+    skill executor from the raw input while the agents run, and the Budget and Tax Policy agents both
+    start as soon as the data is validated and the projections are computed.
+    All files are read from and written to the given workspace (defaults to the current directory).
+    Progress is reported as structured events to on_event (see events.py).
+    If validated is set, the input was already checked against the input schema
+    (e.g. at upload) and the Data Manager Agent round-trip is skipped.
+    formats lists the report outputs to produce (see report_export_tool.REPORT_FORMATS,
+    default REPORT_FORMATS); without "pdf" the Report Agent is not run at all.
     """
-    print("Starting Ministry of Finance workflow...")
+    workspace = workspace or default_workspace()
+    formats = parse_report_formats(formats) if formats is not None else default_report_formats()
+    log("Starting Ministry of Finance workflow...")
     
-    # Step 1: Run Data Manager Agent to validate data and create visualizations
-    print("Step 1: Running Data Manager Agent...")
-    data_manager_result = await run_data_manager_agent()
-    print(f"Data Manager Agent completed. Result: {data_manager_result}")
+    # Step 1: Run Data Manager Agent to validate data
+    async def data_manager_stage(results):
+        if validated:
+            log("Step 1: Input data was validated on upload, skipping the Data Manager Agent.")
+            return {"data_valid": True}
+        log("Step 1: Running Data Manager Agent...")
+        data_manager_result = await run_data_manager_agent(input_path=workspace.input_path)
+        log(f"Data Manager Agent completed. Result: {data_manager_result}")
+        
+        # Verify data is valid before proceeding
+        if isinstance(data_manager_result, dict) and data_manager_result.get("data_valid") is False:
+            log("Error: Input data failed validation. Stopping workflow.", level="error")
+            raise StageFailed("Data validation failed")
+        return data_manager_result
     
-    # Verify data is valid before proceeding
-    if isinstance(data_manager_result, dict) and data_manager_result.get("data_valid") is False:
-        print("Error: Input data failed validation. Stopping workflow.")
-        return {"status": "failed", "reason": "Data validation failed"}
+    # Projections are computed once and shared by the Budget and Tax Policy agents
+    async def projection_stage(results):
+        return await get_projection_artifact(workspace.input_path)
     
-    # Step 2: Run Budget Agent to generate projections and risk analysis
-    print("Step 2: Running Budget Agent...")
-    budget_result = await run_budget_agent()
-    print(f"Budget Agent completed. Result type: {type(budget_result).__name__}")
+    # Step 2: Run Budget Agent to generate risk analysis
+    async def budget_stage(results):
+        log("Step 2: Running Budget Agent...")
+        budget_result = await run_budget_agent(projection=results["projections"])
+        log(f"Budget Agent completed. Result type: {type(budget_result).__name__}")
+        
+        # Extract projections and risk level from budget agent result
+        if not isinstance(budget_result, dict):
+            log(f"Error: Budget Agent returned {type(budget_result).__name__} instead of dictionary", level="error")
+            raise StageFailed(f"Budget Agent returned invalid data type: {type(budget_result).__name__}")
+        
+        log(f"Budget result keys: {list(budget_result.keys())}")
+        
+        if "projections" not in budget_result:
+            log("Error: Budget Agent did not return 'projections' key", level="error")
+            raise StageFailed("Budget data missing 'projections'")
+        
+        if "risk_ranking" not in budget_result:
+            log("Error: Budget Agent did not return 'risk_ranking' key", level="error")
+            raise StageFailed("Budget data missing 'risk_ranking'")
+        return budget_result
     
-    # Extract projections and risk level from budget agent result
-    if not isinstance(budget_result, dict):
-        print(f"Error: Budget Agent returned {type(budget_result).__name__} instead of dictionary")
-        return {"status": "failed", "reason": f"Budget Agent returned invalid data type: {type(budget_result).__name__}"}
+    # The per-factor breakdown behind the risk ranking, for the data outputs
+    def risk_stage(results):
+        return risk_assessment(projections=results["projections"].projections)
     
-    print(f"Budget result keys: {list(budget_result.keys())}")
+    # Step 3: Run Tax Policy Agent to create tax slabs
+    async def tax_policy_stage(results):
+        log("Step 3: Running Tax Policy Agent...")
+        tax_result = await run_tax_policy_agent(projection=results["projections"])
+        log(f"Tax Policy Agent completed. Result type: {type(tax_result).__name__}")
+        
+        # Extract tax slabs from tax agent result
+        if not isinstance(tax_result, dict):
+            log(f"Error: Tax Policy Agent returned {type(tax_result).__name__} instead of dictionary", level="error")
+            raise StageFailed(f"Tax Policy Agent returned invalid data type: {type(tax_result).__name__}")
+        
+        log(f"Tax result keys: {list(tax_result.keys())}")
+        
+        if "recommended_slabs" not in tax_result:
+            log("Error: Tax Policy Agent did not return 'recommended_slabs' key", level="error")
+            raise StageFailed("Tax data missing 'recommended_slabs'")
+        return tax_result["recommended_slabs"]
     
-    if "projections" not in budget_result:
-        print("Error: Budget Agent did not return 'projections' key")
-        return {"status": "failed", "reason": "Budget data missing 'projections'"}
+    # Step 4: Run Report Agent to compile final report
+    async def report_stage(results):
+        if "pdf" not in formats:
+            log("Step 4: No PDF report requested, skipping the Report Agent.")
+            return None
+        log("Step 4: Running Report Agent...")
+        report_result = await run_report_agent(
+            projections=results["budget"]["projections"],
+            risk_level=results["budget"]["risk_ranking"],
+            tax_slabs=results["tax_policy"],
+            plots=results["visualization"],
+            output_pdf=workspace.report_path
+        )
+        log(f"Report Agent completed. Result: {report_result}")
+        
+        # Handle the report result, which might be a string or dictionary
+        report_path = None
+        if isinstance(report_result, dict) and "report_path" in report_result:
+            report_path = report_result["report_path"]
+        elif isinstance(report_result, str):
+            # If the result is a string, it might be the path directly
+            report_path = report_result
+            # Check if it's a JSON string
+            try:
+                parsed = json.loads(report_result)
+                if isinstance(parsed, dict) and "report_path" in parsed:
+                    report_path = parsed["report_path"]
+            except:
+                # Not a JSON string, use as is
+                pass
         
-    if "risk_ranking" not in budget_result:
-        print("Error: Budget Agent did not return 'risk_ranking' key")
-        return {"status": "failed", "reason": "Budget data missing 'risk_ranking'"}
+        # The agent's reply may be free text; the workspace path is authoritative once the PDF exists
+        if os.path.exists(workspace.report_path):
+            report_path = workspace.report_path
+        return report_path
     
-    projections = budget_result["projections"]
-    risk_level = budget_result["risk_ranking"]
+    # The data outputs are written from the same results, alongside the PDF
+    async def export_stage(results):
+        return await export_report_data(
+            workspace, formats,
+            projections=results["budget"]["projections"],
+            risk_level=results["budget"]["risk_ranking"],
+            tax_slabs=results["tax_policy"],
+            plots=results["visualization"],
+            risk_assessment=results["risk"]
+        )
     
-    # Step 3: Run Tax Policy Agent to create tax slabs
-    print("Step 3: Running Tax Policy Agent...")
-    tax_result = await run_tax_policy_agent()
-    print(f"Tax Policy Agent completed. Result type: {type(tax_result).__name__}")
+    async def visualization_stage(results):
+        return await render_visual_plots(workspace, formats)
+    
+    stages = [
+        Stage("data_manager", data_manager_stage),
+        Stage("visualization", visualization_stage),
+        Stage("projections", projection_stage),
+        Stage("budget", budget_stage, depends_on=("data_manager", "projections")),
+        Stage("risk", risk_stage, depends_on=("projections",), executor="thread"),
+        Stage("tax_policy", tax_policy_stage, depends_on=("data_manager", "projections")),
+        Stage("report", report_stage, depends_on=("visualization", "budget", "tax_policy")),
+        Stage("export", export_stage, depends_on=("visualization", "budget", "tax_policy", "risk")),
+    ]
+    stage_steps = {
+        "data_manager": "data_validation",
+        "budget": "budget_analysis",
+        "tax_policy": "tax_policy",
+        "report": "report_compilation"
+    }
+    
+    try:
+        results, timings = await run_stages(stages, on_event=step_reporter(on_event, stage_steps))
+    except StageFailed as e:
+        return {"status": "failed", "reason": str(e)}
+    
+    # Return the final result with status information
+    return {
+        "status": "success",
+        "report_path": results["report"],
+        "outputs": workflow_outputs(formats, results["report"], results["export"]),
+        "report_data": report_summary(results["budget"]["projections"], results["budget"]["risk_ranking"],
+                                      results["tax_policy"], risk_assessment=results["risk"]),
+        "workflow_summary": {
+            "data_validation": results["data_manager"],
+            "budget_projections": "completed",
+            "risk_level": results["budget"]["risk_ranking"],
+            "tax_slabs_count": len(results["tax_policy"])
+        },
+        "stage_timings": timings
+    }
+
+async def run_pipeline_workflow(workspace: JobWorkspace = None, llm_insights: bool = False, on_event=None,
+                                validated: bool = False, formats=None):
+    """
+    Runs the same steps as run_workflow by calling the skills directly, without any agent
+    round-trips. The LLM is only used, if llm_insights is set, to write the narrative
+    insights for the report. Returns the same result shape and events as run_workflow.
+    If validated is set, the input was already checked against the input schema and is not validated again.
+    formats lists the report outputs to produce, as for run_workflow.
+    """
+    workspace = workspace or default_workspace()
+    formats = parse_report_formats(formats) if formats is not None else default_report_formats()
+    log("Starting Ministry of Finance workflow (pipeline mode)...")
     
-    # Extract tax slabs from tax agent result
-    if not isinstance(tax_result, dict):
-        print(f"Error: Tax Policy Agent returned {type(tax_result).__name__} instead of dictionary")
-        return {"status": "failed", "reason": f"Tax Policy Agent returned invalid data type: {type(tax_result).__name__}"}
+    # Step 1: Validate data (visualizations are rendered alongside the projections)
+    def validation_stage(results):
+        if validated:
+            log("Step 1: Input data was validated on upload.")
+            return {"data_valid": True}
+        log("Step 1: Running data validation and visualization...")
+        if not validate_data(file_path=workspace.input_path):
+            log("Error: Input data failed validation. Stopping workflow.", level="error")
+            raise StageFailed("Data validation failed")
+        return {"data_valid": True}
     
-    print(f"Tax result keys: {list(tax_result.keys())}")
+    # Step 2: Generate projections and risk analysis
+    async def projection_stage(results):
+        log("Step 2: Running budget projection and risk analysis...")
+        projection = await get_projection_artifact(workspace.input_path)
+        projections = projection.projections
+        if not projections:
+            raise StageFailed("Budget data missing 'projections'")
+        return projections
     
-    if "recommended_slabs" not in tax_result:
-        print("Error: Tax Policy Agent did not return 'recommended_slabs' key")
-        return {"status": "failed", "reason": "Tax data missing 'recommended_slabs'"}
+    def risk_stage(results):
+        return risk_assessment(projections=results["projections"])
     
-    tax_slabs = tax_result["recommended_slabs"]
+    # Step 3: Create tax slabs
+    def tax_slab_stage(results):
+        log("Step 3: Running tax slab generation...")
+        return create_tax_slabs(projections=results["projections"])
     
-    # Step 4: Run Report Agent to compile final report
-    print("Step 4: Running Report Agent...")
-    report_result = await run_report_agent(
-        projections=projections,
-        risk_level=risk_level,
-        tax_slabs=tax_slabs,
-        visual_plots_dir="visual plots"
-    )
-    print(f"Report Agent completed. Result: {report_result}")
-    
-    # Handle the report result, which might be a string or dictionary
-    report_path = None
-    if isinstance(report_result, dict) and "report_path" in report_result:
-        report_path = report_result["report_path"]
-    elif isinstance(report_result, str):
-        # If the result is a string, it might be the path directly
-        report_path = report_result
-        # Check if it's a JSON string
+    async def insights_stage(results):
+        if not llm_insights:
+            return None
         try:
-            parsed = json.loads(report_result)
-            if isinstance(parsed, dict) and "report_path" in parsed:
-                report_path = parsed["report_path"]
-        except:
-            # Not a JSON string, use as is
-            pass
+            return await generate_insights(results["projections"], results["risk"]["risk_level"], results["tax_slabs"])
+        except Exception as e:
+            # The report falls back to its default insights
+            log(f"Warning: Could not generate insights, using defaults: {str(e)}", level="warning")
+            return None
+    
+    # Step 4: Compile the final report
+    async def report_stage(results):
+        if "pdf" not in formats:
+            log("Step 4: No PDF report requested, skipping report compilation.")
+            return None
+        log("Step 4: Running report compilation...")
+        await get_skill_executor().run(
+            compile_report,
+            projections=results["projections"],
+            risk_level=results["risk"]["risk_level"],
+            tax_slabs=results["tax_slabs"],
+            plots=results["visualization"],
+            output_pdf=workspace.report_path,
+            insights=results["insights"]
+        )
+        return workspace.report_path
+    
+    async def export_stage(results):
+        return await export_report_data(
+            workspace, formats,
+            projections=results["projections"],
+            risk_level=results["risk"]["risk_level"],
+            tax_slabs=results["tax_slabs"],
+            plots=results["visualization"],
+            insights=results["insights"],
+            risk_assessment=results["risk"]
+        )
+    
+    async def visualization_stage(results):
+        return await render_visual_plots(workspace, formats)
+    
+    stages = [
+        Stage("validation", validation_stage, executor="thread"),
+        Stage("visualization", visualization_stage, depends_on=("validation",)),
+        Stage("projections", projection_stage, depends_on=("validation",)),
+        # Risk and tax slabs only read the projections, so they compute side by side in threads
+        Stage("risk", risk_stage, depends_on=("projections",), executor="thread"),
+        Stage("tax_slabs", tax_slab_stage, depends_on=("projections",), executor="thread"),
+        Stage("insights", insights_stage, depends_on=("risk", "tax_slabs")),
+        Stage("report", report_stage, depends_on=("visualization", "risk", "tax_slabs", "insights")),
+        Stage("export", export_stage, depends_on=("visualization", "risk", "tax_slabs", "insights")),
+    ]
+    stage_steps = {
+        "validation": "data_validation",
+        "projections": "budget_analysis",
+        "tax_slabs": "tax_policy",
+        "report": "report_compilation"
+    }
+    
+    try:
+        results, timings = await run_stages(stages, on_event=step_reporter(on_event, stage_steps))
+    except StageFailed as e:
+        return {"status": "failed", "reason": str(e)}
     
-    # Return the final result with status information
     return {
         "status": "success",
-        "report_path": report_path,
+        "report_path": results["report"],
+        "outputs": workflow_outputs(formats, results["report"], results["export"]),
+        "report_data": report_summary(results["projections"], results["risk"]["risk_level"], results["tax_slabs"],
+                                      results["insights"], results["risk"]),
         "workflow_summary": {
-            "data_validation": data_manager_result,
+            "data_validation": results["validation"],
             "budget_projections": "completed",
-            "risk_level": risk_level,
-            "tax_slabs_count": len(tax_slabs)
-        }
+            "risk_level": results["risk"]["risk_level"],
+            "tax_slabs_count": len(results["tax_slabs"])
+        },
+        "stage_timings": timings
     }
 
+def resolve_workflow_options(mode: str = None, llm_insights: bool = None, formats=None) -> tuple:
+    """
+    Fills in the defaults of run's options: the WORKFLOW_MODE, PIPELINE_LLM_INSIGHTS
+    and REPORT_FORMATS environment variables.
+    """
+    mode = mode or os.getenv("WORKFLOW_MODE", "agents")
+    if llm_insights is None:
+        llm_insights = os.getenv("PIPELINE_LLM_INSIGHTS", "false").lower() in ("1", "true", "yes")
+    formats = parse_report_formats(formats) if formats is not None else default_report_formats()
+    return mode, llm_insights, formats
+
+def workflow_config(mode: str, llm_insights: bool, formats: tuple) -> dict:
+    """
+    Everything besides the input that determines a workflow's outputs, for the result cache key.
+    """
+    template = os.path.abspath(os.getenv("REPORT_TEMPLATE", DEFAULT_TEMPLATE))
+    return {
+        "mode": mode,
+        "llm_insights": llm_insights,
+        "formats": sorted(formats),
+        # The model only matters when it writes part of the results
+        "model": get_text_model_name() if mode == "agents" or llm_insights else None,
+        "plot_format": default_plot_format(),
+        "table_top_n": default_table_top_n(),
+        "template": [template, os.stat(template).st_mtime_ns if os.path.exists(template) else None]
+    }
+
+def projection_base_year(data: dict):
+    """
+    The base year the projection will use for data. Inputs without a base year setting
+    or dated series are projected from last calendar year, so the result depends on the
+    date too. None for documents too malformed to tell; validation rejects those.
+    """
+    settings = data.get("projection") if isinstance(data, dict) else None
+    try:
+        return base_year(data, settings if isinstance(settings, dict) else {})
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def lookup_workflow_result(data: dict, workspace: JobWorkspace, mode: str = None, llm_insights: bool = None,
+                           formats=None) -> tuple:
+    """
+    Looks up the result of an earlier run on the same input document with the same
+    configuration. On a hit the cached outputs are restored into workspace.
+    Returns (cache key, cached result or None); the key is None when the result cache is disabled.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return None, None
+    config = workflow_config(*resolve_workflow_options(mode, llm_insights, formats))
+    config["base_year"] = projection_base_year(data)
+    key = result_key(data, config)
+    result = cache.get(key, workspace)
+    if result is not None:
+        log(f"Reusing the workflow results of an identical earlier input ({key[:12]})")
+    return key, result
+
+def load_input(file_path: str) -> dict:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 # Main function to run the orchestrator
-async def run():
+async def run(workspace: JobWorkspace = None, mode: str = None, llm_insights: bool = None, on_event=None,
+              validated: bool = False, formats=None, cache_key: str = None):
+    """
+    Runs the workflow in the given mode. mode and llm_insights default to the
+    WORKFLOW_MODE ("agents" or "pipeline") and PIPELINE_LLM_INSIGHTS environment variables.
+    on_event receives the workflow's progress events (see events.py).
+    validated tells the workflow that the input has already passed schema validation.
+    formats lists the report outputs to produce ("pdf", "json", "parquet", "html"; default REPORT_FORMATS).
+    
+    Successful results are kept in the result cache (see result_cache.py) and an input
+    seen before with the same configuration is answered from it without running the
+    workflow. cache_key is passed by callers that already looked the input up with
+    lookup_workflow_result and missed.
+    """
     try:
         logfire.configure(send_to_logfire='if-token-present')
-        result = await run_workflow()
-        print(f"Workflow complete: {json.dumps(result, indent=2)}")
+        mode, llm_insights, formats = resolve_workflow_options(mode, llm_insights, formats)
+        if mode not in WORKFLOW_MODES:
+            raise ValueError(f"Unknown workflow mode '{mode}'. Expected one of: {', '.join(WORKFLOW_MODES)}")
+        
+        workspace = workspace or default_workspace()
+        if cache_key is None and get_result_cache() is not None:
+            data = await asyncio.to_thread(load_input, workspace.input_path)
+            cache_key, cached = await asyncio.to_thread(lookup_workflow_result, data, workspace, mode,
+                                                        llm_insights, formats)
+            if cached is not None:
+                return cached
+        
+        if mode == "pipeline":
+            result = await run_pipeline_workflow(workspace, llm_insights=llm_insights, on_event=on_event,
+                                                 validated=validated, formats=formats)
+        else:
+            result = await run_workflow(workspace, on_event=on_event, validated=validated, formats=formats)
+        log(f"Workflow complete: {json.dumps(result, indent=2, default=str)}")
+        
+        if cache_key is not None and result["status"] == "success":
+            try:
+                await asyncio.to_thread(get_result_cache().put, cache_key, result)
+            except Exception as e:
+                log(f"Warning: Could not cache the workflow result: {str(e)}", level="warning")
         return result
     except Exception as e:
-        print(f"Error in workflow: {str(e)}")
+        log(f"Error in workflow: {str(e)}", level="error")
         return {"status": "error", "message": str(e)}
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+import os
+
+from disk_cache import DiskCache, cache_key, shared_cache
+
+# Default location and size limit of the rendered plot cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "plots")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Hash of the JSON-serializable parts that determine a plot
+plot_key = cache_key
+
+class PlotCache(DiskCache):
+    """
+    Content-addressed store of rendered charts on disk (see DiskCache).
+    
+    Entries are named by a hash of everything that determines the image (chart, data
+    series, format and rendering parameters), so any job that plots the same data reuses
+    the image instead of rendering it again. The least recently used images are evicted
+    when the cache grows beyond max_bytes.
+    """
+    
+    name = "plot"
+    
+    def get(self, key: str, suffix: str = ".png") -> bytes:
+        """
+        Returns the cached image, or None if it is not in the cache.
+        """
+        return self.read(key + suffix)
+    
+    def put(self, key: str, data: bytes, suffix: str = ".png") -> None:
+        """
+        Stores an image. Evicts old entries if the cache is full.
+        """
+        self.write(key + suffix, data)
+
+def get_plot_cache() -> PlotCache:
+    """
+    The process-wide plot cache, configured from the environment: PLOT_CACHE_DIR and
+    PLOT_CACHE_MAX_BYTES (default 256 MB). Returns None if PLOT_CACHE_MAX_BYTES is 0,
+    which disables caching.
+    """
+    return shared_cache(PlotCache, "PLOT_CACHE", DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES)
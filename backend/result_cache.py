@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+
+from disk_cache import DiskCache, cache_key, shared_cache
+
+# Part of every result cache key; bump it whenever a change to the workflow changes its
+# results for the same input and configuration
+WORKFLOW_CACHE_VERSION = 2
+
+# Default location and size limit of the workflow result cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "results")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+RESULT_FILENAME = "result.json"
+
+def result_key(data, config: dict) -> str:
+    """
+    Hash of an input document and the workflow configuration it is processed with.
+    The document is serialized canonically, so re-uploads that differ only in
+    whitespace or key order share their results.
+    """
+    return cache_key(WORKFLOW_CACHE_VERSION, data, config)
+
+class ResultCache(DiskCache):
+    """
+    Completed workflow results on disk, keyed by result_key (see DiskCache).
+    
+    Every entry is a directory holding the workflow result (summary and report data) as
+    result.json next to the report outputs (PDF, JSON, ...). The least recently used
+    entries are evicted when the cache grows beyond max_bytes.
+    """
+    
+    name = "workflow result"
+    
+    def get(self, key: str, workspace) -> dict:
+        """
+        Restores a cached result into the workspace: copies of its outputs are placed at
+        the workspace's output paths, so later runs in the same workspace never write
+        into the cache. Returns the workflow result with "cached" set, or None if the key
+        is not in the cache.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        outputs = {}
+        try:
+            with open(os.path.join(entry, RESULT_FILENAME), "r", encoding="utf-8") as f:
+                result = json.load(f)
+            for fmt, filename in result["outputs"].items():
+                outputs[fmt] = workspace.output_path(fmt)
+                shutil.copyfile(os.path.join(entry, filename), outputs[fmt])
+        except FileNotFoundError:
+            # Evicted by another process in the meantime; the workflow overwrites the copies
+            return None
+        
+        result["outputs"] = outputs
+        result["report_path"] = outputs.get("pdf")
+        result["cached"] = True
+        return result
+    
+    def put(self, key: str, result: dict) -> None:
+        """
+        Stores a successful workflow result together with copies of its output files.
+        Evicts old entries if the cache is full.
+        """
+        def fill(directory: str) -> None:
+            outputs = {}
+            for fmt, path in result["outputs"].items():
+                outputs[fmt] = f"report.{fmt}"
+                shutil.copyfile(path, os.path.join(directory, outputs[fmt]))
+            stored = {
+                "status": result["status"],
+                "workflow_summary": result.get("workflow_summary", {}),
+                "report_data": result.get("report_data", {}),
+                "outputs": outputs
+            }
+            with open(os.path.join(directory, RESULT_FILENAME), "w", encoding="utf-8") as f:
+                json.dump(stored, f, default=str)
+        
+        self.write_dir(key, fill)
+
+def get_result_cache() -> ResultCache:
+    """
+    The process-wide workflow result cache, configured from the environment:
+    RESULT_CACHE_DIR and RESULT_CACHE_MAX_BYTES (default 1 GB). Returns None if
+    RESULT_CACHE_MAX_BYTES is 0, which disables caching.
+    """
+    return shared_cache(ResultCache, "RESULT_CACHE", DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES)
@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import functools
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from events import emit_event
+
+# Stage executors: run inline on the event loop or in a thread. Stages that need the
+# skill executor's worker processes call get_skill_executor().run with their arguments.
+EXECUTORS = (None, "thread")
+
+class StageFailed(Exception):
+    """
+    Raised by a stage to stop the workflow. The message is reported as the failure reason.
+    """
+
+@dataclass
+class Stage:
+    """
+    One node of the workflow graph.
+    
+    func is called with the results of the completed stages (a dict keyed by stage name).
+    Coroutine functions are awaited; plain functions run inline on the event loop, or in
+    a thread if executor is "thread", which suits CPU-bound stages (NumPy releases the
+    GIL, so they run alongside the other stages without stalling the loop).
+    """
+    name: str
+    func: Callable
+    depends_on: Tuple[str, ...] = ()
+    executor: str = None
+
+def _check_graph(stages: List[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError("Stage names must be unique")
+    
+    for stage in stages:
+        if stage.executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{stage.executor}' for stage '{stage.name}'")
+        for dependency in stage.depends_on:
+            if dependency not in names:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+    
+    # Kahn's algorithm: every stage must become ready at some point
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle between: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+async def _run_stage(stage: Stage, results: Dict[str, Any]):
+    loop = asyncio.get_running_loop()
+    if asyncio.iscoroutinefunction(stage.func):
+        return await stage.func(results)
+    if stage.executor == "thread":
+        # Carry the caller's context (e.g. the job log) over to the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, functools.partial(context.run, stage.func, results))
+    return stage.func(results)
+
+async def run_stages(stages: List[Stage], on_event: Callable = None) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """
+    Runs the stages as a dependency graph: every stage starts as soon as all the stages
+    it depends on have finished, so independent stages run concurrently.
+    
+    Returns (results, timings) where timings maps each finished stage to its start offset
+    and duration in seconds. If a stage raises, the stages still running are cancelled
+    and the exception is propagated.
+    
+    on_event, if given, receives "stage" events when a stage starts, finishes or fails,
+    and a "progress" event after every finished stage.
+    """
+    _check_graph(stages)
+    
+    results = {}
+    timings = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+    started_at = time.perf_counter()
+    
+    async def timed(stage: Stage):
+        start = time.perf_counter()
+        emit_event(on_event, "stage", stage=stage.name, state="started")
+        state = "failed"
+        try:
+            result = await _run_stage(stage, results)
+            state = "finished"
+            return result
+        finally:
+            timings[stage.name] = {
+                "start": round(start - started_at, 4),
+                "duration": round(time.perf_counter() - start, 4)
+            }
+            emit_event(on_event, "stage", stage=stage.name, state=state, duration=timings[stage.name]["duration"])
+    
+    try:
+        while pending or running:
+            # Launch every stage whose dependencies are satisfied
+            for name, stage in list(pending.items()):
+                if all(dependency in results for dependency in stage.depends_on):
+                    running[asyncio.ensure_future(timed(stage))] = name
+                    del pending[name]
+            
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                results[name] = task.result()
+                emit_event(on_event, "progress", completed=len(results), total=len(stages))
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    
+    return results, timings
@@ -1,104 +1,278 @@
+import datetime
 import json
 import os
+from collections import defaultdict
+from collections.abc import Sequence
 import numpy as np
+from job_log import log, verbose
+from skills.growth_models import GROWTH_MODELS, TREND_MODELS, fixed_growth
 
-def project_budget(file_path: str) -> dict:
+# Growth rates used for items that do not set their own "growth_rate"
+DEFAULT_GROWTH_RATES = {"revenue": 0.05, "expenditure": 0.03}
+
+# Number of years projected when the input has no "projection" settings
+DEFAULT_HORIZON = 1
+
+# Longest horizon accepted: the outlook holds an amount per item and projected year
+MAX_HORIZON = 50
+
+class ProjectedItems(Sequence):
     """
-    Loads the JSON file at file_path and performs projections:
-      - For 'revenue': Each category is projected with a fixed 5% growth rate.
-      - For 'expenditure': Each category is projected with a fixed 3% growth rate.
-      - For 'inflation': A linear regression is applied to the year-rate series to predict next year's inflation rate.
-      - For 'gdp_growth': A linear regression is applied to the year-rate series to predict next year's GDP growth rate.
+    Columnar projection of a list of revenue or expenditure items.
     
-    Prints details about the projection process and returns a dictionary with projected values.
+    Names and amounts are held as NumPy arrays and the projections for every item and
+    every year of the horizon are computed as one (items x years) matrix, outlook.
+    projected is its first column, the next year. The object behaves like the list of
+    dicts it replaces: indexing or iterating yields the original item with
+    "projected_amount" (and, for horizons over one year, "projected_amounts" by year)
+    added, but those dicts are only built when asked for. Use total(), totals() and the
+    arrays directly instead of iterating over large ledgers.
     """
-    if not os.path.isfile(file_path):
-        print(f"Error: File not found: {file_path}")
-        return {}
     
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in file: {file_path}")
-        return {}
+    def __init__(self, records: list, names: np.ndarray, amounts: np.ndarray, outlook: np.ndarray, years: list):
+        self.records = records
+        self.names = names
+        self.amounts = amounts
+        self.outlook = outlook
+        self.years = years
+    
+    @classmethod
+    def from_records(cls, records: list, growth_rate: float, horizon: int = DEFAULT_HORIZON,
+                     years: list = None, default_model: str = "linear") -> "ProjectedItems":
+        """
+        Projects records over horizon years. Items are projected at their own "growth_rate"
+        (growth_rate if not set) unless they carry a "history" of earlier amounts, oldest
+        first; those are fitted with their "model" (default_model if not set) instead.
+        Items sharing a model and history length are fitted together as one matrix.
+        """
+        count = len(records)
+        names = np.array([item.get("name", "Unknown") for item in records], dtype=object)
+        amounts = np.fromiter((item.get("amount", 0) for item in records), dtype=np.float64, count=count)
+        rates = np.fromiter((item.get("growth_rate", growth_rate) for item in records), dtype=np.float64, count=count)
+        outlook = fixed_growth(amounts, rates, horizon)
+        
+        # Group the items with a history by (model, series length) so each group is one fit
+        groups = defaultdict(list)
+        for index, item in enumerate(records):
+            history = item.get("history")
+            if not history:
+                continue
+            model = item.get("model", default_model)
+            if model == "fixed":
+                continue
+            if model not in TREND_MODELS:
+                log(f"Warning: Unknown growth model '{model}' for '{names[index]}', using its growth rate instead.", level="warning")
+                continue
+            groups[(model, len(history) + 1)].append(index)
+        
+        for (model, length), indices in groups.items():
+            indices = np.array(indices)
+            series = np.array([records[index]["history"] + [records[index].get("amount", 0)] for index in indices],
+                              dtype=np.float64)
+            outlook[indices] = TREND_MODELS[model](series, horizon)
+        
+        if years is None:
+            years = list(range(1, horizon + 1))
+        return cls(records, names, amounts, outlook, years)
+    
+    @property
+    def projected(self) -> np.ndarray:
+        return self.outlook[:, 0]
+    
+    @property
+    def horizon(self) -> int:
+        return self.outlook.shape[1]
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self._item(index)
     
-    projections = {}
+    def _item(self, index: int) -> dict:
+        item = {**self.records[index], "projected_amount": float(self.outlook[index, 0])}
+        if self.horizon > 1:
+            item["projected_amounts"] = {str(year): float(amount) for year, amount in zip(self.years, self.outlook[index])}
+        return item
+    
+    def total(self) -> float:
+        return float(self.projected.sum())
+    
+    def totals(self) -> list:
+        """
+        Total projected amount for each year of the horizon.
+        """
+        return self.outlook.sum(axis=0).tolist()
+    
+    def __repr__(self) -> str:
+        return f"ProjectedItems({len(self)} items, {self.horizon} years, total={self.total():.2f})"
+    
+    def to_list(self) -> list:
+        """
+        Materializes every item as a dict, e.g. for JSON serialization.
+        """
+        return [self._item(index) for index in range(len(self))]
+    
+    def freeze(self) -> "ProjectedItems":
+        """
+        Makes the arrays read-only and the records a tuple, so the projection can be
+        shared between jobs without one of them changing it for the others.
+        """
+        for array in (self.names, self.amounts, self.outlook):
+            array.flags.writeable = False
+        self.records = tuple(self.records)
+        return self
 
-    # 1. Project revenue: Use a fixed growth rate of 5%
-    revenue_data = data.get("revenue", [])
-    projected_revenue = []
-    revenue_growth_rate = 0.05
-    for item in revenue_data:
-        projected_item = item.copy()
-        current_amount = item.get("amount", 0)
-        projected_item["projected_amount"] = current_amount * (1 + revenue_growth_rate)
-        projected_revenue.append(projected_item)
-        print(f"Revenue '{item.get('name', 'Unknown')}' projected from {current_amount} to {projected_item['projected_amount']:.2f}.")
-    projections["projected_revenue"] = projected_revenue
+def projected_total(items) -> float:
+    """
+    Sum of "projected_amount" over items, which may be a ProjectedItems or a plain list of dicts
+    (e.g. projections that came back from an agent as JSON).
+    """
+    if isinstance(items, ProjectedItems):
+        return items.total()
+    return sum(item.get("projected_amount", 0) for item in items)
 
-    # 2. Project expenditure: Use a fixed growth rate of 3%
-    expenditure_data = data.get("expenditure", [])
-    projected_expenditure = []
-    expenditure_growth_rate = 0.03
-    for item in expenditure_data:
-        projected_item = item.copy()
-        current_amount = item.get("amount", 0)
-        projected_item["projected_amount"] = current_amount * (1 + expenditure_growth_rate)
-        projected_expenditure.append(projected_item)
-        print(f"Expenditure '{item.get('name', 'Unknown')}' projected from {current_amount} to {projected_item['projected_amount']:.2f}.")
-    projections["projected_expenditure"] = projected_expenditure
+def projected_totals(items, years: list) -> list:
+    """
+    Total projected amount of items for each of years, like projected_total.
+    """
+    if isinstance(items, ProjectedItems):
+        return items.totals()
+    return [sum(item.get("projected_amounts", {}).get(str(year), 0) for item in items) for year in years]
 
-    # 3. Project inflation using linear regression to predict next year's rate
-    inflation_data = data.get("inflation", [])
-    if inflation_data and len(inflation_data) >= 2:
-        years, rates = [], []
-        for item in inflation_data:
-            try:
-                years.append(int(item.get("year")))
-                rates.append(float(item.get("rate")))
-            except (ValueError, TypeError):
-                continue
-        if len(years) >= 2:
-            m, c = np.polyfit(years, rates, 1)  # Linear regression: rate = m * year + c
-            next_year = max(years) + 1
-            projected_inflation_rate = m * next_year + c
-            projections["projected_inflation"] = {"year": str(next_year), "rate": round(projected_inflation_rate, 2)}
-            print(f"Inflation projected for year {next_year} is {projected_inflation_rate:.2f} using linear regression.")
-        else:
-            avg_rate = np.mean(rates) if rates else 0
-            next_year = max(years) + 1 if years else "Unknown"
-            projections["projected_inflation"] = {"year": str(next_year), "rate": round(avg_rate, 2)}
-            print(f"Not enough data for regression. Using average inflation rate {avg_rate:.2f} for year {next_year}.")
+def log_projected_items(label: str, items: ProjectedItems) -> None:
+    # Per-item detail is only formatted when the job log is verbose
+    if not verbose():
+        return
+    for name, amount, outlook in zip(items.names, items.amounts, items.outlook):
+        log(f"{label} '{name}' projected from {amount:.2f} to {outlook[0]:.2f} ({items.years[0]}), {outlook[-1]:.2f} ({items.years[-1]}).", level="debug")
+
+def project_indicator(label: str, series: list, horizon: int) -> dict:
+    """
+    Applies a linear regression to a year-rate series and predicts the rate for each of the
+    next horizon years. Returns {"year", "rate"} for the next year, plus an "outlook" list
+    of {"year", "rate"} covering the whole horizon when it is longer than one year.
+    """
+    if not series or len(series) < 2:
+        log(f"Insufficient {label} data for projection.")
+        return {}
+    
+    years, rates = [], []
+    for item in series:
+        try:
+            years.append(int(item.get("year")))
+            rates.append(float(item.get("rate")))
+        except (ValueError, TypeError):
+            continue
+    
+    if len(years) >= 2:
+        m, c = np.polyfit(years, rates, 1)  # Linear regression: rate = m * year + c
+        future_years = np.arange(max(years) + 1, max(years) + 1 + horizon)
+        future_rates = m * future_years + c
+        log(f"{label[0].upper() + label[1:]} projected for year {future_years[0]} is {future_rates[0]:.2f} using linear regression.")
     else:
-        print("Insufficient inflation data for projection.")
-        projections["projected_inflation"] = {}
+        avg_rate = np.mean(rates) if rates else 0
+        if not years:
+            log(f"Not enough data for regression. Using average {label} rate {avg_rate:.2f} for year Unknown.")
+            return {"year": "Unknown", "rate": round(avg_rate, 2)}
+        future_years = np.arange(max(years) + 1, max(years) + 1 + horizon)
+        future_rates = np.full(horizon, avg_rate)
+        log(f"Not enough data for regression. Using average {label} rate {avg_rate:.2f} for year {future_years[0]}.")
+    
+    projection = {"year": str(future_years[0]), "rate": round(float(future_rates[0]), 2)}
+    if horizon > 1:
+        projection["outlook"] = [{"year": str(year), "rate": round(float(rate), 2)} for year, rate in zip(future_years, future_rates)]
+    return projection
 
-    # 4. Project GDP Growth using linear regression to predict next year's rate
-    gdp_growth_data = data.get("gdp_growth", [])
-    if gdp_growth_data and len(gdp_growth_data) >= 2:
-        years, rates = [], []
-        for item in gdp_growth_data:
+def default_base_year() -> int:
+    """
+    The base year of inputs without a "base_year" setting or dated series: last calendar year.
+    """
+    return datetime.date.today().year - 1
+
+def base_year(data: dict, settings: dict) -> int:
+    """
+    The last year with actual figures: the "base_year" setting, otherwise the latest
+    year of the inflation and GDP growth series, otherwise last calendar year.
+    """
+    if "base_year" in settings:
+        return int(settings["base_year"])
+    years = []
+    for key in ("inflation", "gdp_growth"):
+        for item in data.get(key, []):
             try:
                 years.append(int(item.get("year")))
-                rates.append(float(item.get("rate")))
             except (ValueError, TypeError):
                 continue
-        if len(years) >= 2:
-            m, c = np.polyfit(years, rates, 1)
-            next_year = max(years) + 1
-            projected_gdp_growth_rate = m * next_year + c
-            projections["projected_gdp_growth"] = {"year": str(next_year), "rate": round(projected_gdp_growth_rate, 2)}
-            print(f"GDP Growth projected for year {next_year} is {projected_gdp_growth_rate:.2f} using linear regression.")
-        else:
-            avg_rate = np.mean(rates) if rates else 0
-            next_year = max(years) + 1 if years else "Unknown"
-            projections["projected_gdp_growth"] = {"year": str(next_year), "rate": round(avg_rate, 2)}
-            print(f"Not enough data for regression. Using average GDP growth rate {avg_rate:.2f} for year {next_year}.")
-    else:
-        print("Insufficient GDP growth data for projection.")
-        projections["projected_gdp_growth"] = {}
+    return max(years) if years else default_base_year()
+
+def project_budget(file_path: str, horizon: int = None) -> dict:
+    """
+    Loads the JSON file at file_path and projects it horizon years ahead (default: the
+    "horizon" of the file's optional "projection" settings, otherwise one year):
+      - For 'revenue': Each category grows at its own "growth_rate", 5% by default.
+      - For 'expenditure': Each category grows at its own "growth_rate", 3% by default.
+        Categories with a "history" of earlier amounts are fitted with their "model"
+        (linear, log_linear or exp_smoothing; the settings' "model" by default) instead.
+        Both are returned as ProjectedItems, computed for all categories and years at once.
+      - For 'inflation': A linear regression is applied to the year-rate series to predict the coming years' inflation rates.
+      - For 'gdp_growth': A linear regression is applied to the year-rate series to predict the coming years' GDP growth rates.
+    
+    "projected_amount" and the indicators' "rate" always refer to the first projected year;
+    "horizon_years" lists every projected year.
+    
+    Logs details about the projection process and returns a dictionary with projected values.
+    """
+    if not os.path.isfile(file_path):
+        log(f"Error: File not found: {file_path}", level="error")
+        return {}
+    
+    try:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        log(f"Error: Invalid JSON in file: {file_path}", level="error")
+        return {}
+    
+    settings = data.get("projection", {})
+    horizon = int(horizon or settings.get("horizon", DEFAULT_HORIZON))
+    if not 1 <= horizon <= MAX_HORIZON:
+        log(f"Error: Projection horizon must be from 1 to {MAX_HORIZON} years, got {horizon}", level="error")
+        return {}
+    default_model = settings.get("model", "linear")
+    if default_model not in GROWTH_MODELS:
+        log(f"Error: Unknown growth model '{default_model}'. Expected one of: {', '.join(GROWTH_MODELS)}", level="error")
+        return {}
+    
+    first_year = base_year(data, settings) + 1
+    years = list(range(first_year, first_year + horizon))
+    projections = {"horizon_years": [str(year) for year in years]}
+    
+    # 1. Project revenue
+    projected_revenue = ProjectedItems.from_records(
+        data.get("revenue", []), DEFAULT_GROWTH_RATES["revenue"], horizon, years, default_model
+    )
+    log_projected_items("Revenue", projected_revenue)
+    projections["projected_revenue"] = projected_revenue
+    
+    # 2. Project expenditure
+    projected_expenditure = ProjectedItems.from_records(
+        data.get("expenditure", []), DEFAULT_GROWTH_RATES["expenditure"], horizon, years, default_model
+    )
+    log_projected_items("Expenditure", projected_expenditure)
+    projections["projected_expenditure"] = projected_expenditure
+    
+    # 3. Project inflation using linear regression
+    projections["projected_inflation"] = project_indicator("inflation", data.get("inflation", []), horizon)
+    
+    # 4. Project GDP Growth using linear regression
+    projections["projected_gdp_growth"] = project_indicator("GDP growth", data.get("gdp_growth", []), horizon)
     
-    print("Budget projection completed.")
-    print(projections)
-    return projections
\ No newline at end of file
+    log("Budget projection completed.")
+    if verbose():
+        log(str(projections), level="debug")
+    return projections
@@ -1,60 +1,253 @@
+import io
 import json
 import os
+from dataclasses import dataclass, field
+from job_log import log
+from skills.budget_projection_tool import MAX_HORIZON
+from skills.growth_models import GROWTH_MODELS
 
-def validate_data(file_path: str) -> bool:
+try:
+    import ijson
+except ImportError:  # Optional: without ijson large files are parsed with json.load as well
+    ijson = None
+
+# Errors collected per file; further errors are counted but not kept
+MAX_ERRORS = 100
+
+# Files from this size on are streamed with ijson, so their raw text is never held in
+# memory next to the parsed document. Smaller files are read with json.load, which is faster.
+DEFAULT_STREAM_MIN_BYTES = 256 * 1024 * 1024
+
+# Declarative description of the input file, compiled once at import (see compile_item_check).
+# Each section maps field names to a kind; names ending in "?" are optional. Kinds are
+# "any", "string", "number", "integer", "numbers" (a list of numbers) or a tuple of the
+# allowed string values.
+BUDGET_ITEM_FIELDS = {
+    "name": "any",
+    "amount": "number",
+    "growth_rate?": "number",
+    "history?": "numbers",
+    "model?": GROWTH_MODELS
+}
+INPUT_SCHEMA = {
+    "revenue": BUDGET_ITEM_FIELDS,
+    "expenditure": BUDGET_ITEM_FIELDS,
+    "inflation": {"year": "string", "rate": "number"},
+    "gdp_growth": {"year": "string", "rate": "number"}
+}
+# Optional "projection" settings object (see budget_projection_tool.project_budget)
+PROJECTION_SCHEMA = {"horizon?": range(1, MAX_HORIZON + 1), "model?": GROWTH_MODELS, "base_year?": "integer"}
+
+KIND_TYPES = {"any": None, "string": (str,), "number": (int, float), "integer": (int,), "numbers": (list,)}
+KIND_MESSAGES = {
+    "string": "must be a string",
+    "number": "must be numeric",
+    "integer": "must be an integer",
+    "numbers": "must be a list of numbers"
+}
+
+@dataclass
+class ValidationReport:
     """
-    Validates the structure of the financial data JSON file.
-    Returns True if valid, False otherwise.
+    Outcome of validating an input file. errors holds up to max_errors dicts with the
+    JSON "path" of the problem (e.g. "$.revenue[3].amount") and a "message";
+    error_count counts all of them. data is the parsed document, or None if the file
+    could not be read as JSON, so callers do not need to read the file again.
     """
-    # 1. Check if file exists
-    if not os.path.isfile(file_path):
-        print(f"Error: File not found: {file_path}")
-        return False
+    data: dict = None
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+    max_errors: int = MAX_ERRORS
+    
+    @property
+    def valid(self) -> bool:
+        return self.data is not None and self.error_count == 0
+    
+    @property
+    def truncated(self) -> bool:
+        return self.error_count > len(self.errors)
+    
+    def add_error(self, path: str, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"path": path, "message": message})
+
+def _compile_rule(key: str, kind) -> tuple:
+    # The last element tells whether to reject booleans, which are ints to isinstance
+    name = key.rstrip("?")
+    if isinstance(kind, tuple):
+        return (name, not key.endswith("?"), (str,), frozenset(kind), None, f"must be one of: {', '.join(kind)}", False)
+    if isinstance(kind, range):
+        return (name, not key.endswith("?"), (int,), kind, None, f"must be an integer from {kind.start} to {kind.stop - 1}", True)
+    elements = (int, float) if kind == "numbers" else None
+    return (name, not key.endswith("?"), KIND_TYPES[kind], None, elements, KIND_MESSAGES.get(kind), kind == "integer")
+
+def compile_item_check(fields: dict):
+    """
+    Turns a section's field description into a check(report, section, index, item)
+    function. The rules are resolved into a tuple once, so checking an item only runs
+    the isinstance tests; paths and messages are formatted only for errors.
+    """
+    rules = tuple(_compile_rule(key, kind) for key, kind in fields.items())
+    
+    def check(report: "ValidationReport", section: str, index: int, item) -> None:
+        if not isinstance(item, dict):
+            if index is None:
+                report.add_error(f"$.{section}", f"The field '{section}' should be a JSON object.")
+            else:
+                report.add_error(f"$.{section}[{index}]", f"Item {index} in '{section}' is not a JSON object.")
+            return
+        
+        for name, required, types, allowed, elements, message, no_bool in rules:
+            if name not in item:
+                if required:
+                    where = f"item {index} of '{section}'" if index is not None else f"'{section}'"
+                    path = f"$.{section}[{index}]" if index is not None else f"$.{section}"
+                    report.add_error(f"{path}.{name}", f"Missing field '{name}' in {where}.")
+                continue
+            if types is None:
+                continue
+            value = item[name]
+            if (not isinstance(value, types)
+                    or (no_bool and isinstance(value, bool))
+                    or (allowed is not None and value not in allowed)
+                    or (elements is not None and not all(isinstance(element, elements) for element in value))):
+                where = f"item {index} of '{section}'" if index is not None else f"'{section}'"
+                path = f"$.{section}[{index}]" if index is not None else f"$.{section}"
+                report.add_error(f"{path}.{name}", f"Field '{name}' in {where} {message}.")
+    
+    return check
+
+SECTION_CHECKS = {section: compile_item_check(fields) for section, fields in INPUT_SCHEMA.items()}
+check_projection = compile_item_check(PROJECTION_SCHEMA)
+
+def check_document(report: ValidationReport, data) -> None:
+    """
+    Checks the parts of the document that are only known once it is complete:
+    that it is an object, that every required section is a list and the projection settings.
+    """
+    if not isinstance(data, dict):
+        report.add_error("$", "The input data must be a JSON object.")
+        return
+    for section in INPUT_SCHEMA:
+        if section not in data:
+            report.add_error(f"$.{section}", f"Missing required field: '{section}'")
+        elif not isinstance(data[section], list):
+            report.add_error(f"$.{section}", f"The field '{section}' should be a list.")
+    if "projection" in data:
+        check_projection(report, "projection", None, data["projection"])
+
+def _parse_streaming(f, report: ValidationReport):
+    """
+    Builds the document from ijson parse events. Each item of a required section is
+    checked as soon as it is complete, while the rest of the file is still unread.
+    """
+    # Stack of [container, pending map key, item check] for the values being built
+    stack = []
+    root = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if event == "map_key":
+            stack[-1][1] = value
+            continue
+        if event == "start_map":
+            stack.append([{}, None, None])
+            continue
+        if event == "start_array":
+            # A list directly under the root object: look up its section's check once
+            check = SECTION_CHECKS.get(stack[0][1]) if len(stack) == 1 and isinstance(stack[0][0], dict) else None
+            stack.append([[], None, check])
+            continue
+        if event in ("end_map", "end_array"):
+            value = stack.pop()[0]
+        
+        # A complete value: attach it to its parent
+        if not stack:
+            root = value
+            continue
+        parent, key, check = stack[-1]
+        if isinstance(parent, list):
+            if check is not None:
+                check(report, stack[0][1], len(parent), value)
+            parent.append(value)
+        else:
+            parent[key] = value
+    return root
+
+def _check_parsed(report: ValidationReport, data) -> None:
+    check_document(report, data)
+    if isinstance(data, dict):
+        for section, check in SECTION_CHECKS.items():
+            items = data.get(section)
+            if isinstance(items, list):
+                for index, item in enumerate(items):
+                    check(report, section, index, item)
+
+def stream_min_bytes() -> int:
+    """
+    The size from which validate_file streams a file with ijson: VALIDATION_STREAM_MIN_BYTES
+    (default 256 MB); 0 streams every file.
+    """
+    return int(os.getenv("VALIDATION_STREAM_MIN_BYTES", str(DEFAULT_STREAM_MIN_BYTES)))
 
-    # 2. Load the JSON data
-    try:
+def _validate(open_stream, load, max_errors: int, stream: bool = False) -> ValidationReport:
+    report = ValidationReport(max_errors=max_errors)
+    if stream:
+        try:
+            with open_stream() as f:
+                data = _parse_streaming(f, report)
+        except ijson.JSONError:
+            report.add_error("$", "Invalid JSON format")
+            return report
+        check_document(report, data)
+    else:
+        try:
+            data = load()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            report.add_error("$", "Invalid JSON format")
+            return report
+        _check_parsed(report, data)
+    
+    report.data = data
+    return report
+
+def validate_file(file_path: str, max_errors: int = MAX_ERRORS) -> ValidationReport:
+    """
+    Reads and validates the financial data JSON file in a single pass, collecting up to
+    max_errors errors instead of stopping at the first one. Files of at least
+    stream_min_bytes() are streamed with ijson when it is installed.
+    """
+    if not os.path.isfile(file_path):
+        report = ValidationReport(max_errors=max_errors)
+        report.add_error("$", f"File not found: {file_path}")
+        return report
+    
+    def load():
         with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)  
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in file: {file_path}")
-        return False
+            return json.load(f)
+    stream = ijson is not None and os.path.getsize(file_path) >= stream_min_bytes()
+    return _validate(lambda: open(file_path, 'rb'), load, max_errors, stream)
 
-    # 3. Rest of your validation logic below...
-    required_keys = {
-        "revenue": ["name", "amount"],
-        "expenditure": ["name", "amount"],
-        "inflation": ["year", "rate"],
-        "gdp_growth": ["year", "rate"]
-    }
-
-    for key, required_fields in required_keys.items():
-        if key not in data:
-            print(f"Error: Missing required field: '{key}'")
-            return False
-
-        if not isinstance(data[key], list):
-            print(f"Error: The field '{key}' should be a list.")
-            return False
-
-        for index, item in enumerate(data[key]):
-            if not isinstance(item, dict):
-                print(f"Error: Item {index} in '{key}' is not a JSON object.")
-                return False
-
-            for field in required_fields:
-                if field not in item:
-                    print(f"Error: Missing field '{field}' in item {index} of '{key}'.")
-                    return False
-                
-                if field == "amount" and not isinstance(item[field], (int, float)):
-                    print(f"Error: Field 'amount' in item {index} of '{key}' must be numeric.")
-                    return False
-                if field == "rate" and not isinstance(item[field], (int, float)):
-                    print(f"Error: Field 'rate' in item {index} of '{key}' must be numeric.")
-                    return False
-                if field == "year" and not isinstance(item[field], str):
-                    print(f"Error: Field 'year' in item {index} of '{key}' must be a string.")
-                    return False
-
-    print("Validation succeeded! The input data structure is correct.")
-    return True
\ No newline at end of file
+def validate_bytes(content: bytes, max_errors: int = MAX_ERRORS) -> ValidationReport:
+    """
+    Like validate_file for an uploaded document that is still in memory.
+    """
+    return _validate(lambda: io.BytesIO(content), lambda: json.loads(content), max_errors)
+
+def log_report(report: ValidationReport) -> None:
+    for error in report.errors:
+        log(f"Error: {error['message']} ({error['path']})", level="error", path=error["path"])
+    if report.truncated:
+        log(f"Error: {report.error_count - len(report.errors)} more validation errors not shown.", level="error")
+
+def validate_data(file_path: str) -> bool:
+    """
+    Validates the structure of the financial data JSON file.
+    Logs every error found and returns True if valid, False otherwise.
+    """
+    report = validate_file(file_path)
+    if not report.valid:
+        log_report(report)
+        return False
+    
+    log("Validation succeeded! The input data structure is correct.")
+    return True
@@ -1,59 +1,153 @@
-import json
-import os
-from skills.data_validation_tool import validate_data  # Import your validation tool
+import numpy as np
+from skills.data_validation_tool import validate_file, log_report
+from job_log import log
 
-def standardize_data(file_path: str) -> dict:
-    print(f"\n[DEBUG] Starting standardization for {file_path}")
+# Numeric field imputed in each section
+IMPUTED_FIELDS = {
+    "revenue": "amount",
+    "expenditure": "amount",
+    "inflation": "rate",
+    "gdp_growth": "rate"
+}
+
+# Ways of filling a missing value (see impute_missing)
+IMPUTATION_STRATEGIES = ("mean", "median", "carry_forward", "category_mean")
+
+def standardize_data(file_path: str, strategy: str = "mean") -> dict:
     """
     Loads the JSON file at file_path and standardizes it by filling missing numeric fields:
       - For 'revenue' and 'expenditure', missing or invalid 'amount' values are filled with the mean amount.
       - For 'inflation' and 'gdp_growth', missing or invalid 'rate' values are filled with the mean rate.
+    strategy selects another way of filling them (see impute_missing).
     
-    The function first checks the data using validate_data. If validation passes, no standardization is needed.
-    It prints out messages explaining its actions and returns the updated data dictionary.
+    The file is read once: validate_file parses and checks it in the same pass. If validation
+    passes, no standardization is needed. Otherwise it logs a summary of the imputed values
+    per section and returns the updated data dictionary.
     """
-    # Check file existence and load JSON data
-    if not os.path.isfile(file_path):
-        print(f"Error: File not found: {file_path}")
-        return {}
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in file: {file_path}")
+    log(f"[DEBUG] Starting standardization for {file_path}", level="debug")
+    report = validate_file(file_path)
+    if report.data is None:
+        log_report(report)
         return {}
+    data = report.data
     
-    # Validate the data using the data_validation_tool
-    if validate_data(file_path):
-        print("Data is valid. No standardization needed.")
+    if report.valid:
+        log("Data is valid. No standardization needed.")
         return data
     else:
-        print("Data validation failed. Proceeding with data standardization...")
-
-    # Define sections and their numeric fields to check
-    sections = {
-        "revenue": "amount",
-        "expenditure": "amount",
-        "inflation": "rate",
-        "gdp_growth": "rate"
-    }
-
-    # For each section, compute mean and fill missing or invalid values
-    for section, field in sections.items():
-        if section in data and isinstance(data[section], list):
-            # Collect values that are present and numeric
-            present_values = [item[field] for item in data[section]
-                              if field in item and isinstance(item[field], (int, float))]
-            if present_values:
-                mean_value = sum(present_values) / len(present_values)
-            else:
-                mean_value = 0  # Default if no valid numbers are present
-
-            # Iterate through the section to standardize missing/invalid numeric fields
-            for index, item in enumerate(data[section]):
-                if field not in item or not isinstance(item[field], (int, float)):
-                    print(f"Standardizing: In section '{section}', record {index} missing or invalid '{field}'. Filling with mean value {mean_value:.2f}.")
-                    item[field] = mean_value
+        log(f"Data validation failed with {report.error_count} errors. Proceeding with data standardization...")
     
+    summary = impute_missing(data, strategy)
+    for section, counts in summary["sections"].items():
+        if counts["imputed"]:
+            log(f"Standardizing: Filled {counts['imputed']} of {counts['records']} missing or invalid '{counts['field']}' values in '{section}' ({strategy}).")
+    log(f"Standardization completed: {summary['total_imputed']} values imputed.")
     return data
 
+def _section_values(items: list, field: str):
+    """
+    Returns the field as a float array (NaN where missing or not numeric) and the
+    indices of the dict items it could be filled in on.
+    """
+    values = np.fromiter(
+        (item[field] if isinstance(item, dict) and isinstance(item.get(field), (int, float)) else np.nan for item in items),
+        dtype=np.float64, count=len(items)
+    )
+    fillable = np.fromiter((isinstance(item, dict) for item in items), dtype=bool, count=len(items))
+    return values, fillable
+
+def _fallback(values: np.ndarray) -> float:
+    # Section mean, or 0 if no valid numbers are present
+    present = ~np.isnan(values)
+    return float(values[present].mean()) if present.any() else 0.0
+
+def _carry_forward(items: list, values: np.ndarray, missing: np.ndarray, field: str) -> np.ndarray:
+    """
+    Fills each missing value with the previous year's value: the preceding record (by year)
+    for rate series, the last entry of the item's "history" for amounts.
+    """
+    filled = values.copy()
+    if field == "amount":
+        previous = np.fromiter(
+            (item["history"][-1] if isinstance(item, dict) and item.get("history") and isinstance(item["history"][-1], (int, float))
+             else np.nan for item in items),
+            dtype=np.float64, count=len(items)
+        )
+        filled[missing] = previous[missing]
+    else:
+        # Order the series by year when every year can be read, otherwise keep the file order
+        try:
+            order = np.argsort([int(item.get("year")) for item in items], kind="stable")
+        except (AttributeError, TypeError, ValueError):
+            order = np.arange(len(items))
+        ordered = values[order]
+        positions = np.where(np.isnan(ordered), 0, np.arange(len(ordered)))
+        np.maximum.accumulate(positions, out=positions)
+        filled[order] = ordered[positions]
+    # Nothing to carry forward (first year or no history): use the section mean
+    filled[np.isnan(filled)] = _fallback(values)
+    return filled
+
+def _category_mean(items: list, values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    """
+    Fills each missing value with the mean of the items sharing its "category";
+    items without a category, or whose category has no values, get the section mean.
+    """
+    categories = np.array([item.get("category") if isinstance(item, dict) else None for item in items], dtype=object)
+    codes_of = {}
+    codes = np.fromiter((codes_of.setdefault(category, len(codes_of)) for category in categories), dtype=np.int64, count=len(items))
+    present = ~missing
+    sums = np.bincount(codes[present], weights=values[present], minlength=len(codes_of))
+    counts = np.bincount(codes[present], minlength=len(codes_of))
+    means = np.divide(sums, counts, out=np.full(len(codes_of), np.nan), where=counts > 0)
+    if None in codes_of:
+        means[codes_of[None]] = np.nan
+    filled = np.where(missing, means[codes], values)
+    filled[np.isnan(filled)] = _fallback(values)
+    return filled
+
+def impute_missing(data: dict, strategy: str = "mean") -> dict:
+    """
+    Fills missing or invalid numeric fields of data in place, one vectorized pass per section:
+      - 'amount' for 'revenue' and 'expenditure'
+      - 'rate' for 'inflation' and 'gdp_growth'
+    
+    strategy is one of IMPUTATION_STRATEGIES:
+      - "mean" / "median": the section's mean or median of the valid values
+      - "carry_forward": the previous year's value (see _carry_forward)
+      - "category_mean": the mean of the items in the same "category"
+    
+    Returns a summary: {"strategy", "total_imputed", "sections": {section: {"field", "records", "imputed"}}},
+    with the mean/median "fill_value" per section for those strategies.
+    """
+    if strategy not in IMPUTATION_STRATEGIES:
+        raise ValueError(f"Unknown imputation strategy '{strategy}'. Expected one of: {', '.join(IMPUTATION_STRATEGIES)}")
+    
+    summary = {"strategy": strategy, "total_imputed": 0, "sections": {}}
+    for section, field in IMPUTED_FIELDS.items():
+        items = data.get(section)
+        if not isinstance(items, list):
+            continue
+        values, fillable = _section_values(items, field)
+        missing = np.isnan(values) & fillable
+        counts = {"field": field, "records": len(items), "imputed": int(missing.sum())}
+        summary["sections"][section] = counts
+        if not counts["imputed"]:
+            continue
+        
+        if strategy == "mean":
+            counts["fill_value"] = _fallback(values)
+            filled = np.full(len(items), counts["fill_value"])
+        elif strategy == "median":
+            counts["fill_value"] = float(np.nanmedian(values)) if (~np.isnan(values)).any() else 0.0
+            filled = np.full(len(items), counts["fill_value"])
+        elif strategy == "carry_forward":
+            filled = _carry_forward(items, values, np.isnan(values), field)
+        else:
+            filled = _category_mean(items, values, np.isnan(values))
+        
+        # Only the records that were missing a value are touched
+        for index in np.flatnonzero(missing):
+            items[index][field] = float(filled[index])
+        summary["total_imputed"] += counts["imputed"]
+    return summary
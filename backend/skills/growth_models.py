@@ -0,0 +1,68 @@
+import numpy as np
+
+# Models a revenue or expenditure item can be projected with:
+#   - "fixed": compound growth at the item's growth rate
+#   - "linear": least-squares straight line through the item's history
+#   - "log_linear": least-squares line through the log of the history (constant growth rate)
+#   - "exp_smoothing": Holt's double exponential smoothing of the history (level and trend)
+GROWTH_MODELS = ("fixed", "linear", "log_linear", "exp_smoothing")
+
+# Smoothing factors for the level and the trend of "exp_smoothing"
+SMOOTHING_LEVEL = 0.5
+SMOOTHING_TREND = 0.3
+
+def fixed_growth(amounts: np.ndarray, rates: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Projects every amount at its own compound growth rate.
+    Returns a (len(amounts), horizon) matrix; column k is year k + 1.
+    """
+    steps = np.arange(1, horizon + 1)
+    return amounts[:, None] * (1 + rates)[:, None] ** steps[None, :]
+
+def linear_trend(series: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Fits a straight line to each row of series (one row per item, oldest value first)
+    and extends it horizon years past the last value. All rows are fitted at once.
+    """
+    length = series.shape[1]
+    t = np.arange(length, dtype=np.float64)
+    t_centered = t - t.mean()
+    series_mean = series.mean(axis=1)
+    slopes = (series - series_mean[:, None]) @ t_centered / (t_centered @ t_centered)
+    intercepts = series_mean - slopes * t.mean()
+    future = np.arange(length, length + horizon, dtype=np.float64)
+    return intercepts[:, None] + slopes[:, None] * future[None, :]
+
+def log_linear_trend(series: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Fits a constant growth rate to each row of series by regressing the log of the values.
+    Rows with non-positive values cannot be log-transformed and are fitted linearly instead.
+    """
+    positive = (series > 0).all(axis=1)
+    result = np.empty((series.shape[0], horizon))
+    if positive.any():
+        result[positive] = np.exp(linear_trend(np.log(series[positive]), horizon))
+    if not positive.all():
+        result[~positive] = linear_trend(series[~positive], horizon)
+    return result
+
+def exp_smoothing_trend(series: np.ndarray, horizon: int, alpha: float = SMOOTHING_LEVEL,
+                        beta: float = SMOOTHING_TREND) -> np.ndarray:
+    """
+    Holt's linear exponential smoothing of each row of series. The recursion runs over
+    the years of history, with every row updated at once.
+    """
+    level = series[:, 0]
+    trend = series[:, 1] - series[:, 0]
+    for column in range(1, series.shape[1]):
+        previous_level = level
+        level = alpha * series[:, column] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+    steps = np.arange(1, horizon + 1)
+    return level[:, None] + trend[:, None] * steps[None, :]
+
+TREND_MODELS = {
+    "linear": linear_trend,
+    "log_linear": log_linear_trend,
+    "exp_smoothing": exp_smoothing_trend
+}
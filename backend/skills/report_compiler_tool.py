@@ -1,12 +1,60 @@
 from fpdf import FPDF
 import os
+from itertools import islice
+import numpy as np
+from job_log import log
+from artifacts import ArtifactRegistry
+from skills.budget_projection_tool import ProjectedItems, projected_totals
+from skills.report_template import get_report_template
+
+# Row heights of the tables, in mm
+TABLE_HEADER_HEIGHT = 10
+TABLE_ROW_HEIGHT = 8
+
+def default_table_top_n() -> int:
+    """
+    Rows shown per revenue and expenditure table before the rest are folded into one
+    "Other" row, from the REPORT_TABLE_TOP_N environment variable. 0 (the default) shows every row.
+    """
+    return int(os.getenv("REPORT_TABLE_TOP_N", "0"))
+
+def amount_rows(items, top_n: int = 0):
+    """
+    Yields a [name, formatted projected amount] row per item, where items is a ProjectedItems
+    or a plain list of dicts. If top_n is set and there are more items, only the top_n
+    largest are listed, largest first, followed by an "Other" row with the sum of the rest.
+    """
+    if isinstance(items, ProjectedItems):
+        names, amounts = items.names, items.projected
+    else:
+        names = [item.get("name", "Unknown") for item in items]
+        amounts = np.array([item.get("projected_amount", 0) for item in items], dtype=np.float64)
+    
+    if not top_n or len(names) <= top_n:
+        for name, amount in zip(names, amounts.tolist()):
+            yield [name, f"${amount:,.2f}"]
+        return
+    
+    # Select the largest top_n without sorting the whole ledger, then order just those
+    top = np.argpartition(-amounts, top_n - 1)[:top_n]
+    top = top[np.argsort(-amounts[top], kind="stable")]
+    for index, amount in zip(top.tolist(), amounts[top].tolist()):
+        yield [names[index], f"${amount:,.2f}"]
+    other = float(amounts.sum() - amounts[top].sum())
+    yield [f"Other ({len(names) - top_n:,} items)", f"${other:,.2f}"]
 
 class PDF(FPDF):
+    def __init__(self, report_title: str = 'Budget Analysis Report', *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.report_title = report_title
+        # Character widths per font, so table cells are measured without asking fpdf for every string
+        self._char_widths = {}
+    
     def header(self):
         # Logo or header styling
         self.set_font('Arial', 'B', 16)
         self.set_text_color(0, 51, 102)  # Dark blue
-        self.cell(0, 10, 'Budget Analysis Report', border=0, ln=1, align='C')
+        self.cell(0, 10, self.report_title, border=0, ln=1, align='C')
         self.line(10, 20, self.w - 10, 20)  # Add a line under header
         self.ln(10)
     
@@ -17,36 +65,149 @@ class PDF(FPDF):
         self.set_text_color(128)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
     
-    def create_table(self, headers, data, col_widths=None):
-        # A simple table implementation that doesn't require the table() method
+    def fit_text(self, text: str, max_width: float) -> tuple:
+        """
+        Returns text, shortened with "..." if it is wider than max_width in the current
+        font, and its width.
+        """
+        font = (self.font_family, self.font_style, self.font_size_pt)
+        widths = self._char_widths.get(font)
+        if widths is None:
+            widths = self._char_widths[font] = {}
+        
+        # Width of the characters that fit
+        total = 0
+        for position, char in enumerate(text):
+            width = widths.get(char)
+            if width is None:
+                width = widths[char] = self.get_string_width(char)
+            if total + width > max_width:
+                break
+            total += width
+        else:
+            return text, total
+        
+        ellipsis = widths.get("...")
+        if ellipsis is None:
+            ellipsis = widths["..."] = self.get_string_width("...")
+        # Drop characters from the end of what fitted until the ellipsis fits too
+        while position > 0 and total + ellipsis > max_width:
+            position -= 1
+            total -= widths[text[position]]
+        return text[:position] + "...", total + ellipsis
+    
+    def _table_cells(self, row, y: float, height: float, columns: list) -> None:
+        # Writes one row's text; the borders are drawn per page by _table_grid
+        baseline = y + 0.5 * height + 0.3 * self.font_size
+        for cell, (x, width, align) in zip(row, columns):
+            text, text_width = self.fit_text(str(cell), width - 2 * self.c_margin)
+            if align == 'R':
+                offset = width - self.c_margin - text_width
+            elif align == 'C':
+                offset = (width - text_width) / 2
+            else:
+                offset = self.c_margin
+            self.text(x + offset, baseline, text)
+    
+    def _table_grid(self, top: float, row_count: int, columns: list) -> None:
+        left = columns[0][0]
+        right = columns[-1][0] + columns[-1][1]
+        bottom = top + TABLE_HEADER_HEIGHT + row_count * TABLE_ROW_HEIGHT
+        self.line(left, top, right, top)
+        for row in range(row_count + 1):
+            y = top + TABLE_HEADER_HEIGHT + row * TABLE_ROW_HEIGHT
+            self.line(left, y, right, y)
+        for x, _, _ in columns:
+            self.line(x, top, x, bottom)
+        self.line(right, top, right, bottom)
+    
+    def create_table(self, headers, rows, col_widths=None, aligns=None):
+        """
+        Draws a table without the table() method. rows may be any iterable of rows, e.g. a
+        generator; it is consumed one page at a time: each batch is as many rows as fit
+        on the page, written with the font set once and the borders drawn as one grid.
+        The header row is repeated at the top of every page the table continues on.
+        aligns holds an 'L', 'C' or 'R' per column (default: all 'L').
+        """
         if col_widths is None:
             col_widths = [self.w / len(headers) - 10] * len(headers)
+        if aligns is None:
+            aligns = 'L' * len(headers)
+        columns = []
+        x = self.l_margin
+        for width, align in zip(col_widths, aligns):
+            columns.append((x, width, align))
+            x += width
+        header_columns = [(x, width, 'C') for x, width, _ in columns]
+        
+        # Pages are broken here, before a batch, rather than by fpdf in the middle of a row
+        auto_page_break = self.auto_page_break
+        self.set_auto_page_break(False, margin=self.b_margin)
+        rows = iter(rows)
+        
+        def capacity():
+            return int((self.page_break_trigger - self.get_y() - TABLE_HEADER_HEIGHT) // TABLE_ROW_HEIGHT)
         
-        # Headers
-        self.set_font('Arial', 'B', 10)
-        for i, header in enumerate(headers):
-            self.cell(col_widths[i], 10, str(header), 1, 0, 'C')
-        self.ln()
+        room = capacity()
+        if room < 1:
+            self.add_page()
+            room = capacity()
+        batch = list(islice(rows, room))
+        while True:
+            top = self.get_y()
+            self.set_font('Arial', 'B', 10)
+            self._table_cells(headers, top, TABLE_HEADER_HEIGHT, header_columns)
+            self.set_font('Arial', '', 10)
+            y = top + TABLE_HEADER_HEIGHT
+            for row in batch:
+                self._table_cells(row, y, TABLE_ROW_HEIGHT, columns)
+                y += TABLE_ROW_HEIGHT
+            self._table_grid(top, len(batch), columns)
+            self.set_xy(self.l_margin, y)
+            
+            if len(batch) < room:
+                break
+            next_row = next(rows, None)
+            if next_row is None:
+                break
+            self.add_page()
+            room = capacity()
+            batch = [next_row] + list(islice(rows, room - 1))
         
-        # Data
-        self.set_font('Arial', '', 10)
-        for row in data:
-            for i, cell in enumerate(row):
-                self.cell(col_widths[i], 8, str(cell), 1, 0, 'L')
-            self.ln()
+        self.set_auto_page_break(auto_page_break, margin=self.b_margin)
 
-def compile_report(projections: dict, risk_level: str, tax_slabs: list, visual_plots_dir: str = "visual plots", 
-                  output_pdf: str = "report.pdf", insights: dict = None):
+def outlook_rows(projections: dict) -> list:
     """
-    Compile all data into a final PDF report with insights
+    Rows of the multi-year outlook table (totals and indicator rates per year), or None
+    when projecting a single year.
+    """
+    years = projections.get("horizon_years", [])
+    if len(years) < 2:
+        return None
+    revenue_totals = projected_totals(projections.get("projected_revenue", []), years)
+    expenditure_totals = projected_totals(projections.get("projected_expenditure", []), years)
+    inflation_rates = {entry["year"]: entry["rate"] for entry in projections.get("projected_inflation", {}).get("outlook", [])}
+    gdp_growth_rates = {entry["year"]: entry["rate"] for entry in projections.get("projected_gdp_growth", {}).get("outlook", [])}
+    return [[year, f"${revenue:,.0f}", f"${expenditure:,.0f}",
+             f"{inflation_rates.get(year, 'N/A')}%", f"{gdp_growth_rates.get(year, 'N/A')}%"]
+            for year, revenue, expenditure in zip(years, revenue_totals, expenditure_totals)]
+
+def compile_report(projections: dict, risk_level: str, tax_slabs: list, plots: ArtifactRegistry = None,
+                  output_pdf: str = "report.pdf", insights: dict = None, table_top_n: int = None,
+                  template: str = None):
+    """
+    Compile all data into a final PDF report with insights, laid out by the report template
+    (see skills/report_template.py). The template is compiled once per process; each
+    report only fills it with this job's context.
     
     Args:
         projections: Dictionary containing budget projections data
         risk_level: Overall risk assessment level
         tax_slabs: List of tax brackets and rates
-        visual_plots_dir: Directory containing visualization plots
+        plots: ArtifactRegistry with the charts from the visualization stage (artifacts of kind "plot")
         output_pdf: Output PDF filename
-        insights: Dictionary containing insight paragraphs for each section
+        insights: Dictionary containing insight paragraphs for each section, or None for the
+            template's default insights
             Expected format: {
                 "revenue": "Insight text about revenue...",
                 "expenditure": "Insight text about expenditure...",
@@ -57,145 +218,37 @@ def compile_report(projections: dict, risk_level: str, tax_slabs: list, visual_p
                     "plot_name": "Insight text for specific visual..."
                 }
             }
+        table_top_n: Rows listed per revenue and expenditure table before the rest are summed
+            into an "Other" row; 0 lists every row (default: REPORT_TABLE_TOP_N, see default_table_top_n)
+        template: Path of the template file (default: REPORT_TEMPLATE, otherwise the built-in layout)
     """
-    # Default insights if none provided
-    if insights is None:
-        insights = {
-            "revenue": "Revenue analysis shows a balanced distribution across tax and non-tax sources, with particular strength in corporate and personal income taxes.",
-            "expenditure": "The expenditure allocation prioritizes education, healthcare, and debt servicing, representing a balanced approach to public spending.",
-            "economic": "The projected inflation rate slightly exceeds GDP growth, suggesting careful monitoring of fiscal policies will be needed in the coming year.",
-            "risk": "The medium risk assessment indicates potential challenges that require proactive management strategies.",
-            "tax": "The progressive tax structure aims to balance revenue generation with equitable distribution of tax burden across income levels.",
-            "visual": {}
-        }
-    
-    pdf = PDF()
+    if table_top_n is None:
+        table_top_n = default_table_top_n()
+    report_template = get_report_template(template)
+    
+    years = projections.get("horizon_years", [])
+    projected_inflation = projections.get('projected_inflation', {})
+    projected_gdp_growth = projections.get('projected_gdp_growth', {})
+    # Everything the template refers to; the table rows are generated while they are drawn
+    context = {
+        "revenue_rows": amount_rows(projections.get("projected_revenue", []), table_top_n),
+        "expenditure_rows": amount_rows(projections.get("projected_expenditure", []), table_top_n),
+        "inflation_year": projected_inflation.get('year', 'N/A'),
+        "inflation_rate": projected_inflation.get('rate', 'N/A'),
+        "gdp_growth_year": projected_gdp_growth.get('year', 'N/A'),
+        "gdp_growth_rate": projected_gdp_growth.get('rate', 'N/A'),
+        "outlook_rows": outlook_rows(projections),
+        "outlook_first_year": years[0] if years else 'N/A',
+        "outlook_last_year": years[-1] if years else 'N/A',
+        "risk_level": risk_level.upper(),
+        "tax_slab_rows": ([slab.get('slab', ''), slab.get('range', ''), slab.get('tax_rate', '')]
+                          for slab in tax_slabs),
+        "insights": insights,
+        "plots": plots
+    }
+    
+    pdf = PDF(report_template.title)
     pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # Section 1: Budget Projections
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 14)
-    pdf.set_text_color(0, 51, 102)
-    pdf.cell(0, 10, "Budget Projections", ln=1)
-    pdf.ln(5)
-    
-    # Revenue Table
-    pdf.set_font("Arial", 'B', 12)
-    pdf.set_text_color(0)
-    pdf.cell(0, 10, "Projected Revenues", ln=1)
-    pdf.set_font("Arial", size=11)
-    
-    # Create revenue table
-    headers = ["Revenue Source", "Projected Amount"]
-    data = [[rev.get("name", "Unknown"), f"${rev.get('projected_amount', 0):,.2f}"] 
-            for rev in projections.get("projected_revenue", [])]
-    pdf.create_table(headers, data)
-    
-    # Revenue Insights
-    if "revenue" in insights:
-        pdf.ln(5)
-        pdf.set_font("Arial", 'I', 11)
-        pdf.set_text_color(50, 50, 50)
-        pdf.multi_cell(0, 6, insights["revenue"])
-    
-    # Expenditure Table
-    pdf.ln(8)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.set_text_color(0)
-    pdf.cell(0, 10, "Projected Expenditures", ln=1)
-    pdf.set_font("Arial", size=11)
-    
-    # Create expenditure table
-    headers = ["Expenditure Category", "Projected Amount"]
-    data = [[exp.get("name", "Unknown"), f"${exp.get('projected_amount', 0):,.2f}"] 
-            for exp in projections.get("projected_expenditure", [])]
-    pdf.create_table(headers, data)
-    
-    # Expenditure Insights
-    if "expenditure" in insights:
-        pdf.ln(5)
-        pdf.set_font("Arial", 'I', 11)
-        pdf.set_text_color(50, 50, 50)
-        pdf.multi_cell(0, 6, insights["expenditure"])
-    
-    # Inflation & GDP
-    pdf.ln(8)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.set_text_color(0)
-    pdf.cell(0, 10, "Economic Indicators", ln=1)
-    pdf.set_font("Arial", size=11)
-    pdf.cell(0, 6, f"Projected Inflation (2026): {projections.get('projected_inflation', {}).get('rate', 'N/A')}%", ln=1)
-    pdf.cell(0, 6, f"Projected GDP Growth (2026): {projections.get('projected_gdp_growth', {}).get('rate', 'N/A')}%", ln=1)
-    
-    # Economic Indicators Insights
-    if "economic" in insights:
-        pdf.ln(5)
-        pdf.set_font("Arial", 'I', 11)
-        pdf.set_text_color(50, 50, 50)
-        pdf.multi_cell(0, 6, insights["economic"])
-    
-    # Section 2: Risk Identification
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 14)
-    pdf.set_text_color(0, 51, 102)
-    pdf.cell(0, 10, "Risk Identification", ln=1)
-    pdf.set_font("Arial", size=12)
-    pdf.set_text_color(0)
-    pdf.ln(8)
-    pdf.cell(0, 10, f"Overall Risk Ranking: {risk_level.upper()}", ln=1)
-    
-    # Risk Insights
-    if "risk" in insights:
-        pdf.ln(5)
-        pdf.set_font("Arial", 'I', 11)
-        pdf.set_text_color(50, 50, 50)
-        pdf.multi_cell(0, 6, insights["risk"])
-    
-    # Section 3: Tax Slabs
-    pdf.add_page()
-    pdf.set_font("Arial", 'B', 14)
-    pdf.set_text_color(0, 51, 102)
-    pdf.cell(0, 10, "Tax Slabs", ln=1)
-    pdf.set_font("Arial", size=11)
-    pdf.ln(5)
-    
-    # Create tax slabs table
-    headers = ["Slab", "Income Range", "Tax Rate"]
-    data = [[slab.get('slab', ''), slab.get('range', ''), slab.get('tax_rate', '')] 
-            for slab in tax_slabs]
-    pdf.create_table(headers, data)
-    
-    # Tax Insights
-    if "tax" in insights:
-        pdf.ln(5)
-        pdf.set_font("Arial", 'I', 11)
-        pdf.set_text_color(50, 50, 50)
-        pdf.multi_cell(0, 6, insights["tax"])
-    
-    # Section 4: Visual Plots
-    if os.path.exists(visual_plots_dir):
-        for image_file in sorted(os.listdir(visual_plots_dir)):
-            if image_file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                pdf.add_page()
-                pdf.set_font("Arial", 'B', 12)
-                pdf.cell(0, 10, f"Visual Analysis: {image_file.split('.')[0]}", ln=1)
-                
-                # Calculate image dimensions to maintain aspect ratio
-                img_width = pdf.w - 40  # Image width (leaving margins)
-                
-                # Use standard image method without keep_aspect_ratio parameter
-                pdf.image(os.path.join(visual_plots_dir, image_file), x=20, w=img_width)
-                
-                # Visual-specific insights
-                image_name = image_file.split('.')[0]
-                if "visual" in insights and image_name in insights["visual"]:
-                    pdf.ln(5)
-                    pdf.set_font("Arial", 'I', 11)
-                    pdf.set_text_color(50, 50, 50)
-                    pdf.multi_cell(0, 6, insights["visual"][image_name])
-    else:
-        pdf.add_page()
-        pdf.cell(0, 10, "No visual plots found.", ln=1)
-    
+    report_template.render(pdf, context)
     pdf.output(output_pdf)
-    print(f"Report compiled as {output_pdf}")
\ No newline at end of file
+    log(f"Report compiled as {output_pdf}")
@@ -0,0 +1,262 @@
+import base64
+import html
+import json
+import os
+import numpy as np
+from job_log import log
+from skills.budget_projection_tool import ProjectedItems, projected_totals
+from skills.report_compiler_tool import amount_rows, default_table_top_n, outlook_rows
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for the "parquet" output
+    pa = None
+
+# Outputs the report stage can produce. "pdf" is the compiled report (see compile_report);
+# the others are written from the same in-memory results by export_reports.
+REPORT_FORMATS = ("pdf", "json", "parquet", "html")
+REPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "json": "application/json",
+    "parquet": "application/vnd.apache.parquet",
+    "html": "text/html"
+}
+
+def available_report_formats() -> tuple:
+    """
+    REPORT_FORMATS without "parquet" when pyarrow is not installed.
+    """
+    return tuple(fmt for fmt in REPORT_FORMATS if fmt != "parquet" or pa is not None)
+
+def parse_report_formats(formats) -> tuple:
+    """
+    Turns a comma-separated string or a list of format names into a tuple of distinct
+    formats in the given order. Raises ValueError for unknown or unavailable formats.
+    """
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    parsed = []
+    for fmt in formats:
+        fmt = fmt.strip().lower()
+        if not fmt or fmt in parsed:
+            continue
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format '{fmt}'. Expected any of: {', '.join(REPORT_FORMATS)}")
+        if fmt not in available_report_formats():
+            raise ValueError(f"Report format '{fmt}' is not available: install pyarrow to enable it")
+        parsed.append(fmt)
+    if not parsed:
+        raise ValueError("At least one report format is required")
+    return tuple(parsed)
+
+def default_report_formats() -> tuple:
+    """
+    The formats set by the REPORT_FORMATS environment variable, "pdf" by default.
+    """
+    return parse_report_formats(os.getenv("REPORT_FORMATS", "pdf"))
+
+def _items_list(items) -> list:
+    return items.to_list() if isinstance(items, ProjectedItems) else list(items)
+
+def _item_columns(items, years: list) -> tuple:
+    """
+    Names, current amounts and the (items x years) projected amounts of items, which may
+    be a ProjectedItems or a plain list of dicts.
+    """
+    if isinstance(items, ProjectedItems):
+        return [str(name) for name in items.names], items.amounts, items.outlook
+    names = [str(item.get("name", "Unknown")) for item in items]
+    amounts = np.array([item.get("amount", 0) for item in items], dtype=np.float64)
+    if len(years) > 1:
+        outlook = np.array([[item.get("projected_amounts", {}).get(str(year), 0) for year in years] for item in items],
+                           dtype=np.float64).reshape(len(items), len(years))
+    else:
+        outlook = np.array([item.get("projected_amount", 0) for item in items], dtype=np.float64).reshape(len(items), 1)
+    return names, amounts, outlook
+
+def report_summary(projections: dict, risk_level: str, tax_slabs: list, insights: dict = None,
+                   risk_assessment: dict = None) -> dict:
+    """
+    Everything in the report except the line items: projected totals per year, the
+    indicators, the risk level with its per-factor assessment (see
+    risk_identification_tool.risk_assessment), the tax slabs and the insights (if any
+    were written).
+    """
+    years = projections.get("horizon_years", [])
+    summary = {
+        "horizon_years": years,
+        "total_projected_revenue": projected_totals(projections.get("projected_revenue", []), years),
+        "total_projected_expenditure": projected_totals(projections.get("projected_expenditure", []), years),
+        "projected_inflation": projections.get("projected_inflation", {}),
+        "projected_gdp_growth": projections.get("projected_gdp_growth", {}),
+        "risk_level": risk_level,
+        "tax_slabs": tax_slabs
+    }
+    if risk_assessment is not None:
+        summary["risk_assessment"] = risk_assessment
+    if insights is not None:
+        summary["insights"] = insights
+    return summary
+
+def export_json(path: str, projections: dict, risk_level: str, tax_slabs: list, insights: dict = None,
+                risk_assessment: dict = None, **_) -> None:
+    bundle = report_summary(projections, risk_level, tax_slabs, insights, risk_assessment)
+    bundle["projected_revenue"] = _items_list(projections.get("projected_revenue", []))
+    bundle["projected_expenditure"] = _items_list(projections.get("projected_expenditure", []))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, default=str)
+
+def export_parquet(path: str, projections: dict, risk_level: str, tax_slabs: list, insights: dict = None,
+                   risk_assessment: dict = None, **_) -> None:
+    """
+    One row per revenue and expenditure item (section, name, amount, projected_amount and,
+    for multi-year horizons, a projected_<year> column per year), built from the projection
+    arrays directly. The rest of the report is stored as JSON in the file's
+    "budget_report" metadata.
+    """
+    if pa is None:
+        raise ValueError("Report format 'parquet' is not available: install pyarrow to enable it")
+    years = projections.get("horizon_years", [])
+    sections, names, amounts, outlooks = [], [], [], []
+    for section in ("revenue", "expenditure"):
+        section_names, section_amounts, section_outlook = _item_columns(projections.get(f"projected_{section}", []), years)
+        sections.append(np.full(len(section_names), section, dtype=object))
+        names.extend(section_names)
+        amounts.append(section_amounts)
+        outlooks.append(section_outlook)
+    outlook = np.concatenate(outlooks)
+    
+    columns = {
+        "section": pa.array(np.concatenate(sections), type=pa.string()).dictionary_encode(),
+        "name": pa.array(names, type=pa.string()),
+        "amount": pa.array(np.concatenate(amounts)),
+        "projected_amount": pa.array(outlook[:, 0])
+    }
+    if len(years) > 1:
+        for index, year in enumerate(years):
+            columns[f"projected_{year}"] = pa.array(outlook[:, index])
+    table = pa.table(columns)
+    summary = report_summary(projections, risk_level, tax_slabs, insights, risk_assessment)
+    table = table.replace_schema_metadata({"budget_report": json.dumps(summary, default=str)})
+    pq.write_table(table, path)
+
+def _html_table(headers: list, rows, aligns: str = None) -> str:
+    aligns = aligns or "L" * len(headers)
+    styles = {"L": "", "C": ' class="center"', "R": ' class="num"'}
+    parts = ["<table><thead><tr>"]
+    parts.extend(f"<th>{html.escape(str(header))}</th>" for header in headers)
+    parts.append("</tr></thead><tbody>")
+    for row in rows:
+        parts.append("<tr>")
+        parts.extend(f"<td{styles[align]}>{html.escape(str(cell))}</td>" for cell, align in zip(row, aligns))
+        parts.append("</tr>")
+    parts.append("</tbody></table>")
+    return "".join(parts)
+
+# Row labels of the risk factors in the HTML report
+RISK_FACTOR_LABELS = {"deficit": "Deficit Ratio", "inflation": "Projected Inflation (%)",
+                      "gdp_growth": "Projected GDP Growth (%)"}
+
+def _html_risk_factors(risk_assessment: dict) -> str:
+    factors = (risk_assessment or {}).get("factors")
+    if not factors:
+        return ""
+    rows = ([RISK_FACTOR_LABELS.get(name, name), factor.get("value", ""), factor.get("risk", ""), factor.get("weight", "")]
+            for name, factor in factors.items())
+    table = _html_table(["Risk Factor", "Value", "Risk", "Weight"], rows, "LRRR")
+    return f"{table}<p>Overall Risk Score: {html.escape(str(risk_assessment.get('risk_score', 'N/A')))}</p>"
+
+def _html_insight(insights: dict, key: str) -> str:
+    text = (insights or {}).get(key)
+    return f'<p class="insight">{html.escape(text)}</p>' if text else ""
+
+HTML_STYLE = """
+body { font-family: Arial, Helvetica, sans-serif; margin: 2em auto; max-width: 60em; color: #000; }
+h1 { color: #003366; text-align: center; border-bottom: 1px solid #003366; }
+h2 { color: #003366; margin-top: 2em; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #000; padding: 0.3em 0.8em; }
+td.num { text-align: right; }
+td.center { text-align: center; }
+.insight { font-style: italic; color: #323232; }
+figure img { max-width: 100%; }
+"""
+
+def export_html(path: str, projections: dict, risk_level: str, tax_slabs: list, insights: dict = None,
+                plots=None, table_top_n: int = None, risk_assessment: dict = None, **_) -> None:
+    """
+    A single self-contained HTML page with the same sections as the PDF report. The
+    charts are inlined from the artifact registry, so no other files are needed.
+    """
+    if table_top_n is None:
+        table_top_n = default_table_top_n()
+    projected_inflation = projections.get("projected_inflation", {})
+    projected_gdp_growth = projections.get("projected_gdp_growth", {})
+    outlook = outlook_rows(projections)
+    
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Budget Analysis Report</title>',
+        f"<style>{HTML_STYLE}</style></head><body><h1>Budget Analysis Report</h1>",
+        "<h2>Budget Projections</h2><h3>Projected Revenues</h3>",
+        _html_table(["Revenue Source", "Projected Amount"],
+                    amount_rows(projections.get("projected_revenue", []), table_top_n), "LR"),
+        _html_insight(insights, "revenue"),
+        "<h3>Projected Expenditures</h3>",
+        _html_table(["Expenditure Category", "Projected Amount"],
+                    amount_rows(projections.get("projected_expenditure", []), table_top_n), "LR"),
+        _html_insight(insights, "expenditure"),
+        "<h3>Economic Indicators</h3><ul>",
+        f"<li>Projected Inflation ({html.escape(str(projected_inflation.get('year', 'N/A')))}): "
+        f"{html.escape(str(projected_inflation.get('rate', 'N/A')))}%</li>",
+        f"<li>Projected GDP Growth ({html.escape(str(projected_gdp_growth.get('year', 'N/A')))}): "
+        f"{html.escape(str(projected_gdp_growth.get('rate', 'N/A')))}%</li></ul>"
+    ]
+    if outlook:
+        parts.append(_html_table(["Year", "Revenue", "Expenditure", "Inflation", "GDP Growth"], outlook, "LRRRR"))
+    parts.append(_html_insight(insights, "economic"))
+    
+    parts.append(f"<h2>Risk Identification</h2><p>Overall Risk Ranking: {html.escape(risk_level.upper())}</p>")
+    parts.append(_html_risk_factors(risk_assessment))
+    parts.append(_html_insight(insights, "risk"))
+    parts.append("<h2>Tax Slabs</h2>")
+    parts.append(_html_table(["Slab", "Income Range", "Tax Rate"],
+                             ([slab.get("slab", ""), slab.get("range", ""), slab.get("tax_rate", "")] for slab in tax_slabs)))
+    parts.append(_html_insight(insights, "tax"))
+    
+    images = plots.of_kind("plot") if plots is not None else []
+    if images:
+        parts.append("<h2>Visual Analysis</h2>")
+    for image in images:
+        source = f"data:{image.media_type};base64,{base64.b64encode(image.data).decode('ascii')}"
+        parts.append(f'<figure><img src="{source}" alt="{html.escape(image.name)}">'
+                     f"<figcaption>{html.escape(image.name)}</figcaption></figure>")
+        parts.append(_html_insight((insights or {}).get("visual"), image.name))
+    parts.append("</body></html>")
+    
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+
+EXPORTERS = {
+    "json": export_json,
+    "parquet": export_parquet,
+    "html": export_html
+}
+
+def export_reports(outputs: dict, projections: dict, risk_level: str, tax_slabs: list, plots=None,
+                   insights: dict = None, table_top_n: int = None, risk_assessment: dict = None) -> dict:
+    """
+    Writes the report data in every non-PDF format of outputs (format -> output path),
+    straight from the in-memory results, without rendering the PDF. risk_assessment is
+    the per-factor breakdown of risk_level (see risk_identification_tool.risk_assessment).
+    Returns the formats written with their paths.
+    """
+    written = {}
+    for fmt, path in outputs.items():
+        if fmt not in EXPORTERS:
+            continue
+        EXPORTERS[fmt](path, projections=projections, risk_level=risk_level, tax_slabs=tax_slabs,
+                       insights=insights, plots=plots, table_top_n=table_top_n, risk_assessment=risk_assessment)
+        log(f"Report exported as {fmt}: {path}")
+        written[fmt] = path
+    return written
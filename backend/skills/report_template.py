@@ -0,0 +1,196 @@
+import io
+import json
+import os
+import string
+from dataclasses import dataclass
+from functools import lru_cache
+from job_log import log
+
+# Layout of the budget report, used unless REPORT_TEMPLATE points to another file
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_template.json")
+
+@dataclass(frozen=True)
+class TextStyle:
+    """
+    A named style of the template: fpdf font arguments, text colour, line height and
+    the space left before blocks that use it.
+    """
+    font: tuple
+    color: tuple
+    height: float
+    space_before: float = 0
+    
+    def apply(self, pdf) -> None:
+        pdf.set_font(*self.font)
+        pdf.set_text_color(*self.color)
+
+class ReportTemplate:
+    """
+    A report layout compiled from its declarative description (see report_template.json).
+    
+    Every block is turned into a draw(pdf, context) function once: styles are resolved to
+    their font and colour arguments, texts without {fields} become constants and
+    conditions are bound to the context name they test. Rendering a report then only runs
+    those functions with the job's context, which holds the values the texts refer to,
+    the row iterables of the tables, "insights" and "plots".
+    """
+    
+    def __init__(self, title: str, blocks: list):
+        self.title = title
+        self.blocks = blocks
+    
+    def render(self, pdf, context: dict) -> None:
+        for draw in self.blocks:
+            draw(pdf, context)
+
+def _compile_text(text: str):
+    fields = [field for _, field, _, _ in string.Formatter().parse(text) if field is not None]
+    if not fields:
+        return lambda context: text
+    return lambda context: text.format_map(context)
+
+def _draw_insight(pdf, style: TextStyle, text: str) -> None:
+    if style.space_before:
+        pdf.ln(style.space_before)
+    style.apply(pdf)
+    pdf.multi_cell(0, style.height, text)
+
+def _compile_page(block: dict, styles: dict):
+    def draw(pdf, context):
+        pdf.add_page()
+    return draw
+
+def _compile_space(block: dict, styles: dict):
+    height = block["height"]
+    
+    def draw(pdf, context):
+        pdf.ln(height)
+    return draw
+
+def _compile_text_block(block: dict, styles: dict):
+    style = _style(styles, block.get("style", "body"))
+    text = _compile_text(block["text"])
+    
+    def draw(pdf, context):
+        style.apply(pdf)
+        pdf.cell(0, style.height, text(context), ln=1)
+    return draw
+
+def _compile_table(block: dict, styles: dict):
+    rows = block["rows"]
+    headers = list(block["headers"])
+    col_widths = block.get("widths")
+    aligns = block.get("aligns")
+    
+    def draw(pdf, context):
+        pdf.create_table(headers, context[rows], col_widths, aligns)
+    return draw
+
+def _compile_insight(block: dict, styles: dict):
+    key = block["key"]
+    default = block.get("default")
+    style = _style(styles, block.get("style", "insight"))
+    
+    def draw(pdf, context):
+        # The template's default texts are used when no insights were written for the report
+        insights = context.get("insights")
+        text = default if insights is None else insights.get(key)
+        if text:
+            _draw_insight(pdf, style, text)
+    return draw
+
+def _compile_group(block: dict, styles: dict):
+    blocks = [_compile_block(child, styles) for child in block["blocks"]]
+    
+    def draw(pdf, context):
+        for child in blocks:
+            child(pdf, context)
+    return draw
+
+def _compile_plots(block: dict, styles: dict):
+    kind = block.get("kind", "plot")
+    style = _style(styles, block.get("style", "subsection"))
+    insight_style = _style(styles, block.get("insight_style", "insight"))
+    empty_style = _style(styles, block.get("empty_style", "body"))
+    title = _compile_text(block.get("title", "{name}"))
+    insights_key = block.get("insights")
+    empty = block.get("empty")
+    
+    def draw(pdf, context):
+        # Plots are embedded straight from memory (SVG charts stay vectors), one per page
+        plots = context.get("plots")
+        images = plots.of_kind(kind) if plots is not None else []
+        insights = (context.get("insights") or {}).get(insights_key, {}) if insights_key else {}
+        for image in images:
+            pdf.add_page()
+            style.apply(pdf)
+            pdf.cell(0, style.height, title({**context, "name": image.name}), ln=1)
+            pdf.image(io.BytesIO(image.data), x=20, w=pdf.w - 40)
+            if image.name in insights:
+                _draw_insight(pdf, insight_style, insights[image.name])
+        
+        if not images and empty:
+            pdf.add_page()
+            empty_style.apply(pdf)
+            pdf.cell(0, empty_style.height, empty, ln=1)
+    return draw
+
+BLOCK_COMPILERS = {
+    "page": _compile_page,
+    "space": _compile_space,
+    "text": _compile_text_block,
+    "table": _compile_table,
+    "insight": _compile_insight,
+    "group": _compile_group,
+    "plots": _compile_plots
+}
+
+def _style(styles: dict, name: str) -> TextStyle:
+    if name not in styles:
+        raise ValueError(f"Unknown report style '{name}'. Expected one of: {', '.join(styles)}")
+    return styles[name]
+
+def _compile_block(block: dict, styles: dict):
+    block_type = block.get("type")
+    if block_type not in BLOCK_COMPILERS:
+        raise ValueError(f"Unknown report block type '{block_type}'. Expected one of: {', '.join(BLOCK_COMPILERS)}")
+    draw = BLOCK_COMPILERS[block_type](block, styles)
+    
+    # "if" names a context value; the block is skipped when it is missing or empty
+    condition = block.get("if")
+    if condition is None:
+        return draw
+    
+    def draw_if(pdf, context):
+        if context.get(condition):
+            draw(pdf, context)
+    return draw_if
+
+def compile_template(spec: dict) -> ReportTemplate:
+    """
+    Compiles a template description: a "title" for the page header, named "styles" and
+    the list of "blocks" to draw, in order. Raises ValueError for unknown block types or styles.
+    """
+    styles = {
+        name: TextStyle(tuple(style["font"]), tuple(style.get("color", (0,))), style.get("height", 6),
+                        style.get("space_before", 0))
+        for name, style in spec.get("styles", {}).items()
+    }
+    blocks = [_compile_block(block, styles) for block in spec["blocks"]]
+    return ReportTemplate(spec.get("title", ""), blocks)
+
+@lru_cache(maxsize=16)
+def _load_template(path: str, mtime_ns: int) -> ReportTemplate:
+    with open(path, "r", encoding="utf-8") as f:
+        template = compile_template(json.load(f))
+    log(f"Compiled report template {path}")
+    return template
+
+def get_report_template(path: str = None) -> ReportTemplate:
+    """
+    The compiled template at path (default: the REPORT_TEMPLATE environment variable,
+    otherwise report_template.json). Templates are compiled once per process and again
+    only when their file changes, so a batch of reports reuses the same layout.
+    """
+    path = os.path.abspath(path or os.getenv("REPORT_TEMPLATE", DEFAULT_TEMPLATE))
+    return _load_template(path, os.stat(path).st_mtime_ns)
@@ -1,4 +1,17 @@
+from job_log import log, verbose
+from skills.budget_projection_tool import projected_total
+
+# Weights of the risk factors in the overall risk score
+RISK_WEIGHTS = {"deficit": 0.4, "inflation": 0.3, "gdp_growth": 0.3}
+
 def risk_identification(projections: dict) -> str:
+    """
+    The overall risk ranking ("low", "medium", "high", or "unknown") of the projections;
+    see risk_assessment for how it is computed.
+    """
+    return risk_assessment(projections)["risk_level"]
+
+def risk_assessment(projections: dict) -> dict:
     """
     Computes a risk ranking ("low", "medium", or "high") based on projected values.
     The projections dictionary is expected to contain:
@@ -29,21 +42,28 @@ def risk_identification(projections: dict) -> str:
       - 0.3 <= risk_score < 0.6 -> "medium"
       - risk_score >= 0.6 -> "high"
     
-    Returns the overall risk ranking as a string.
+    Returns {"risk_level": ranking, "risk_score": score, "factors": {name: {"value",
+    "risk", "weight"}}} with the deficit ratio and the projected inflation and GDP growth
+    rates as the factor values, or {"risk_level": "unknown"} without revenue or expenditure
+    projections. The intermediate factors are logged only when the job log is verbose.
     """
     
     # 1. Compute total projected revenue and expenditure
     revenue_items = projections.get("projected_revenue", [])
     expenditure_items = projections.get("projected_expenditure", [])
     if not revenue_items or not expenditure_items:
-        print("Error: Missing revenue or expenditure projections.")
-        return "unknown"
+        log("Error: Missing revenue or expenditure projections.", level="error")
+        return {"risk_level": "unknown"}
+    
+    # Intermediate factors are only formatted when the job log is verbose
+    detailed = verbose()
     
-    total_revenue = sum(item.get("projected_amount", 0) for item in revenue_items)
-    total_expenditure = sum(item.get("projected_amount", 0) for item in expenditure_items)
+    total_revenue = projected_total(revenue_items)
+    total_expenditure = projected_total(expenditure_items)
     
-    print(f"Total Projected Revenue: {total_revenue}")
-    print(f"Total Projected Expenditure: {total_expenditure}")
+    if detailed:
+        log(f"Total Projected Revenue: {total_revenue}", level="debug")
+        log(f"Total Projected Expenditure: {total_expenditure}", level="debug")
     
     # Calculate deficit ratio (if revenue is zero, set risk to high)
     if total_revenue == 0:
@@ -59,7 +79,8 @@ def risk_identification(projections: dict) -> str:
     else:
         deficit_risk = 0
     
-    print(f"Deficit Ratio: {deficit_ratio:.2f} (Risk Factor: {deficit_risk})")
+    if detailed:
+        log(f"Deficit Ratio: {deficit_ratio:.2f} (Risk Factor: {deficit_risk})", level="debug")
     
     # 2. Inflation Risk Factor
     projected_inflation = projections.get("projected_inflation", {})
@@ -72,7 +93,8 @@ def risk_identification(projections: dict) -> str:
     else:
         inflation_risk = 0
     
-    print(f"Projected Inflation Rate: {inflation_rate} (Risk Factor: {inflation_risk})")
+    if detailed:
+        log(f"Projected Inflation Rate: {inflation_rate} (Risk Factor: {inflation_risk})", level="debug")
     
     # 3. GDP Growth Risk Factor
     projected_gdp = projections.get("projected_gdp_growth", {})
@@ -85,11 +107,20 @@ def risk_identification(projections: dict) -> str:
     else:
         gdp_risk = 0
     
-    print(f"Projected GDP Growth Rate: {gdp_growth_rate} (Risk Factor: {gdp_risk})")
+    if detailed:
+        log(f"Projected GDP Growth Rate: {gdp_growth_rate} (Risk Factor: {gdp_risk})", level="debug")
     
     # 4. Compute overall risk score using weighted average
-    risk_score = 0.4 * deficit_risk + 0.3 * inflation_risk + 0.3 * gdp_risk
-    print(f"Overall Risk Score: {risk_score:.2f}")
+    factors = {
+        "deficit": {"value": round(float(deficit_ratio), 4), "risk": deficit_risk},
+        "inflation": {"value": inflation_rate, "risk": inflation_risk},
+        "gdp_growth": {"value": gdp_growth_rate, "risk": gdp_risk}
+    }
+    for name, factor in factors.items():
+        factor["weight"] = RISK_WEIGHTS[name]
+    risk_score = sum(factor["risk"] * factor["weight"] for factor in factors.values())
+    if detailed:
+        log(f"Overall Risk Score: {risk_score:.2f}", level="debug")
     
     # 5. Determine overall risk ranking based on risk score
     if risk_score < 0.3:
@@ -99,5 +130,5 @@ def risk_identification(projections: dict) -> str:
     else:
         overall_risk = "high"
     
-    print(f"Overall Risk Ranking: {overall_risk.upper()}")
-    return overall_risk
\ No newline at end of file
+    log(f"Overall Risk Ranking: {overall_risk.upper()}")
+    return {"risk_level": overall_risk, "risk_score": round(risk_score, 2), "factors": factors}
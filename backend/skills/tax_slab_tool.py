@@ -1,4 +1,6 @@
 import os
+from job_log import log
+from skills.budget_projection_tool import projected_total
 
 def create_tax_slabs(projections: dict) -> list:
     """
@@ -16,11 +18,11 @@ def create_tax_slabs(projections: dict) -> list:
     """
     revenue_items = projections.get("projected_revenue", [])
     if not revenue_items:
-        print("No projected revenue data available to create tax slabs.")
+        log("No projected revenue data available to create tax slabs.")
         return []
 
-    total_revenue = sum(item.get("projected_amount", 0) for item in revenue_items)
-    print(f"Total Projected Revenue: {total_revenue:.2f}")
+    total_revenue = projected_total(revenue_items)
+    log(f"Total Projected Revenue: {total_revenue:.2f}")
 
     # Define slab limits based on total projected revenue
     slab1_limit = total_revenue * 0.2
@@ -33,8 +35,8 @@ def create_tax_slabs(projections: dict) -> list:
         {"slab": 3, "range": f"Above {slab2_limit:.2f}", "tax_rate": "30%"}
     ]
 
-    print("Tax slabs created:")
+    log("Tax slabs created:")
     for slab in slabs:
-        print(f"Slab {slab['slab']}: Range: {slab['range']}, Tax Rate: {slab['tax_rate']}")
+        log(f"Slab {slab['slab']}: Range: {slab['range']}, Tax Rate: {slab['tax_rate']}")
 
     return slabs
\ No newline at end of file
@@ -1,12 +1,165 @@
+import asyncio
+import io
 import os
-import uuid
 import json
+from dataclasses import dataclass
 import matplotlib
 # Force matplotlib to use a non-interactive backend that doesn't require a GUI
 matplotlib.use('Agg')  # Add this line before importing pyplot
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from job_log import log
+from plot_cache import get_plot_cache, plot_key
+from artifacts import Artifact, ArtifactRegistry
 
-def create_visual_plots(data: dict, output_dir: str = "visual plots") -> None:
+# Part of every plot cache key; bump it whenever the way charts are drawn changes
+PLOT_STYLE_VERSION = 2
+
+# Image formats charts can be rendered in. SVG keeps the charts as vectors in the report,
+# which is smaller and sharper than embedding rasters.
+PLOT_FORMATS = ("png", "svg")
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+def default_plot_format() -> str:
+    """
+    The format set by the PLOT_FORMAT environment variable, "png" by default.
+    """
+    fmt = os.getenv("PLOT_FORMAT", "png").lower()
+    if fmt not in PLOT_FORMATS:
+        raise ValueError(f"Unknown plot format '{fmt}'. Expected one of: {', '.join(PLOT_FORMATS)}")
+    return fmt
+
+def figure_bytes(fig: Figure, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+# Charts are drawn on their own Figure objects rather than through pyplot's global state,
+# so they can be rendered concurrently in threads or worker processes.
+
+def render_revenue_pie(labels: list, values: list, fmt: str = "png") -> bytes:
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=140)
+    ax.set_title("Revenues")
+    return figure_bytes(fig, fmt)
+
+def render_expenditure_bar(labels: list, values: list, fmt: str = "png") -> bytes:
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(labels, values, color='skyblue')
+    ax.set_xlabel("Expenditure Category")
+    ax.set_ylabel("Amount")
+    ax.set_title("Expenditure")
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(45)
+        tick.set_horizontalalignment("right")
+    fig.tight_layout()
+    return figure_bytes(fig, fmt)
+
+def render_gdp_growth_scatter(labels: list, values: list, fmt: str = "png") -> bytes:
+    fig = Figure()
+    ax = fig.subplots()
+    ax.scatter(labels, values, color='green')
+    ax.set_xlabel("Year")
+    ax.set_ylabel("GDP Growth Rate")
+    ax.set_title("GDP Growth")
+    return figure_bytes(fig, fmt)
+
+def render_inflation_scatter(labels: list, values: list, fmt: str = "png") -> bytes:
+    fig = Figure()
+    ax = fig.subplots()
+    ax.scatter(labels, values, color='red')
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Inflation Rate")
+    ax.set_title("Inflation")
+    return figure_bytes(fig, fmt)
+
+# (file name prefix, description, section, label field, default label, value field, renderer)
+CHARTS = (
+    ("pie_chart_revenues", "pie chart for revenues", "revenue", "name", "Unknown", "amount", render_revenue_pie),
+    ("bar_plot_expenditure", "bar plot for expenditure", "expenditure", "name", "Unknown", "amount", render_expenditure_bar),
+    ("scatter_plot_gdp_growth", "scatter plot for GDP growth", "gdp_growth", "year", "Unknown", "rate", render_gdp_growth_scatter),
+    ("scatter_plot_inflation", "scatter plot for Inflation", "inflation", "year", "Unknown", "rate", render_inflation_scatter),
+)
+
+# Shown when a section has nothing to plot
+NO_DATA_LABELS = {
+    "revenue": "revenue",
+    "expenditure": "expenditure",
+    "gdp_growth": "GDP growth",
+    "inflation": "inflation"
+}
+
+@dataclass
+class PlotJob:
+    """
+    One chart to produce: its data series, format, cache key and, optionally, the file
+    it is saved to. Plain data plus a module-level renderer, so it can be sent to a
+    worker process.
+    """
+    name: str
+    description: str
+    render: object
+    labels: list
+    values: list
+    fmt: str
+    key: str
+    output_file: str = None
+
+def plan_visual_plots(data: dict, output_dir: str = None, fmt: str = None) -> list:
+    """
+    Returns a PlotJob for every chart that has data. If output_dir is given (and created
+    if needed) the charts are also saved there; otherwise they only live in memory.
+    """
+    fmt = fmt or default_plot_format()
+    # Create the output directory if it does not exist
+    if output_dir is not None and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        log(f"Created directory: {output_dir}")
+    
+    jobs = []
+    for name, description, section, label_field, default_label, value_field, render in CHARTS:
+        items = data.get(section, [])
+        if not items:
+            log(f"No {NO_DATA_LABELS[section]} data available for visualization.")
+            continue
+        
+        labels = [item.get(label_field, default_label) for item in items]
+        values = [item.get(value_field, 0) for item in items]
+        key = get_plot_cache_key(name, labels, values, fmt)
+        output_file = os.path.join(output_dir, f"{name}_{key[:16]}.{fmt}") if output_dir is not None else None
+        jobs.append(PlotJob(name, description, render, labels, values, fmt, key, output_file))
+    return jobs
+
+def produce_plot(job: PlotJob) -> Artifact:
+    """
+    Renders one chart, or takes it from the plot cache when the same data has been
+    plotted before, and saves it to job.output_file if set.
+    Returns the plot as an Artifact of kind "plot" holding the encoded image.
+    """
+    cache = get_plot_cache()
+    suffix = "." + job.fmt
+    data = cache.get(job.key, suffix) if cache is not None else None
+    if data is not None:
+        action = "Reused cached"
+    else:
+        data = job.render(job.labels, job.values, job.fmt)
+        if cache is not None:
+            cache.put(job.key, data, suffix)
+        action = "Rendered"
+    
+    if job.output_file is not None:
+        with open(job.output_file, "wb") as f:
+            f.write(data)
+        log(f"{action} {job.description}, saved as: {job.output_file}")
+    else:
+        log(f"{action} {job.description} ({len(data) / 1024:.0f} KB {job.fmt})")
+    return Artifact(
+        name=job.name, data=data, media_type=MEDIA_TYPES[job.fmt], kind="plot",
+        metadata={"description": job.description, "format": job.fmt, "content_key": job.key}
+    )
+
+def create_visual_plots(data: dict, output_dir: str = "visual plots", fmt: str = None) -> ArtifactRegistry:
     """
     Creates visualizations for:
       1. Revenues (pie chart)
@@ -14,89 +167,54 @@ def create_visual_plots(data: dict, output_dir: str = "visual plots") -> None:
       3. GDP Growth (scatter plot)
       4. Inflation (scatter plot)
     
-    Saves each image in the 'output_dir' with a unique filename.
+    Renders each chart in fmt (see PLOT_FORMATS) and, unless output_dir is None, saves it
+    in the 'output_dir', named after the chart and a hash of its data. Charts are taken
+    from the plot cache when the same data has been plotted before.
+    Returns the plots in an ArtifactRegistry, which compile_report embeds without
+    reading them back from disk.
+    The charts are produced one after the other; see create_visual_plots_concurrently.
     """
-    # Create the output directory if it does not exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"Created directory: {output_dir}")
-
-    # 1. Pie chart for revenues
-    revenue_data = data.get("revenue", [])
-    if revenue_data:
-        labels = [item.get("name", "Unknown") for item in revenue_data]
-        sizes = [item.get("amount", 0) for item in revenue_data]
-        plt.figure()
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140)
-        plt.title("Revenues")
-        pie_file = os.path.join(output_dir, f"pie_chart_revenues_{uuid.uuid4().hex}.png")
-        plt.savefig(pie_file)
-        plt.close()
-        print(f"Saved pie chart for revenues as: {pie_file}")
-    else:
-        print("No revenue data available for visualization.")
-
-    # 2. Bar plot for expenditure
-    expenditure_data = data.get("expenditure", [])
-    if expenditure_data:
-        labels = [item.get("name", "Unknown") for item in expenditure_data]
-        amounts = [item.get("amount", 0) for item in expenditure_data]
-        plt.figure()
-        plt.bar(labels, amounts, color='skyblue')
-        plt.xlabel("Expenditure Category")
-        plt.ylabel("Amount")
-        plt.title("Expenditure")
-        plt.xticks(rotation=45, ha="right")
-        bar_file = os.path.join(output_dir, f"bar_plot_expenditure_{uuid.uuid4().hex}.png")
-        plt.tight_layout()
-        plt.savefig(bar_file)
-        plt.close()
-        print(f"Saved bar plot for expenditure as: {bar_file}")
-    else:
-        print("No expenditure data available for visualization.")
-
-    # 3. Scatter plot for GDP Growth
-    gdp_growth_data = data.get("gdp_growth", [])
-    if gdp_growth_data:
-        years = [item.get("year", "Unknown") for item in gdp_growth_data]
-        rates = [item.get("rate", 0) for item in gdp_growth_data]
-        plt.figure()
-        plt.scatter(years, rates, color='green')
-        plt.xlabel("Year")
-        plt.ylabel("GDP Growth Rate")
-        plt.title("GDP Growth")
-        scatter_gdp_file = os.path.join(output_dir, f"scatter_plot_gdp_growth_{uuid.uuid4().hex}.png")
-        plt.savefig(scatter_gdp_file)
-        plt.close()
-        print(f"Saved scatter plot for GDP growth as: {scatter_gdp_file}")
-    else:
-        print("No GDP growth data available for visualization.")
-
-    # 4. Scatter plot for Inflation
-    inflation_data = data.get("inflation", [])
-    if inflation_data:
-        years = [item.get("year", "Unknown") for item in inflation_data]
-        rates = [item.get("rate", 0) for item in inflation_data]
-        plt.figure()
-        plt.scatter(years, rates, color='red')
-        plt.xlabel("Year")
-        plt.ylabel("Inflation Rate")
-        plt.title("Inflation")
-        scatter_inflation_file = os.path.join(output_dir, f"scatter_plot_inflation_{uuid.uuid4().hex}.png")
-        plt.savefig(scatter_inflation_file)
-        plt.close()
-        print(f"Saved scatter plot for Inflation as: {scatter_inflation_file}")
-    else:
-        print("No inflation data available for visualization.")
+    return ArtifactRegistry(produce_plot(job) for job in plan_visual_plots(data, output_dir, fmt))
+
+async def create_visual_plots_concurrently(data: dict, output_dir: str, executor, fmt: str = None) -> ArtifactRegistry:
+    """
+    Like create_visual_plots, but every chart is produced as its own task on executor
+    (a SkillExecutor), so the charts render in parallel. A chart that fails is logged
+    and left out of the result; it does not stop the others.
+    """
+    jobs = plan_visual_plots(data, output_dir, fmt)
+    results = await asyncio.gather(*(executor.run(produce_plot, job) for job in jobs), return_exceptions=True)
+    plots = ArtifactRegistry()
+    for job, result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            log(f"Error: Failed to create {job.description}: {result}", level="error")
+        else:
+            plots.add(result)
+    return plots
+
+def get_plot_cache_key(name: str, labels: list, values: list, fmt: str) -> str:
+    """
+    Cache key of one chart: its data series plus everything else that affects the image.
+    """
+    params = {
+        "style": PLOT_STYLE_VERSION,
+        "format": fmt,
+        "dpi": matplotlib.rcParams["savefig.dpi"],
+        "matplotlib": matplotlib.__version__
+    }
+    return plot_key(name, labels, values, params)
+
+def load_plot_data(file_path: str) -> dict:
+    with open(file_path, "r") as f:
+        data = json.load(f)
+    log(f"Loaded data from {file_path}")
+    return data
 
 def create_visual_plots_from_json(file_path: str = "input_data.json", output_dir: str = "visual plots") -> None:
     """
     Reads a JSON file, converts it into a dictionary, and then passes it to create_visual_plots().
     """
     try:
-        with open(file_path, "r") as f:
-            data = json.load(f)
-        print(f"Loaded data from {file_path}")
-        create_visual_plots(data, output_dir)
+        create_visual_plots(load_plot_data(file_path), output_dir)
     except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        log(f"Error: {e}", level="error")
@@ -0,0 +1,71 @@
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+
+from job_log import log
+
+# Legacy file names used by the single-user CLI layout
+INPUT_FILENAME = "input_data.json"
+REPORT_FILENAME = "final_budget_report.pdf"
+
+@dataclass
+class JobWorkspace:
+    """
+    The set of paths a single workflow run reads from and writes to.
+    
+    Every agent and skill receives its paths from here instead of relying on
+    relative names and the process working directory, so several jobs can run
+    side by side in one process.
+    """
+    root: str
+    input_path: str
+    report_path: str
+    
+    @classmethod
+    def at(cls, root: str) -> "JobWorkspace":
+        root = os.path.abspath(root)
+        return cls(
+            root=root,
+            input_path=os.path.join(root, INPUT_FILENAME),
+            report_path=os.path.join(root, REPORT_FILENAME),
+        )
+    
+    def output_path(self, fmt: str) -> str:
+        """
+        Where the report output in fmt ("pdf", "json", ...) is written: report_path for
+        the PDF, the same name with the format's extension for the others.
+        """
+        if fmt == "pdf":
+            return self.report_path
+        return os.path.splitext(self.report_path)[0] + "." + fmt
+    
+    def cleanup(self) -> None:
+        """
+        Remove the workspace directory and everything generated inside it.
+        """
+        if os.path.exists(self.root):
+            try:
+                shutil.rmtree(self.root)
+                log(f"Cleaned up job workspace: {self.root}")
+            except Exception as e:
+                log(f"Error cleaning up job workspace: {str(e)}", level="error")
+
+def create_workspace(base_dir: str, job_id: str = None) -> JobWorkspace:
+    """
+    Create a fresh workspace directory for a job under base_dir.
+    """
+    job_id = job_id or uuid.uuid4().hex
+    workspace = JobWorkspace.at(os.path.join(base_dir, job_id))
+    # Never let a stale directory from an earlier run leak files into this job
+    if os.path.exists(workspace.root):
+        shutil.rmtree(workspace.root)
+    os.makedirs(workspace.root)
+    return workspace
+
+def default_workspace() -> JobWorkspace:
+    """
+    Workspace matching the original layout: input_data.json and final_budget_report.pdf
+    in the current directory. Used when running main.py.
+    """
+    return JobWorkspace.at(os.getcwd())
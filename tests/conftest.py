@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The backend and API modules import each other by module name, as when run from their directories
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("backend", "api"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,81 @@
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from agent_factory import ModelConfig, ModelRegistry
+
+CONFIG = ModelConfig(provider="openai", model_name="gpt-4o", api_key="sk-test")
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+    
+    def finish(self):
+        super().finish()
+        self.server.closed.release()
+    
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.closed = threading.Semaphore(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+async def _request(registry: ModelRegistry, server):
+    # Leaves a keep-alive connection in the pool of the registry's client
+    registry.get_model(CONFIG)
+    client = registry._http_client
+    response = await client.get(f"http://127.0.0.1:{server.server_port}/")
+    assert response.status_code == 200
+    return client
+
+def test_models_are_shared():
+    registry = ModelRegistry()
+    assert registry.get_model(CONFIG) is registry.get_model(CONFIG)
+    assert registry.get_model(CONFIG) is not registry.get_model(ModelConfig("openai", "gpt-4o-mini", "sk-test"))
+
+def test_client_of_a_stopped_loop_is_closed(server):
+    registry = ModelRegistry()
+    first = asyncio.run(_request(registry, server))
+    assert not server.closed.acquire(timeout=0.2)
+    second = asyncio.run(_request(registry, server))
+    assert second is not first
+    # The first loop has stopped, so its connection is shut down without it
+    assert server.closed.acquire(timeout=5)
+
+def test_client_of_a_running_loop_is_closed_on_it(server):
+    registry = ModelRegistry()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        first = asyncio.run_coroutine_threadsafe(_request(registry, server), loop).result()
+        asyncio.run(_request(registry, server))
+        assert server.closed.acquire(timeout=5)
+        assert first.is_closed
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+def test_aclose():
+    registry = ModelRegistry()
+    
+    async def use_and_close():
+        registry.get_model(CONFIG)
+        client = registry._http_client
+        await registry.aclose()
+        return client
+    assert asyncio.run(use_and_close()).is_closed
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from collections import OrderedDict
+
+import pytest
+
+import artifacts
+import executor
+from artifacts import get_projection_artifact, projection_summary
+from executor import SkillExecutor
+from skills.budget_projection_tool import project_budget
+
+@pytest.fixture
+def projections(tmp_path):
+    data = {
+        "revenue": [{"name": f"Tax {index}", "amount": 100.0 * (index + 1), "growth_rate": 0.0} for index in range(20)],
+        "expenditure": [{"name": "Health", "amount": 300.0, "growth_rate": 0.0},
+                        {"name": "Roads", "amount": 100.0, "growth_rate": 0.0}],
+        "inflation": [{"year": "2023", "rate": 2.0}],
+        "gdp_growth": [{"year": "2023", "rate": 3.0}]
+    }
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps(data))
+    return project_budget(str(path))
+
+@pytest.fixture
+def projected(monkeypatch, tmp_path):
+    """
+    Counts the projections run, in the test's process and with an empty projection cache.
+    """
+    monkeypatch.setattr(executor, "_skill_executor", SkillExecutor(kind="inline"))
+    monkeypatch.setattr(artifacts, "_projection_cache", OrderedDict())
+    runs = []
+    
+    def counted(file_path):
+        runs.append(file_path)
+        return project_budget(file_path)
+    monkeypatch.setattr(artifacts, "project_budget", counted)
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps({
+        "revenue": [{"name": "Taxes", "amount": 100.0}],
+        "expenditure": [{"name": "Health", "amount": 80.0}],
+        "inflation": [],
+        "gdp_growth": []
+    }))
+    return str(path), runs
+
+def test_summary_lists_only_the_largest_items(projections):
+    summary = projection_summary(projections, top_n=3)
+    assert summary["revenue_items"] == 20
+    assert summary["total_projected_revenue"] == pytest.approx(21000.0)
+    revenue = summary["revenue"]
+    assert [item["name"] for item in revenue["largest"]] == ["Tax 19", "Tax 18", "Tax 17"]
+    assert revenue["largest"][0]["share"] == pytest.approx(2000.0 / 21000.0)
+    assert revenue["other_items"] == 17
+    assert revenue["other_projected_amount"] == pytest.approx(21000.0 - 2000.0 - 1900.0 - 1800.0)
+    # The summary is small and serializable whatever the size of the ledger
+    json.dumps(summary)
+
+def test_summary_of_a_short_ledger(projections):
+    expenditure = projection_summary(projections, top_n=3)["expenditure"]
+    assert [item["name"] for item in expenditure["largest"]] == ["Health", "Roads"]
+    assert (expenditure["other_items"], expenditure["other_projected_amount"]) == (0, 0.0)
+
+def test_projections_are_reused(projected):
+    path, runs = projected
+    first = asyncio.run(get_projection_artifact(path))
+    second = asyncio.run(get_projection_artifact(path))
+    assert len(runs) == 1
+    assert second.content_hash == first.content_hash
+    assert second.projections["horizon_years"] == first.projections["horizon_years"]
+
+def test_jobs_cannot_change_shared_projections(projected):
+    path, _ = projected
+    first = asyncio.run(get_projection_artifact(path))
+    first.projections["horizon_years"].append("2099")
+    first.projections["projected_inflation"]["rate"] = 99.0
+    with pytest.raises(ValueError):
+        first.projections["projected_revenue"].outlook[0, 0] = 0.0
+    second = asyncio.run(get_projection_artifact(path))
+    assert "2099" not in second.projections["horizon_years"]
+    assert second.projections["projected_inflation"].get("rate") != 99.0
+
+def test_projections_follow_the_default_base_year(projected, monkeypatch):
+    # Without dated series the base year is last calendar year, so a new year projects again
+    path, runs = projected
+    monkeypatch.setattr(artifacts, "default_base_year", lambda: 2024)
+    asyncio.run(get_projection_artifact(path))
+    monkeypatch.setattr(artifacts, "default_base_year", lambda: 2025)
+    asyncio.run(get_projection_artifact(path))
+    assert len(runs) == 2
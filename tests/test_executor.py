@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from executor import SkillExecutor
+from job_log import JobLog, job_log_context, log
+
+def _square(value):
+    log(f"squaring {value}")
+    return value * value
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        SkillExecutor(kind="gpu")
+
+def test_defaults():
+    executor = SkillExecutor(kind="inline", max_workers=2)
+    assert executor.max_pending == 8
+    assert not executor.saturated
+
+def test_pending_calls_saturate_the_executor():
+    executor = SkillExecutor(kind="thread", max_workers=2, max_pending=3)
+    release = threading.Event()
+    running = []
+    
+    def blocked(index):
+        running.append(index)
+        release.wait(5)
+        return index
+    
+    async def submit():
+        tasks = [asyncio.ensure_future(executor.run(blocked, index)) for index in range(3)]
+        await asyncio.sleep(0.1)
+        # Only max_workers calls run, the rest wait, and all of them count as pending
+        state = (len(running), executor.pending, executor.saturated)
+        release.set()
+        return state, await asyncio.gather(*tasks)
+    try:
+        state, results = asyncio.run(submit())
+    finally:
+        executor.shutdown()
+    assert state == (2, 3, True)
+    assert results == [0, 1, 2]
+    assert executor.pending == 0 and not executor.saturated
+
+def test_failures_release_their_slot():
+    executor = SkillExecutor(kind="inline", max_workers=1, max_pending=1)
+    
+    def failing():
+        raise RuntimeError("skill failed")
+    with pytest.raises(RuntimeError):
+        asyncio.run(executor.run(failing))
+    assert executor.pending == 0
+
+@pytest.mark.parametrize("kind", ["process", "thread", "inline"])
+def test_skill_logs_reach_the_job_log(kind):
+    executor = SkillExecutor(kind=kind, max_workers=1)
+    job_log = JobLog()
+    
+    async def run():
+        with job_log_context(job_log):
+            return await executor.run(_square, 7)
+    try:
+        assert asyncio.run(run()) == 49
+    finally:
+        executor.shutdown()
+    assert [record["message"] for record in job_log.tail(1)] == ["squaring 7"]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from benchmarks.datasets import generate_input
+from skills import report_export_tool
+from skills.budget_projection_tool import project_budget
+from skills.report_export_tool import export_reports, parse_report_formats
+from skills.risk_identification_tool import risk_assessment
+from skills.tax_slab_tool import create_tax_slabs
+
+@pytest.fixture(scope="module")
+def report(tmp_path_factory) -> dict:
+    path = tmp_path_factory.mktemp("input") / "input.json"
+    path.write_text(json.dumps(generate_input(40, horizon=3)), encoding="utf-8")
+    projections = project_budget(str(path))
+    assessment = risk_assessment(projections)
+    return {
+        "projections": projections,
+        "risk_level": assessment["risk_level"],
+        "risk_assessment": assessment,
+        "tax_slabs": create_tax_slabs(projections)
+    }
+
+def _export(tmp_path, report: dict, fmt: str) -> str:
+    path = str(tmp_path / f"report.{fmt}")
+    assert export_reports({fmt: path}, **report) == {fmt: path}
+    return path
+
+def test_parse_report_formats():
+    assert parse_report_formats(" JSON,pdf,json ") == ("json", "pdf")
+    assert parse_report_formats(["html"]) == ("html",)
+    with pytest.raises(ValueError, match="Unknown report format 'xlsx'"):
+        parse_report_formats("pdf,xlsx")
+    with pytest.raises(ValueError, match="At least one report format"):
+        parse_report_formats(" , ")
+
+def test_pdf_is_left_to_compile_report(tmp_path, report):
+    assert export_reports({"pdf": str(tmp_path / "report.pdf")}, **report) == {}
+    assert not (tmp_path / "report.pdf").exists()
+
+def test_json(tmp_path, report):
+    with open(_export(tmp_path, report, "json"), encoding="utf-8") as f:
+        bundle = json.load(f)
+    assert bundle["horizon_years"] == report["projections"]["horizon_years"]
+    assert len(bundle["total_projected_revenue"]) == 3
+    assert len(bundle["projected_revenue"]) + len(bundle["projected_expenditure"]) == 40
+    assert bundle["risk_level"] == report["risk_level"]
+    assert set(bundle["risk_assessment"]["factors"]) == {"deficit", "inflation", "gdp_growth"}
+    assert bundle["tax_slabs"] == report["tax_slabs"]
+    assert "insights" not in bundle
+
+def test_parquet(tmp_path, report):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(_export(tmp_path, report, "parquet"))
+    years = report["projections"]["horizon_years"]
+    assert table.num_rows == 40
+    assert table.column_names == ["section", "name", "amount", "projected_amount"] + [f"projected_{year}" for year in years]
+    assert table.column("projected_amount").to_pylist() == table.column(f"projected_{years[0]}").to_pylist()
+    summary = json.loads(table.schema.metadata[b"budget_report"])
+    assert summary["risk_assessment"] == report["risk_assessment"]
+
+def test_parquet_unavailable(tmp_path, report, monkeypatch):
+    monkeypatch.setattr(report_export_tool, "pa", None)
+    assert "parquet" not in report_export_tool.available_report_formats()
+    with pytest.raises(ValueError, match="install pyarrow"):
+        _export(tmp_path, report, "parquet")
+
+def test_html(tmp_path, report):
+    with open(_export(tmp_path, report, "html"), encoding="utf-8") as f:
+        page = f.read()
+    assert page.startswith("<!DOCTYPE html>")
+    assert f"Overall Risk Ranking: {report['risk_level'].upper()}" in page
+    assert "<th>Risk Factor</th>" in page and "Deficit Ratio" in page
+    assert f"Overall Risk Score: {report['risk_assessment']['risk_score']}" in page
+    assert "Visual Analysis" not in page
+
+def test_html_escapes_names(tmp_path, report):
+    projections = dict(report["projections"], projected_revenue=[{"name": "<script>", "projected_amount": 1.0}])
+    with open(_export(tmp_path, dict(report, projections=projections), "html"), encoding="utf-8") as f:
+        page = f.read()
+    assert "<script>" not in page and "&lt;script&gt;" in page
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from benchmarks.datasets import generate_input
+from skills.dataset_standardization_tool import IMPUTATION_STRATEGIES, impute_missing, standardize_data
+
+def _document() -> dict:
+    return {
+        "revenue": [
+            {"name": "Income tax", "amount": 100.0, "category": "tax"},
+            {"name": "VAT", "category": "tax", "history": [40.0, 50.0]},
+            {"name": "Fees", "amount": 10.0, "category": "other"},
+            {"name": "Customs", "amount": 30.0, "category": "tax"},
+            {"name": "Grants", "amount": "n/a"}
+        ],
+        "expenditure": [{"name": "Health", "amount": 5.0}],
+        "inflation": [{"year": "2022", "rate": 2.0}, {"year": "2021", "rate": 1.0}, {"year": "2023"}],
+        "gdp_growth": [{"year": "2020"}, {"year": "2021", "rate": 3.0}]
+    }
+
+def _amounts(data: dict, section: str = "revenue") -> list:
+    return [item.get("amount") for item in data[section]]
+
+def test_mean():
+    data = _document()
+    summary = impute_missing(data, "mean")
+    assert _amounts(data) == [100.0, pytest.approx(140 / 3), 10.0, 30.0, pytest.approx(140 / 3)]
+    assert summary["sections"]["revenue"] == {"field": "amount", "records": 5, "imputed": 2,
+                                              "fill_value": pytest.approx(140 / 3)}
+    assert summary["sections"]["expenditure"]["imputed"] == 0
+    assert summary["total_imputed"] == 4
+
+def test_median():
+    data = _document()
+    impute_missing(data, "median")
+    assert _amounts(data) == [100.0, 30.0, 10.0, 30.0, 30.0]
+
+def test_carry_forward():
+    data = _document()
+    impute_missing(data, "carry_forward")
+    # VAT carries its last history value; Grants has no history and gets the section mean
+    assert _amounts(data) == [100.0, 50.0, 10.0, 30.0, pytest.approx(140 / 3)]
+    # Rates carry the previous year's value, ordered by year; the first year gets the mean
+    assert data["inflation"][2]["rate"] == 2.0
+    assert data["gdp_growth"][0]["rate"] == 3.0
+
+def test_category_mean():
+    data = _document()
+    impute_missing(data, "category_mean")
+    # VAT gets the mean of the other tax items; Grants has no category
+    assert _amounts(data) == [100.0, 65.0, 10.0, 30.0, pytest.approx(140 / 3)]
+
+@pytest.mark.parametrize("strategy", IMPUTATION_STRATEGIES)
+def test_only_missing_values_are_touched(strategy):
+    data = generate_input(200, missing_fraction=0.3, seed=1)
+    original = json.loads(json.dumps(data))
+    summary = impute_missing(data, strategy)
+    
+    missing = sum("amount" not in item for section in ("revenue", "expenditure") for item in original[section])
+    assert summary["total_imputed"] == missing
+    for section in ("revenue", "expenditure"):
+        for before, after in zip(original[section], data[section]):
+            assert isinstance(after["amount"], float)
+            if "amount" in before:
+                assert after["amount"] == before["amount"]
+
+def test_empty_section_falls_back_to_zero():
+    data = {"revenue": [{"name": "A"}, {"name": "B"}]}
+    impute_missing(data, "mean")
+    assert _amounts(data) == [0.0, 0.0]
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown imputation strategy 'mode'"):
+        impute_missing(_document(), "mode")
+
+def test_standardize_data_fills_the_file(tmp_path):
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps(_document()), encoding="utf-8")
+    data = standardize_data(str(path), strategy="median")
+    assert _amounts(data) == [100.0, 30.0, 10.0, 30.0, 30.0]
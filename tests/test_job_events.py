@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+from job_events import EventBroker, JobEventWriter
+from job_store import MemoryJobStore
+
+def test_notify_from_another_thread():
+    broker = EventBroker()
+    
+    async def receive():
+        subscription = broker.subscribe("job_1")
+        thread = threading.Thread(target=broker.notify, args=("job_1", 1, {"type": "step"}))
+        thread.start()
+        assert await broker.wait(subscription, timeout=5)
+        thread.join()
+        return subscription.take(0)
+    assert asyncio.run(receive()) == [(1, {"type": "step"})]
+
+def test_take_skips_events_already_seen():
+    broker = EventBroker()
+    
+    async def receive():
+        subscription = broker.subscribe("job_1")
+        for seq in (1, 2, 3):
+            broker.notify("job_1", seq, {"type": "progress", "completed": seq})
+        await broker.wait(subscription, timeout=5)
+        return [seq for seq, _ in subscription.take(1)], subscription.take(0)
+    assert asyncio.run(receive()) == ([2, 3], [])
+
+def test_wait_times_out_and_unsubscribed_streams_get_nothing():
+    broker = EventBroker()
+    
+    async def receive():
+        subscription = broker.subscribe("job_1")
+        other = broker.subscribe("job_2")
+        broker.unsubscribe(subscription)
+        broker.notify("job_1", 1, {"type": "step"})
+        return await broker.wait(subscription, timeout=0.05), await broker.wait(other, timeout=0.05)
+    assert asyncio.run(receive()) == (False, False)
+
+def test_writer_stores_events_in_order_and_notifies():
+    store = MemoryJobStore()
+    store.create("job_1", "/tmp/workspace", {"status": "processing"})
+    broker = EventBroker()
+    
+    async def run_job():
+        subscription = broker.subscribe("job_1")
+        writer = JobEventWriter(store, broker, "job_1")
+        assert broker.is_local("job_1")
+        writer.publish({"type": "step", "step": "data_validation"})
+        # Only the latest of the queued status records is written
+        writer.save({"status": "processing", "step_number": 1})
+        writer.save({"status": "processing", "step_number": 2})
+        threads = [threading.Thread(target=writer.publish, args=({"type": "log", "index": index},)) for index in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.publish({"type": "status", "status": "completed"})
+        await writer.close()
+        assert not broker.is_local("job_1")
+        await asyncio.sleep(0)
+        return subscription.take(0)
+    delivered = asyncio.run(run_job())
+    stored = store.events_since("job_1", 0)
+    assert [seq for seq, _ in stored] == list(range(1, 8))
+    assert stored[0][1]["type"] == "step" and stored[-1][1]["type"] == "status"
+    assert sorted(event["index"] for _, event in stored if event["type"] == "log") == list(range(5))
+    assert delivered == stored
+    assert store.get("job_1") == {"status": "processing", "step_number": 2}
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from job_store import MemoryJobStore, SQLiteJobStore, create_job_store, new_job_id
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+def test_create_and_get(store):
+    job_id = new_job_id()
+    store.create(job_id, "/tmp/workspace", {"status": "processing", "step_number": 0})
+    assert store.get(job_id) == {"status": "processing", "step_number": 0}
+    assert store.get_workspace_root(job_id) == "/tmp/workspace"
+    assert store.get("job_missing") is None
+    assert store.get_workspace_root("job_missing") is None
+
+def test_update_replaces_the_record(store):
+    store.create("job_1", "/tmp/workspace", {"status": "processing"})
+    store.update("job_1", {"status": "completed", "summary": {"risk_level": "low"}})
+    assert store.get("job_1") == {"status": "completed", "summary": {"risk_level": "low"}}
+    # Updating an unknown job is a no-op
+    store.update("job_missing", {"status": "failed"})
+    assert store.get("job_missing") is None
+
+def test_events(store):
+    store.create("job_1", "/tmp/workspace", {"status": "processing"})
+    assert [store.append_event("job_1", {"step": index}) for index in range(3)] == [1, 2, 3]
+    assert store.events_since("job_1", 1) == [(2, {"step": 1}), (3, {"step": 2})]
+    assert store.events_since("job_1", 0, limit=1) == [(1, {"step": 0})]
+
+def test_finished_jobs_expire(store):
+    store.create("job_running", "/tmp/running", {"status": "processing"})
+    store.create("job_done", "/tmp/done", {"status": "processing"})
+    store.update("job_done", {"status": "completed"})
+    now = time.time()
+    assert store.expired(60, now=now) == []
+    assert store.expired(60, now=now + 120) == [("job_done", "/tmp/done")]
+
+def test_jobs_created_finished_expire(store):
+    # Jobs served from the result cache are completed when they are created
+    store.create("job_cached", "/tmp/cached", {"status": "completed"})
+    assert store.expired(60, now=time.time() + 120) == [("job_cached", "/tmp/cached")]
+
+def test_stale_jobs_expire(store):
+    store.create("job_running", "/tmp/running", {"status": "processing"})
+    later = time.time() + 120
+    assert store.expired(600, now=later) == []
+    assert store.expired(600, now=later, stale_seconds=60) == [("job_running", "/tmp/running")]
+
+def test_delete(store):
+    store.create("job_1", "/tmp/workspace", {"status": "completed"})
+    store.append_event("job_1", {"step": 0})
+    store.delete("job_1")
+    assert store.get("job_1") is None
+    assert store.events_since("job_1", 0) == []
+
+def test_create_job_store(tmp_path):
+    assert isinstance(create_job_store("memory", ""), MemoryJobStore)
+    assert isinstance(create_job_store("sqlite", str(tmp_path / "jobs.db")), SQLiteJobStore)
+    with pytest.raises(ValueError):
+        create_job_store("redis", "")
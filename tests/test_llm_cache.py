@@ -0,0 +1,47 @@
+import asyncio
+import datetime
+import os
+import time
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+from llm_cache import LLMCache, request_key
+
+def _messages(timestamp) -> list:
+    return [ModelRequest(parts=[UserPromptPart("Project the budget", timestamp=timestamp)])]
+
+def test_request_key_ignores_timestamps():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    later = now + datetime.timedelta(minutes=5)
+    assert request_key("openai:gpt", _messages(now), None, None) == request_key("openai:gpt", _messages(later), None, None)
+    assert request_key("openai:gpt", _messages(now), None, None) != request_key("anthropic:claude", _messages(now), None, None)
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMCache(str(tmp_path), ttl_seconds=60)
+    cache.put("fresh", ModelResponse(parts=[TextPart("hello")]))
+    cache.put("stale", ModelResponse(parts=[TextPart("old")]))
+    stale = cache.path("stale.json")
+    os.utime(stale, (time.time() - 120, time.time() - 120))
+    assert cache.get("fresh").parts[0].content == "hello"
+    assert cache.get("stale") is None
+    cache.evict()
+    assert not os.path.exists(stale)
+
+def test_identical_requests_are_coalesced(tmp_path):
+    cache = LLMCache(str(tmp_path))
+    calls = []
+    
+    async def send():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ModelResponse(parts=[TextPart("answer")])
+    
+    async def main():
+        return await asyncio.gather(*(cache.request("key", send) for _ in range(3)))
+    
+    responses = asyncio.run(main())
+    assert len(calls) == 1
+    assert [response.parts[0].content for response in responses] == ["answer"] * 3
+    # Later requests are answered from disk
+    assert asyncio.run(cache.request("key", send)).parts[0].content == "answer"
+    assert len(calls) == 1
@@ -0,0 +1,27 @@
+import os
+
+from plot_cache import PlotCache, plot_key
+
+def test_plot_key():
+    assert plot_key("pie", [1, 2], {"dpi": 100}) == plot_key("pie", [1, 2], {"dpi": 100})
+    assert plot_key("pie", [1, 2], {"dpi": 100}) != plot_key("pie", [1, 2], {"dpi": 150})
+    assert plot_key("pie", [1, 2], {"dpi": 100}) != plot_key("pie", [2, 1], {"dpi": 100})
+
+def test_get_and_put(tmp_path):
+    cache = PlotCache(str(tmp_path), max_bytes=1000)
+    assert cache.get("chart") is None
+    cache.put("chart", b"<svg/>", suffix=".svg")
+    assert cache.get("chart", suffix=".svg") == b"<svg/>"
+    assert cache.get("chart") is None
+    assert os.listdir(tmp_path) == ["chart.svg"]
+
+def test_size_eviction_is_least_recently_used(tmp_path):
+    cache = PlotCache(str(tmp_path), max_bytes=350)
+    for index in range(3):
+        cache.put(f"k{index}", b"x" * 100)
+        # The LRU order is the modification time; keep it distinct on coarse file systems
+        os.utime(cache.path(f"k{index}.png"), (index, index))
+    assert cache.get("k0") == b"x" * 100
+    cache.put("k3", b"x" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["k0.png", "k2.png", "k3.png"]
+    assert cache.get("k1") is None
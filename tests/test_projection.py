@@ -0,0 +1,69 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.datasets import generate_input
+from orchestrator import projection_base_year
+from skills.budget_projection_tool import MAX_HORIZON, project_budget
+from skills.growth_models import (GROWTH_MODELS, TREND_MODELS, exp_smoothing_trend, fixed_growth, linear_trend,
+                                  log_linear_trend)
+
+def test_every_model_is_implemented():
+    assert set(TREND_MODELS) | {"fixed"} == set(GROWTH_MODELS)
+
+def test_fixed_growth_compounds_per_item():
+    projected = fixed_growth(np.array([100.0, 50.0]), np.array([0.1, 0.0]), 3)
+    np.testing.assert_allclose(projected, [[110.0, 121.0, 133.1], [50.0, 50.0, 50.0]])
+
+def test_linear_trend_extends_a_line():
+    series = np.array([[1.0, 3.0, 5.0, 7.0], [10.0, 10.0, 10.0, 10.0]])
+    np.testing.assert_allclose(linear_trend(series, 2), [[9.0, 11.0], [10.0, 10.0]])
+
+def test_linear_trend_matches_polyfit():
+    rng = np.random.default_rng(0)
+    series = rng.uniform(1, 100, size=(50, 8))
+    projected = linear_trend(series, 3)
+    for row, result in zip(series, projected):
+        slope, intercept = np.polyfit(np.arange(8), row, 1)
+        np.testing.assert_allclose(result, intercept + slope * np.arange(8, 11))
+
+def test_log_linear_trend_keeps_the_growth_rate():
+    series = 100 * 1.05 ** np.arange(6)[None, :]
+    np.testing.assert_allclose(log_linear_trend(series, 2), 100 * 1.05 ** np.array([[6, 7]]))
+
+def test_log_linear_trend_falls_back_to_linear():
+    series = np.array([[0.0, 1.0, 2.0], [1.0, 2.0, 4.0]])
+    projected = log_linear_trend(series, 1)
+    np.testing.assert_allclose(projected[0], [3.0])
+    np.testing.assert_allclose(projected[1], [8.0])
+
+def test_exp_smoothing_follows_a_linear_series():
+    series = np.array([[2.0, 4.0, 6.0, 8.0, 10.0]])
+    np.testing.assert_allclose(exp_smoothing_trend(series, 3), [[12.0, 14.0, 16.0]])
+
+@pytest.mark.parametrize("model", sorted(TREND_MODELS))
+def test_trend_shapes(model):
+    series = np.random.default_rng(1).uniform(1, 10, size=(7, 5))
+    assert TREND_MODELS[model](series, 4).shape == (7, 4)
+
+def _write(tmp_path, data: dict) -> str:
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+def test_project_budget_horizon(tmp_path):
+    projections = project_budget(_write(tmp_path, generate_input(10, horizon=4)))
+    assert projections["horizon_years"] == ["2024", "2025", "2026", "2027"]
+    assert projections["projected_revenue"].outlook.shape == (5, 4)
+    assert project_budget(_write(tmp_path, generate_input(10)), horizon=MAX_HORIZON + 1) == {}
+
+def test_base_year_without_dated_series_follows_the_date():
+    data = generate_input(10)
+    assert projection_base_year(data) == 2023
+    data["projection"]["base_year"] = 2020
+    assert projection_base_year(data) == 2020
+    del data["inflation"], data["gdp_growth"], data["projection"]["base_year"]
+    assert projection_base_year(data) == datetime.date.today().year - 1
+    assert projection_base_year({"inflation": [1]}) is None
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from artifacts import Artifact, ArtifactRegistry
+from skills import report_template
+from skills.report_template import compile_template, get_report_template
+
+SPEC = {
+    "title": "Test Report",
+    "styles": {
+        "section": {"font": ["Arial", "B", 14], "color": [0, 51, 102], "height": 10},
+        "body": {"font": ["Arial", "", 11]},
+        "insight": {"font": ["Arial", "I", 11], "space_before": 5}
+    },
+    "blocks": [
+        {"type": "page"},
+        {"type": "text", "style": "section", "text": "Risk: {risk_level}"},
+        {"type": "table", "rows": "rows", "headers": ["Name", "Amount"], "aligns": "LR"},
+        {"type": "insight", "key": "revenue", "default": "Default revenue insight."},
+        {"type": "group", "if": "outlook_rows", "blocks": [
+            {"type": "space", "height": 8},
+            {"type": "text", "text": "Outlook"}
+        ]},
+        {"type": "plots", "style": "section", "title": "Chart: {name}", "insights": "visual", "empty": "No charts."}
+    ]
+}
+
+class RecordingPDF:
+    """
+    Records the drawing calls a template makes instead of rendering them.
+    """
+    w = 210
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args))
+    
+    def texts(self) -> list:
+        return [args[2] for name, args in self.calls if name in ("cell", "multi_cell")]
+
+def _render(context: dict, spec: dict = SPEC) -> RecordingPDF:
+    pdf = RecordingPDF()
+    compile_template(spec).render(pdf, {"risk_level": "LOW", "rows": [["Taxes", "$1.00"]], **context})
+    return pdf
+
+def test_render_with_defaults():
+    pdf = _render({"insights": None, "plots": None})
+    assert pdf.texts() == ["Risk: LOW", "Default revenue insight.", "No charts."]
+    assert ("create_table", (["Name", "Amount"], [["Taxes", "$1.00"]], None, "LR")) in pdf.calls
+    assert ("set_text_color", (0, 51, 102)) in pdf.calls
+    assert not any(name == "ln" and args == (8,) for name, args in pdf.calls)
+
+def test_render_with_insights_plots_and_conditions():
+    plots = ArtifactRegistry([Artifact("pie", b"png", "image/png", kind="plot")])
+    insights = {"revenue": "Revenue grew.", "visual": {"pie": "Mostly taxes."}}
+    pdf = _render({"insights": insights, "plots": plots, "outlook_rows": [["2024"]]})
+    assert pdf.texts() == ["Risk: LOW", "Revenue grew.", "Outlook", "Chart: pie", "Mostly taxes."]
+    assert ("ln", (8,)) in pdf.calls
+    assert sum(1 for name, _ in pdf.calls if name == "image") == 1
+
+def test_insights_without_a_section_are_skipped():
+    pdf = _render({"insights": {"visual": {}}, "plots": None})
+    assert "Default revenue insight." not in pdf.texts()
+
+@pytest.mark.parametrize("block, message", [
+    ({"type": "chart"}, "Unknown report block type"),
+    ({"type": "text", "style": "huge", "text": "x"}, "Unknown report style")
+])
+def test_invalid_templates(block, message):
+    with pytest.raises(ValueError, match=message):
+        compile_template({"styles": SPEC["styles"], "blocks": [block]})
+
+def test_default_template_compiles():
+    template = get_report_template(report_template.DEFAULT_TEMPLATE)
+    assert template.title == "Budget Analysis Report"
+    assert template.blocks
+
+def test_templates_are_compiled_again_only_when_changed(tmp_path):
+    path = tmp_path / "template.json"
+    path.write_text(json.dumps(SPEC))
+    first = get_report_template(str(path))
+    assert get_report_template(str(path)) is first
+    path.write_text(json.dumps({**SPEC, "title": "Changed"}))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert get_report_template(str(path)).title == "Changed"
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+import disk_cache
+from benchmarks.datasets import generate_input
+from disk_cache import DiskCache, shared_cache
+from plot_cache import PlotCache
+from result_cache import ResultCache, result_key
+from workspace import JobWorkspace
+
+CONFIG = {"mode": "pipeline", "llm_insights": False, "formats": ["pdf"]}
+
+def _workspace(root) -> JobWorkspace:
+    os.makedirs(root)
+    return JobWorkspace.at(str(root))
+
+def test_result_key_is_canonical():
+    data = generate_input(10)
+    reordered = json.loads(json.dumps(dict(reversed(list(data.items())))))
+    assert result_key(data, CONFIG) == result_key(reordered, dict(reversed(list(CONFIG.items()))))
+    assert result_key(data, CONFIG) != result_key(data, {**CONFIG, "mode": "agents"})
+    changed = json.loads(json.dumps(data))
+    changed["revenue"][0]["amount"] += 1
+    assert result_key(data, CONFIG) != result_key(changed, CONFIG)
+
+def test_result_cache_restores_copies(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=10 ** 6)
+    first = _workspace(tmp_path / "first")
+    with open(first.output_path("json"), "w", encoding="utf-8") as f:
+        f.write('{"risk_level": "low"}')
+    cache.put("key", {"status": "success", "outputs": {"json": first.output_path("json")}, "report_data": {"a": 1}})
+    
+    second = _workspace(tmp_path / "second")
+    result = cache.get("key", second)
+    assert result["cached"] and result["report_data"] == {"a": 1}
+    assert result["outputs"] == {"json": second.output_path("json")}
+    # A later run writing into the workspace must not change the cache entry
+    with open(second.output_path("json"), "w", encoding="utf-8") as f:
+        f.write("overwritten")
+    third = _workspace(tmp_path / "third")
+    assert cache.get("key", third) is not None
+    with open(third.output_path("json"), encoding="utf-8") as f:
+        assert f.read() == '{"risk_level": "low"}'
+    assert cache.get("other", second) is None
+
+def test_entries_are_written_atomically(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    with pytest.raises(RuntimeError):
+        cache.write_dir("broken", lambda directory: (_ for _ in ()).throw(RuntimeError("fill failed")))
+    assert os.listdir(tmp_path) == []
+
+def test_shared_cache_is_configured_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "_caches", {})
+    monkeypatch.setenv("TEST_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TEST_CACHE_MAX_BYTES", "0")
+    assert shared_cache(PlotCache, "TEST_CACHE", "unused", max_bytes=100) is None
+    monkeypatch.setenv("TEST_CACHE_MAX_BYTES", "500")
+    cache = shared_cache(PlotCache, "TEST_CACHE", "unused", max_bytes=100)
+    assert (cache.directory, cache.max_bytes) == (str(tmp_path), 500)
+    assert shared_cache(PlotCache, "TEST_CACHE", "unused", max_bytes=100) is cache
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+import pytest
+
+from job_log import JobLog, job_log_context, log
+from scheduler import Stage, StageFailed, run_stages
+
+def _run(stages, on_event=None):
+    return asyncio.run(run_stages(stages, on_event))
+
+def test_stages_run_after_their_dependencies():
+    order = []
+    
+    def stage(name):
+        async def run(results):
+            order.append(name)
+            await asyncio.sleep(0.01 if name == "a" else 0)
+            return name.upper()
+        return run
+    stages = [
+        Stage("c", stage("c"), depends_on=("a", "b")),
+        Stage("b", stage("b")),
+        Stage("a", stage("a")),
+        Stage("d", stage("d"), depends_on=("c",))
+    ]
+    results, timings = _run(stages)
+    assert results == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert order.index("c") > max(order.index("a"), order.index("b"))
+    assert order[-1] == "d"
+    assert set(timings) == {"a", "b", "c", "d"}
+
+def test_results_are_passed_on():
+    stages = [
+        Stage("base", lambda results: 2),
+        Stage("double", lambda results: results["base"] * 2, depends_on=("base",))
+    ]
+    assert _run(stages)[0]["double"] == 4
+
+def test_independent_stages_run_concurrently():
+    
+    async def workflow():
+        both = asyncio.Barrier(2)
+        
+        async def wait_for_the_other(results):
+            # Only returns if the other stage is running at the same time
+            await asyncio.wait_for(both.wait(), timeout=5)
+        return await run_stages([Stage("a", wait_for_the_other), Stage("b", wait_for_the_other)])
+    results, _ = asyncio.run(workflow())
+    assert set(results) == {"a", "b"}
+
+def test_failure_cancels_running_stages():
+    cancelled = []
+    events = []
+    
+    async def slow(results):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+    
+    async def failing(results):
+        await asyncio.sleep(0)
+        raise StageFailed("broken input")
+    
+    def never(results):
+        raise AssertionError("ran after a failed dependency")
+    stages = [Stage("slow", slow), Stage("failing", failing), Stage("after", never, depends_on=("failing",))]
+    with pytest.raises(StageFailed, match="broken input"):
+        _run(stages, events.append)
+    assert cancelled == ["slow"]
+    states = [(event["stage"], event["state"]) for event in events if event["type"] == "stage"]
+    assert ("failing", "failed") in states and ("slow", "failed") in states
+    assert "after" not in {stage for stage, _ in states}
+
+def test_thread_stages_keep_the_job_log():
+    job_log = JobLog()
+    threads = []
+    
+    def in_thread(results):
+        threads.append(threading.current_thread())
+        log("computed in a thread")
+        return 1
+    with job_log_context(job_log):
+        _run([Stage("cpu", in_thread, executor="thread")])
+    assert threads[0] is not threading.main_thread()
+    assert [record["message"] for record in job_log.tail(1)] == ["computed in a thread"]
+
+@pytest.mark.parametrize("stages, message", [
+    ([Stage("a", None), Stage("a", None)], "unique"),
+    ([Stage("a", None, depends_on=("b",))], "unknown stage"),
+    ([Stage("a", None, depends_on=("b",)), Stage("b", None, depends_on=("a",))], "cycle"),
+    ([Stage("a", None, executor="skill")], "Unknown executor")
+])
+def test_invalid_graphs(stages, message):
+    with pytest.raises(ValueError, match=message):
+        _run(stages)
@@ -0,0 +1,86 @@
+import importlib
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+INPUT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "input_data.json")
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    # The server reads its configuration from the environment when it is imported
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("JOBS_DIR", str(tmp_path_factory.mktemp("jobs")))
+        monkeypatch.setenv("JOB_STORE", "memory")
+        monkeypatch.setenv("MODEL_PROVIDER", "local")
+        monkeypatch.setenv("RESULT_CACHE_MAX_BYTES", "0")
+        monkeypatch.setenv("SKILL_EXECUTOR", "thread")
+        yield importlib.import_module("server")
+
+@pytest.fixture(scope="module")
+def client(server):
+    with TestClient(server.app) as client:
+        yield client
+
+def _read_events(client, job_id: str, last_event_id: int = None) -> list:
+    """
+    Reads the job's event stream until it ends, as (id, event name, data) tuples.
+    """
+    headers = {"Last-Event-ID": str(last_event_id)} if last_event_id is not None else {}
+    events = []
+    with client.stream("GET", f"/events/{job_id}", headers=headers) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        fields = {}
+        for line in response.iter_lines():
+            if not line:
+                if fields:
+                    events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+                fields = {}
+            elif not line.startswith(":"):
+                name, _, value = line.partition(": ")
+                fields[name] = value
+    return events
+
+def _run_job(client, formats: str) -> str:
+    with open(INPUT_FILE, "rb") as f:
+        response = client.post(f"/upload?mode=pipeline&formats={formats}", files={"file": ("input.json", f, "application/json")})
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    # The event stream ends when the job has finished
+    _read_events(client, job_id)
+    return job_id
+
+def test_event_stream(client):
+    with open(INPUT_FILE, "rb") as f:
+        job_id = client.post("/upload?mode=pipeline&formats=json", files={"file": ("input.json", f, "application/json")}).json()["job_id"]
+    events = _read_events(client, job_id)
+    ids = [seq for seq, _, _ in events]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert all(name == data["type"] for _, name, data in events)
+    names = {name for _, name, _ in events}
+    assert {"step", "stage", "progress", "log"} <= names
+    last_id, last_name, last_data = events[-1]
+    assert (last_name, last_data["status"]) == ("status", "completed")
+    # Reconnecting clients resume after their Last-Event-ID
+    assert _read_events(client, job_id, last_event_id=ids[-3]) == events[-2:]
+
+def test_outputs_can_be_downloaded_again(client):
+    job_id = _run_job(client, "json")
+    assert client.get(f"/status/{job_id}").json()["status"] == "completed"
+    for _ in range(2):
+        response = client.get(f"/download/{job_id}?format=json")
+        assert response.status_code == 200
+        assert response.json()["risk_level"]
+    assert client.get(f"/download/{job_id}?format=pdf").status_code == 404
+
+def test_unknown_job(client):
+    assert client.get("/status/job_missing").status_code == 404
+    assert client.get("/download/job_missing").status_code == 404
+
+def test_uploads_are_refused_when_busy(client, server, monkeypatch):
+    monkeypatch.setattr(server, "active_jobs", server.max_active_jobs)
+    with open(INPUT_FILE, "rb") as f:
+        response = client.post("/upload?mode=pipeline&formats=json", files={"file": ("input.json", f, "application/json")})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from benchmarks.datasets import generate_input
+from skills import data_validation_tool
+from skills.data_validation_tool import validate_bytes, validate_file
+
+@pytest.fixture(params=["streaming", "json.load"])
+def validate(request, monkeypatch, tmp_path):
+    # Both ways of reading a file must report the same errors
+    if request.param == "streaming":
+        if data_validation_tool.ijson is None:
+            pytest.skip("ijson is not installed")
+        monkeypatch.setenv("VALIDATION_STREAM_MIN_BYTES", "0")
+    path = tmp_path / "input.json"
+    
+    def validate(content: bytes, max_errors: int = 100):
+        path.write_bytes(content)
+        return validate_file(str(path), max_errors)
+    return validate
+
+def _errors(validate, data, max_errors: int = 100) -> list:
+    return validate(json.dumps(data).encode("utf-8"), max_errors).errors
+
+def test_valid_document(validate):
+    report = validate(json.dumps(generate_input(20, horizon=3)).encode("utf-8"))
+    assert report.valid
+    assert report.errors == []
+    assert len(report.data["revenue"]) == 10
+
+def test_item_errors(validate):
+    data = generate_input(4)
+    del data["revenue"][1]["amount"]
+    data["expenditure"][0]["amount"] = "a lot"
+    data["expenditure"][1]["model"] = "quadratic"
+    data["inflation"][2] = 3.5
+    assert _errors(validate, data) == [
+        {"path": "$.revenue[1].amount", "message": "Missing field 'amount' in item 1 of 'revenue'."},
+        {"path": "$.expenditure[0].amount", "message": "Field 'amount' in item 0 of 'expenditure' must be numeric."},
+        {"path": "$.expenditure[1].model",
+         "message": "Field 'model' in item 1 of 'expenditure' must be one of: fixed, linear, log_linear, exp_smoothing."},
+        {"path": "$.inflation[2]", "message": "Item 2 in 'inflation' is not a JSON object."}
+    ]
+
+def test_document_errors(validate):
+    data = generate_input(4)
+    del data["gdp_growth"]
+    data["revenue"] = {"name": "Taxes"}
+    assert _errors(validate, data) == [
+        {"path": "$.revenue", "message": "The field 'revenue' should be a list."},
+        {"path": "$.gdp_growth", "message": "Missing required field: 'gdp_growth'"}
+    ]
+    assert _errors(validate, [1, 2]) == [{"path": "$", "message": "The input data must be a JSON object."}]
+
+@pytest.mark.parametrize("horizon", [0, 51, 10 ** 7, "3", True])
+def test_horizon_out_of_range(validate, horizon):
+    data = generate_input(4)
+    data["projection"] = {"horizon": horizon}
+    assert _errors(validate, data) == [
+        {"path": "$.projection.horizon", "message": "Field 'horizon' in 'projection' must be an integer from 1 to 50."}
+    ]
+
+def test_base_year_must_be_an_integer(validate):
+    data = generate_input(4)
+    data["projection"] = {"base_year": False}
+    assert _errors(validate, data) == [
+        {"path": "$.projection.base_year", "message": "Field 'base_year' in 'projection' must be an integer."}
+    ]
+
+def test_invalid_json(validate):
+    report = validate(b'{"revenue": [')
+    assert not report.valid
+    assert report.data is None
+    assert report.errors == [{"path": "$", "message": "Invalid JSON format"}]
+
+def test_missing_file(tmp_path):
+    path = str(tmp_path / "missing.json")
+    assert validate_file(path).errors == [{"path": "$", "message": f"File not found: {path}"}]
+
+def test_errors_are_capped(validate):
+    data = generate_input(10)
+    for item in data["revenue"]:
+        del item["amount"]
+    report = validate(json.dumps(data).encode("utf-8"), max_errors=3)
+    assert len(report.errors) == 3
+    assert report.error_count == 5
+    assert report.truncated
+
+def test_validate_bytes_matches_validate_file(tmp_path):
+    data = generate_input(4)
+    del data["revenue"][0]["amount"]
+    content = json.dumps(data).encode("utf-8")
+    path = tmp_path / "input.json"
+    path.write_bytes(content)
+    assert validate_bytes(content).errors == validate_file(str(path)).errors
+
+def test_small_files_are_not_streamed(monkeypatch, tmp_path):
+    if data_validation_tool.ijson is None:
+        pytest.skip("ijson is not installed")
+    def fail(*args):
+        raise AssertionError("streamed")
+    monkeypatch.setattr(data_validation_tool, "_parse_streaming", fail)
+    path = tmp_path / "input.json"
+    path.write_text(json.dumps(generate_input(4)))
+    assert validate_file(str(path)).valid
+    monkeypatch.setenv("VALIDATION_STREAM_MIN_BYTES", "1")
+    with pytest.raises(AssertionError):
+        validate_file(str(path))